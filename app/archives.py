@@ -0,0 +1,242 @@
+"""Lectura en streaming de los archivos comprimidos que publican BCRA y AFIP: ZIP, 7z, gzip y zstd.
+
+El formato se detecta por los primeros bytes del archivo, no por su nombre. open_archive_member devuelve un
+stream que descomprime a medida que se lee, sin extraer el contenido a un archivo temporal; para 7z la
+extracción de py7zr corre en un hilo aparte y entrega los bloques por una cola acotada.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import queue
+import threading
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, NamedTuple, Optional
+
+try:
+    import py7zr
+except ImportError:  # py7zr es opcional; sin él no se aceptan archivos 7z.
+    py7zr = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard es opcional; sin él no se aceptan archivos zstd.
+    zstandard = None
+
+FORMAT_ZIP = "zip"
+FORMAT_7Z = "7z"
+FORMAT_GZIP = "gzip"
+FORMAT_ZSTD = "zstd"
+
+_MAGIC_NUMBERS = (
+    (b"PK\x03\x04", FORMAT_ZIP),
+    (b"PK\x05\x06", FORMAT_ZIP),
+    (b"7z\xbc\xaf\x27\x1c", FORMAT_7Z),
+    (b"\x1f\x8b", FORMAT_GZIP),
+    (b"\x28\xb5\x2f\xfd", FORMAT_ZSTD),
+)
+_STREAM_BUFFER_BYTES = 1024 * 1024
+# Bloques de py7zr en vuelo entre el hilo de extracción y el lector.
+_SEVEN_ZIP_QUEUE_BLOCKS = 16
+
+
+class ArchiveError(ValueError):
+    """El archivo no tiene un formato soportado, está dañado o no contiene el miembro esperado."""
+
+
+class ArchiveMember(NamedTuple):
+    stream: BinaryIO
+    # Tamaño descomprimido; None cuando el formato no lo guarda (gzip y zstd).
+    size: Optional[int]
+    archive_format: str
+
+
+def detect_format(path: Path) -> Optional[str]:
+    with path.open("rb") as stream:
+        header = stream.read(8)
+    for magic, archive_format in _MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return archive_format
+    return None
+
+
+def _require_format(path: Path) -> str:
+    archive_format = detect_format(path)
+    if archive_format is None:
+        raise ArchiveError("no es un archivo ZIP, 7z, gzip ni zstd válido.")
+    if archive_format == FORMAT_7Z and py7zr is None:
+        raise ArchiveError("es un archivo 7z y el servidor no tiene instalado py7zr.")
+    if archive_format == FORMAT_ZSTD and zstandard is None:
+        raise ArchiveError("es un archivo zstd y el servidor no tiene instalado zstandard.")
+    return archive_format
+
+
+class _ReaderClosed(Exception):
+    pass
+
+
+class _QueueReader(io.RawIOBase):
+    """Lado de lectura de un productor que corre en otro hilo; close() le avisa que deje de producir."""
+
+    _END = object()
+
+    def __init__(self, max_blocks: int) -> None:
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_blocks)
+        self._cancelled = threading.Event()
+        self._pending = memoryview(b"")
+        self._finished = False
+        self._error: Optional[BaseException] = None
+
+    def put(self, data: bytes) -> None:
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(data, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise _ReaderClosed()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self._error = error
+        try:
+            self.put(self._END)
+        except _ReaderClosed:
+            pass
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._pending:
+            if self._finished:
+                return 0
+            item = self._queue.get()
+            if item is self._END:
+                self._finished = True
+                if self._error is not None:
+                    raise ArchiveError("no se pudo descomprimir el archivo 7z.") from self._error
+                return 0
+            self._pending = memoryview(item)
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self) -> None:
+        self._cancelled.set()
+        super().close()
+
+
+class _SevenZipWriter:
+    """Destino que py7zr usa en lugar de un archivo en disco: cada bloque pasa a la cola del lector."""
+
+    def __init__(self, reader: _QueueReader) -> None:
+        self._reader = reader
+        self._size = 0
+
+    def write(self, data: bytes) -> int:
+        self._reader.put(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def seekable(self) -> bool:
+        return False
+
+    def flush(self) -> None:
+        pass
+
+    def size(self) -> int:
+        return self._size
+
+    def close(self) -> None:
+        pass
+
+
+class _SevenZipWriterFactory:
+    def __init__(self, reader: _QueueReader) -> None:
+        self._reader = reader
+
+    def create(self, filename: str) -> _SevenZipWriter:
+        return _SevenZipWriter(self._reader)
+
+
+def _extract_seven_zip_member(path: Path, member_name: str, reader: _QueueReader) -> None:
+    try:
+        with py7zr.SevenZipFile(path) as archive:
+            archive.extract(targets=[member_name], factory=_SevenZipWriterFactory(reader))
+    except _ReaderClosed:
+        return
+    except BaseException as exc:
+        reader.finish(exc)
+        return
+    reader.finish()
+
+
+@contextmanager
+def open_archive_member(path: Path, member_name: str) -> Iterator[ArchiveMember]:
+    """Abre member_name dentro del archivo comprimido para leerlo en streaming.
+
+    Los formatos de un solo stream (gzip y zstd) no tienen nombres de miembro y se leen completos.
+    """
+    archive_format = _require_format(path)
+
+    if archive_format == FORMAT_ZIP:
+        with zipfile.ZipFile(path) as zip_file:
+            size = zip_file.getinfo(member_name).file_size
+            with zip_file.open(member_name) as stream:
+                yield ArchiveMember(stream, size, archive_format)
+
+    elif archive_format == FORMAT_7Z:
+        with py7zr.SevenZipFile(path) as archive:
+            size = next((info.uncompressed for info in archive.list() if info.filename == member_name), None)
+        reader = _QueueReader(_SEVEN_ZIP_QUEUE_BLOCKS)
+        threading.Thread(
+            target=_extract_seven_zip_member,
+            args=(path, member_name, reader),
+            name=f"7z-{path.name}",
+            daemon=True,
+        ).start()
+        # Cerrar el stream cancela la extracción aunque no se haya leído completo.
+        with io.BufferedReader(reader, _STREAM_BUFFER_BYTES) as stream:
+            yield ArchiveMember(stream, size, archive_format)
+
+    elif archive_format == FORMAT_GZIP:
+        with gzip.open(path, "rb") as stream:
+            yield ArchiveMember(stream, None, archive_format)
+
+    else:
+        with path.open("rb") as compressed:
+            reader = zstandard.ZstdDecompressor().stream_reader(compressed, read_across_frames=True)
+            with io.BufferedReader(reader, _STREAM_BUFFER_BYTES) as stream:
+                yield ArchiveMember(stream, None, archive_format)
+
+
+def validate_archive(path: Path, member_name: str) -> str:
+    """Verifica que el archivo se pueda abrir y contenga member_name; devuelve el formato detectado.
+
+    En ZIP y 7z solo se lee el índice. gzip y zstd no lo tienen, así que se descomprime el primer bloque.
+    """
+    archive_format = _require_format(path)
+    try:
+        if archive_format == FORMAT_ZIP:
+            with zipfile.ZipFile(path) as zip_file:
+                names = zip_file.namelist()
+        elif archive_format == FORMAT_7Z:
+            with py7zr.SevenZipFile(path) as archive:
+                names = archive.getnames()
+        else:
+            with open_archive_member(path, member_name) as member:
+                member.stream.read(1)
+            return archive_format
+    except ArchiveError:
+        raise
+    except Exception as exc:
+        raise ArchiveError(f"no es un archivo {archive_format} válido.") from exc
+
+    if member_name not in names:
+        raise ArchiveError(f"debe contener {member_name}.")
+    return archive_format
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ImportJob
+
+_MISSING = object()
+
+
+class ResultCache:
+    """LRU acotado por cantidad de entradas, con vencimiento por TTL."""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                    self.evictions += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class DataGenerationTracker:
+    """Invalida caches cuando termina una importación, también si la completó otro worker.
+
+    La generación de cada job_type es el finished_at del último ImportJob completado. Se consulta
+    como máximo una vez cada poll_seconds por proceso.
+    """
+
+    def __init__(self, caches_by_job_type: dict[str, ResultCache], poll_seconds: float) -> None:
+        self.caches_by_job_type = caches_by_job_type
+        self.poll_seconds = poll_seconds
+        self._generations: dict[str, Any] = {}
+        self._polled = False
+        self._next_poll_at = 0.0
+
+    def generation(self, job_type: str) -> Any:
+        """finished_at del último job completado de job_type visto en el último refresh, o None."""
+        return self._generations.get(job_type)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        now = time.monotonic()
+        if now < self._next_poll_at:
+            return
+        self._next_poll_at = now + self.poll_seconds
+
+        rows = (
+            await db.execute(
+                select(ImportJob.job_type, func.max(ImportJob.finished_at))
+                .where(ImportJob.job_type.in_(tuple(self.caches_by_job_type)))
+                .where(ImportJob.status == "completed")
+                .group_by(ImportJob.job_type)
+            )
+        ).all()
+
+        first_poll = not self._polled
+        self._polled = True
+        for job_type, generation in rows:
+            if not first_poll and self._generations.get(job_type) != generation:
+                self.caches_by_job_type[job_type].clear()
+            self._generations[job_type] = generation
@@ -0,0 +1,212 @@
+"""Filtros de Bloom con los CUITs que tienen datos, para responder 404 sin consultar PostgreSQL.
+
+Cada importación arma un filtro con los CUITs de deudores_resumen (último período de cada deudor) o de
+padrones y lo publica en SNAPSHOT_DIR con el mismo mecanismo de puntero que los snapshots de consulta. Los
+procesos de la API lo mapean en memoria: si el filtro dice que un CUIT no está, seguro no está; si dice que
+puede estar, se consulta la base como siempre. La tasa de falsos positivos se elige con
+CUIT_FILTER_FALSE_POSITIVE_PPM (partes por millón) y /stats informa la esperada y la observada.
+"""
+
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional; sin él no se arman filtros y todos los CUITs se consultan en la base.
+    np = None
+
+from app.settings import get_int_setting
+from app.snapshots import SNAPSHOT_DIR, PublishedFileReader, SnapshotError, publish_file
+
+CUIT_FILTERS_ENABLED = get_int_setting("CUIT_FILTERS", 1) != 0 and np is not None
+CUIT_FILTER_FALSE_POSITIVE_PPM = min(500_000, max(1, get_int_setting("CUIT_FILTER_FALSE_POSITIVE_PPM", 1000)))
+
+FILTER_PADRON = "padron_cuits"
+FILTER_DEUDORES = "deudores_cuits"
+
+FILTER_MAGIC = b"BCRABLOM"
+FILTER_VERSION = 1
+# magic, versión, cantidad de funciones de hash, tasa pedida en ppm, bits, CUITs, job_id.
+_HEADER = struct.Struct("<8sHHIQQ36s")
+HEADER_SIZE = 128
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_MIX_1 = 0xBF58476D1CE4E5B9
+_MIX_2 = 0x94D049BB133111EB
+
+
+def _mix(value: int) -> int:
+    # splitmix64: la misma cuenta que _mix_array, con enteros de Python.
+    value = (value + _GOLDEN) & _MASK
+    value = ((value ^ (value >> 30)) * _MIX_1) & _MASK
+    value = ((value ^ (value >> 27)) * _MIX_2) & _MASK
+    return value ^ (value >> 31)
+
+
+def _mix_array(values: np.ndarray) -> np.ndarray:
+    values = values + np.uint64(_GOLDEN)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(_MIX_1)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(_MIX_2)
+    return values ^ (values >> np.uint64(31))
+
+
+def cuit_key(identificacion: str) -> Optional[int]:
+    """El CUIT como entero, o None si no son 11 dígitos (esas identificaciones no entran en el filtro)."""
+    if len(identificacion) != 11 or not identificacion.isascii() or not identificacion.isdigit():
+        return None
+    return int(identificacion)
+
+
+def filter_parameters(keys: int, false_positive_ppm: int) -> tuple[int, int]:
+    """Bits (múltiplo de 64) y funciones de hash óptimos para esa cantidad de CUITs y tasa de falsos positivos."""
+    rate = false_positive_ppm / 1_000_000
+    bits = max(64, math.ceil(-max(keys, 1) * math.log(rate) / math.log(2) ** 2))
+    bits = (bits + 63) // 64 * 64
+    hashes = max(1, round(bits / max(keys, 1) * math.log(2)))
+    return bits, hashes
+
+
+def expected_false_positive_rate(keys: int, bits: int, hashes: int) -> float:
+    return (1 - math.exp(-hashes * keys / bits)) ** hashes
+
+
+def write_cuit_filter(kind: str, job_id: str, chunks: Iterable[list]) -> dict[str, Any]:
+    """Arma el filtro con las identificaciones de chunks (listas de filas de una columna) y lo publica.
+
+    Devuelve la cantidad de CUITs, los bits, las funciones de hash y la tasa de falsos positivos esperada.
+    """
+    keys = np.unique(np.concatenate([
+        np.fromiter((key for key in (cuit_key(row[0]) for row in chunk) if key is not None), dtype=np.uint64)
+        for chunk in chunks
+    ] or [np.empty(0, np.uint64)]))
+    bits, hashes = filter_parameters(len(keys), CUIT_FILTER_FALSE_POSITIVE_PPM)
+    # Un byte por bit mientras se arma: marcar posiciones en un array booleano es varias veces más rápido que
+    # np.bitwise_or.at sobre la tabla empaquetada.
+    marked = np.zeros(bits, dtype=np.bool_)
+    modulo = np.uint64(bits)
+    for start in range(0, len(keys), 1_000_000):
+        first = _mix_array(keys[start:start + 1_000_000])
+        second = _mix_array(first) | np.uint64(1)
+        for index in range(hashes):
+            marked[(first + np.uint64(index) * second) % modulo] = True
+    table = np.packbits(marked, bitorder="little")
+    del marked
+
+    SNAPSHOT_DIR.mkdir(exist_ok=True)
+    path = SNAPSHOT_DIR / f"{kind}-{job_id}.bin"
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        with tmp_path.open("wb") as stream:
+            header = _HEADER.pack(
+                FILTER_MAGIC, FILTER_VERSION, hashes, CUIT_FILTER_FALSE_POSITIVE_PPM, bits, len(keys),
+                job_id.encode("ascii"),
+            )
+            stream.write(header.ljust(HEADER_SIZE, b"\0"))
+            stream.write(table.tobytes())
+            stream.flush()
+            os.fsync(stream.fileno())
+        publish_file(kind, tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return {
+        "keys": len(keys),
+        "bits": bits,
+        "hashes": hashes,
+        "expected_false_positive_rate": expected_false_positive_rate(len(keys), bits, hashes),
+    }
+
+
+class _MappedFilter:
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as stream:
+            self.map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, hashes, false_positive_ppm, bits, keys, job_id = _HEADER.unpack_from(self.map)
+        if (
+            magic != FILTER_MAGIC
+            or version != FILTER_VERSION
+            or hashes < 1
+            or bits % 64
+            or len(self.map) != HEADER_SIZE + bits // 8
+        ):
+            self.map.close()
+            raise SnapshotError(f"{path.name} no es un filtro de CUITs válido")
+        self.name = path.name
+        self.hashes = hashes
+        self.false_positive_ppm = false_positive_ppm
+        self.bits = bits
+        self.keys = keys
+        self.job_id = job_id.rstrip(b"\0").decode("ascii")
+
+    def might_contain(self, key: int) -> bool:
+        first = _mix(key)
+        second = _mix(first) | 1
+        for index in range(self.hashes):
+            position = ((first + index * second) & _MASK) % self.bits
+            if not self.map[HEADER_SIZE + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class CuitFilterReader(PublishedFileReader):
+    """Filtro vigente en este proceso y sus contadores de rechazos y falsos positivos."""
+
+    def __init__(self, kind: str) -> None:
+        super().__init__(kind, CUIT_FILTERS_ENABLED)
+        self.checks = 0
+        self.rejected = 0
+        self.false_positives = 0
+
+    def _open(self, path: Path) -> _MappedFilter:
+        return _MappedFilter(path)
+
+    def is_absent(self, identificacion: str) -> bool:
+        """True solo si el CUIT seguro no tiene datos; sin filtro, o para algo que no es un CUIT, da False."""
+        cuit_filter = self._current()
+        key = cuit_key(identificacion)
+        if cuit_filter is None or key is None:
+            return False
+        self.checks += 1
+        if cuit_filter.might_contain(key):
+            return False
+        self.rejected += 1
+        return True
+
+    def record_misses(self, identificaciones: Iterable[str]) -> None:
+        """Anota como falsos positivos los CUITs que pasaron el filtro y la base no encontró."""
+        if self._file is not None:
+            self.false_positives += sum(1 for identificacion in identificaciones if cuit_key(identificacion) is not None)
+
+    def stats(self) -> dict[str, Any]:
+        cuit_filter = self._file
+        negatives = self.rejected + self.false_positives
+        stats: dict[str, Any] = {
+            "enabled": self.enabled,
+            "false_positive_rate_target": CUIT_FILTER_FALSE_POSITIVE_PPM / 1_000_000,
+            "file": None,
+            "checks": self.checks,
+            "rejected": self.rejected,
+            "false_positives": self.false_positives,
+            "observed_false_positive_rate": self.false_positives / negatives if negatives else None,
+            "reloads": self.reloads,
+        }
+        if cuit_filter is not None:
+            stats.update(
+                file=cuit_filter.name,
+                job_id=cuit_filter.job_id,
+                keys=cuit_filter.keys,
+                bits=cuit_filter.bits,
+                hashes=cuit_filter.hashes,
+                false_positive_rate_target=cuit_filter.false_positive_ppm / 1_000_000,
+                expected_false_positive_rate=expected_false_positive_rate(
+                    cuit_filter.keys, cuit_filter.bits, cuit_filter.hashes
+                ),
+            )
+        return stats
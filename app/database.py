@@ -1,14 +1,28 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-from app.settings import get_secret
+from app.settings import get_int_setting, get_secret
 
 DATABASE_URL = get_secret("DATABASE_URL")
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Las consultas de la API usan asyncpg para no bloquear el event loop de uvicorn.
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=get_int_setting("DATABASE_ASYNC_POOL_SIZE", 20),
+    max_overflow=get_int_setting("DATABASE_ASYNC_MAX_OVERFLOW", 20),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+# asyncpg.connect, usado para LISTEN, no acepta el nombre de driver de SQLAlchemy en la URL.
+LISTEN_DATABASE_DSN = make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -16,3 +30,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
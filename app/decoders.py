@@ -0,0 +1,202 @@
+"""Decodificación por bloques de los archivos de ancho fijo del BCRA (deudores.txt y padron.txt).
+
+Recorta y une todos los campos de un bloque de líneas con operaciones de NumPy y produce el mismo texto
+para COPY que _format_deudor_line y _format_padron_line, que siguen siendo la implementación de
+referencia. Las funciones devuelven None cuando el bloque no admite este camino (numpy no instalado,
+líneas de distinto largo, tabulaciones, retornos de carro o barras invertidas dentro de los campos) y el
+llamador debe formatearlo línea por línea.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional; sin él se usan los formateadores por línea.
+    np = None
+
+TEXT = "text"
+INTEGER = "integer"
+NUMERIC = "numeric"
+
+DEUDOR_FIELDS = (
+    (0, 5, TEXT),
+    (5, 11, TEXT),
+    (11, 13, TEXT),
+    (13, 24, TEXT),
+    (24, 27, TEXT),
+    (27, 29, INTEGER),
+    *((start, start + 12, NUMERIC) for start in range(29, 161, 12)),
+    *((start, start + 1, INTEGER) for start in range(161, 167)),
+    (167, 170, INTEGER),
+)
+# El esquema compacto no copia fecha_informacion: la tabla temporal la completa con su DEFAULT.
+DEUDOR_COMPACT_FIELDS = DEUDOR_FIELDS[:1] + DEUDOR_FIELDS[2:]
+PADRON_FIELDS = (
+    (0, 11, TEXT),
+    (11, 171, TEXT),
+    (171, 177, TEXT),
+    (177, 178, TEXT),
+    (178, 189, TEXT),
+    (189, 190, TEXT),
+)
+
+# Bytes que _sanitize_copy_text reescribiría; su presencia deja el bloque al formateador de referencia.
+_UNSAFE_BYTES = b"\t\r\\"
+
+
+def _whitespace(column: "np.ndarray") -> "np.ndarray":
+    # Los mismos bytes que descarta str.strip() sobre texto ISO-8859-1: 9-13, 28-32, 0x85 y 0xA0.
+    # Las restas sobre uint8 dan la vuelta, así cada rango es una sola comparación.
+    return (
+        ((column - 9) < 5)
+        | ((column - 28) < 5)
+        | (column == 133)
+        | (column == 160)
+    )
+
+
+def _column_matrix(raw_chunk: bytes, width: int) -> Optional["np.ndarray"]:
+    """Devuelve las primeras width columnas del bloque traspuestas (una fila por columna del archivo)."""
+    data = np.frombuffer(raw_chunk, dtype=np.uint8)
+    if data.size == 0 or data[-1] != 10:
+        return None
+
+    line_length = int(np.argmax(data == 10)) + 1
+    if line_length - 1 < width or data.size % line_length:
+        return None
+
+    lines = data.reshape(-1, line_length)
+    if int(np.count_nonzero(data == 10)) != lines.shape[0]:
+        return None
+
+    columns = np.ascontiguousarray(lines[:, :width].T)
+    for unsafe in _UNSAFE_BYTES:
+        if (columns == unsafe).any():
+            return None
+    return columns
+
+
+def _encode_block(
+    columns: "np.ndarray",
+    fields: tuple[tuple[int, int, str], ...],
+    tail: Optional[tuple["np.ndarray", "np.ndarray"]] = None,
+) -> str:
+    """Arma el texto para COPY de todo el bloque.
+
+    Trabaja sobre el bloque traspuesto, así cada operación recorre una columna completa en memoria contigua.
+    Cada columna del archivo pasa a la salida junto con una máscara de los bytes que sobreviven al strip; los
+    separadores son columnas constantes y la salida es una única compactación booleana en orden de filas.
+    tail agrega una última columna de largo variable: una matriz de bytes (columna x fila) y el largo útil
+    de cada fila.
+    """
+    rows = columns.shape[1]
+    tail_width = 0 if tail is None else tail[0].shape[0] + 1
+    width = sum(end - start + 1 for start, end, _ in fields) + tail_width
+    output = np.empty((width, rows), dtype=np.uint8)
+    keep = np.empty((width, rows), dtype=bool)
+    first = np.empty(rows, dtype=np.uint8)
+    last = np.empty(rows, dtype=np.uint8)
+
+    position = 0
+    for start, end, kind in fields:
+        field_width = end - start
+        field = output[position:position + field_width]
+        field[:] = columns[start:end]
+        if kind == NUMERIC:
+            # _nullable_numeric cambia la coma decimal por punto.
+            field[field == ord(",")] = ord(".")
+
+        not_space = [~_whitespace(column) for column in columns[start:end]]
+        first.fill(field_width)
+        last.fill(0)
+        for offset in range(field_width - 1, -1, -1):
+            np.copyto(first, offset, where=not_space[offset])
+        for offset in range(field_width):
+            np.copyto(last, offset + 1, where=not_space[offset])
+        for offset in range(field_width):
+            np.logical_and(first <= offset, last > offset, out=keep[position + offset])
+
+        if kind != TEXT:
+            empty = last == 0
+            if kind == INTEGER:
+                np.copyto(field[0], ord("0"), where=empty)
+                keep[position] |= empty
+            else:
+                np.copyto(field[0], ord("\\"), where=empty)
+                np.copyto(field[1], ord("N"), where=empty)
+                keep[position] |= empty
+                keep[position + 1] |= empty
+
+        position += field_width
+        output[position] = ord("\t")
+        keep[position] = True
+        position += 1
+
+    if tail is None:
+        output[position - 1] = ord("\n")
+    else:
+        tail_bytes, tail_lengths = tail
+        output[position:-1] = tail_bytes
+        for offset in range(tail_width - 1):
+            np.greater(tail_lengths, offset, out=keep[position + offset])
+        output[-1] = ord("\n")
+        keep[-1] = True
+    return output.T[keep.T].tobytes().decode("ISO-8859-1")
+
+
+def decode_deudores_block(
+    raw_chunk: bytes,
+    nombre_entidad: Optional[Callable[[str], str]],
+    fecha_informacion: Optional[str] = None,
+) -> Optional[tuple[int, str]]:
+    """Formatea un bloque de líneas completas de deudores.txt como lo haría _format_deudor_line.
+
+    nombre_entidad recibe el código de entidad ya recortado y devuelve el nombre listo para COPY; con None se
+    omiten esa columna y fecha_informacion, como en el esquema compacto. Ahí, si alguna fila no es del período
+    fecha_informacion, el bloque queda para _format_deudor_line, que la rechaza.
+    """
+    if np is None:
+        return None
+    columns = _column_matrix(raw_chunk, 170)
+    if columns is None:
+        return None
+    if nombre_entidad is None:
+        if fecha_informacion is not None:
+            periodo = np.frombuffer(fecha_informacion.encode("ISO-8859-1"), dtype=np.uint8)
+            if len(periodo) != 6 or (columns[5:11] != periodo[:, None]).any():
+                return None
+        return columns.shape[1], _encode_block(columns, DEUDOR_COMPACT_FIELDS)
+
+    # Hay pocas entidades distintas: sus nombres se resuelven una vez por bloque y se reparten por fila.
+    codes = np.zeros(columns.shape[1], dtype=np.int64)
+    for column in columns[0:5]:
+        codes = codes * 256 + column
+    _, first_rows, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    names = []
+    for row in first_rows:
+        codigo = columns[0:5, row].tobytes().decode("ISO-8859-1").strip()
+        try:
+            names.append(nombre_entidad(codigo).encode("ISO-8859-1"))
+        except UnicodeEncodeError:
+            return None
+
+    name_lengths = np.array([len(name) for name in names], dtype=np.intp)
+    name_columns = np.zeros((max(1, int(name_lengths.max())), len(names)), dtype=np.uint8)
+    for position, name in enumerate(names):
+        name_columns[:len(name), position] = np.frombuffer(name, dtype=np.uint8)
+
+    inverse = inverse.reshape(-1)
+    text = _encode_block(columns, DEUDOR_FIELDS, (name_columns[:, inverse], name_lengths[inverse]))
+    return columns.shape[1], text
+
+
+def decode_padron_block(raw_chunk: bytes) -> Optional[tuple[int, str]]:
+    """Formatea un bloque de líneas completas de padron.txt como lo haría _format_padron_line."""
+    if np is None:
+        return None
+    columns = _column_matrix(raw_chunk, 190)
+    if columns is None:
+        return None
+    return columns.shape[1], _encode_block(columns, PADRON_FIELDS)
@@ -1,21 +1,73 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
 import io
 import logging
+import multiprocessing
+import os
+import queue
 import re
+import signal
+import sys
 import threading
+import time
 import uuid
-import zipfile
-from datetime import datetime, timezone
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import closing, contextmanager
+from functools import partial
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, NamedTuple, Optional
 
-from fastapi import HTTPException, UploadFile
+from fastapi import HTTPException, Request
+from sqlalchemy import delete, inspect, select, text, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+from starlette.concurrency import run_in_threadpool
 
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from app.archives import ArchiveError, open_archive_member, validate_archive
+from app.cuit_filters import CUIT_FILTERS_ENABLED, FILTER_DEUDORES, FILTER_PADRON, write_cuit_filter
 from app.database import SessionLocal, engine
-from app.models import Deudor, Entidad, ImportJob, Padron
+from app.decoders import decode_deudores_block, decode_padron_block
+from app.job_events import JOB_EVENTS_CHANNEL, encode_job_event
+from app.models import (
+    HISTORIAL_INCLUDE_COLUMNS,
+    LEGACY_DEUDORES_INDEXES,
+    NAME_SEARCH_AVAILABLE_SQL,
+    PADRON_NOMBRE_INDEX,
+    PADRON_NOMBRE_INDEX_COLUMNS,
+    Deudor,
+    DeudorResumen,
+    Entidad,
+    ImportJob,
+    Padron,
+    UploadChunk,
+    UploadSession,
+    create_tables,
+    deudores_compactos,
+    deudores_is_compact,
+    dni_expression,
+    ensure_name_search,
+    period_expression,
+    period_index,
+)
+from app.settings import get_int_setting
+from app.snapshots import (
+    SNAPSHOT_DEUDORES,
+    SNAPSHOT_PADRON,
+    SNAPSHOTS_ENABLED,
+    discard_snapshot,
+    pack_deudor,
+    pack_padron,
+    write_snapshot,
+)
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -23,13 +75,59 @@ UPLOAD_DIR = Path(__file__).resolve().parent.parent / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
-DEUDORES_COPY_BATCH_SIZE = 50_000
-PADRON_COPY_BATCH_SIZE = 100_000
-DEUDORES_ZIP_MEMBER = "deudores.txt"
-PADRON_ZIP_MEMBER = "padron.txt"
+UPLOAD_MAX_FIELD_BYTES = 64 * 1024
+# Tamaño de bloque sugerido a los clientes de las subidas reanudables; el servidor acepta cualquier rango.
+UPLOAD_SESSION_CHUNK_BYTES = max(UPLOAD_CHUNK_SIZE, get_int_setting("UPLOAD_SESSION_CHUNK_BYTES", 16 * 1024 * 1024))
+UPLOAD_SESSION_TTL_HOURS = max(1, get_int_setting("UPLOAD_SESSION_TTL_HOURS", 48))
+# Bloques de ~50.000 líneas de deudores.txt: es la unidad que formatea cada proceso y que se envía en un COPY.
+DEUDORES_PARSE_CHUNK_BYTES = 8 * 1024 * 1024
+# Procesos que formatean deudores.txt en paralelo; 0 o 1 formatea en el mismo hilo del job.
+IMPORT_PARSE_WORKERS = get_int_setting("IMPORT_PARSE_WORKERS", min(4, os.cpu_count() or 1))
+# Conexiones que hacen COPY en paralelo sobre la tabla temporal de cada importación.
+IMPORT_COPY_CONNECTIONS = max(1, get_int_setting("IMPORT_COPY_CONNECTIONS", 2))
+# Intervalo mínimo entre escrituras de progreso del COPY en import_jobs (y sus eventos SSE).
+IMPORT_PROGRESS_INTERVAL_MS = max(0, get_int_setting("IMPORT_PROGRESS_INTERVAL_MS", 1000))
+# Workers paralelos y memoria de PostgreSQL para crear los índices al final de cada carga.
+IMPORT_INDEX_PARALLEL_WORKERS = max(0, get_int_setting("IMPORT_INDEX_PARALLEL_WORKERS", 4))
+IMPORT_INDEX_WORK_MEM_MB = max(64, get_int_setting("IMPORT_INDEX_WORK_MEM_MB", 512))
+PADRON_PARSE_CHUNK_BYTES = 16 * 1024 * 1024
+DEUDORES_ARCHIVE_MEMBER = "deudores.txt"
+PADRON_ARCHIVE_MEMBER = "padron.txt"
 JOB_TYPE_DEUDORES = "deudores"
 JOB_TYPE_PADRON = "padron"
-ACTIVE_JOB_STATUSES = {"queued", "running"}
+# Archivos que requiere cada importación y el sufijo con que se guardan en UPLOAD_DIR.
+UPLOAD_FILES_BY_JOB_TYPE = {
+    JOB_TYPE_DEUDORES: {"deudores": "deudores.zip", "entidades": "entidades.txt"},
+    JOB_TYPE_PADRON: {"padron": "padron.zip"},
+}
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+DEUDORES_PARTITION_PATTERN = re.compile(r"deudores_p(\d{6})")
+DEUDORES_PARTITION_INDEXES = (
+    ("id_idx", "(id)"),
+    (
+        "historial_idx",
+        f"(numero_identificacion, fecha_informacion DESC) INCLUDE ({', '.join(HISTORIAL_INCLUDE_COLUMNS)})",
+    ),
+)
+# Nombre en deudores de cada índice de DEUDORES_PARTITION_INDEXES, para particionar-deudores y migrar.
+DEUDORES_PARENT_INDEX_NAMES = {"id_idx": "ix_deudores_id", "historial_idx": "idx_deudores_historial"}
+# Advisory lock de migrar: dos migraciones a la vez no construyen los mismos índices.
+SCHEMA_MIGRATION_LOCK_KEY = 0x4D4947
+# Primera clave de los advisory locks de los jobs; la segunda es hashtext(job_id).
+IMPORT_JOB_LOCK_CLASS = 0x4A4F42
+# Advisory lock de transacción que serializa la toma de jobs de la cola.
+IMPORT_QUEUE_LOCK_KEY = 0x4A4F4251
+# Hilos que toman jobs de la cola en cada proceso worker; la API arranca los suyos solo con IMPORT_WORKERS_IN_API=1.
+IMPORT_WORKERS = max(1, get_int_setting("IMPORT_WORKERS", 2))
+IMPORT_WORKERS_IN_API = get_int_setting("IMPORT_WORKERS_IN_API", 1) != 0
+IMPORT_WORKER_POLL_SECONDS = max(1, get_int_setting("IMPORT_WORKER_POLL_SECONDS", 2))
+# Jobs de cada tipo que pueden correr a la vez entre todos los procesos.
+IMPORT_MAX_RUNNING_BY_JOB_TYPE = {
+    JOB_TYPE_DEUDORES: max(1, get_int_setting("IMPORT_MAX_RUNNING_DEUDORES", 1)),
+    JOB_TYPE_PADRON: max(1, get_int_setting("IMPORT_MAX_RUNNING_PADRON", 1)),
+}
+# Cantidad de períodos de deudores a conservar; 0 conserva todo el historial.
+DEUDORES_RETAINED_PERIODS = get_int_setting("DEUDORES_RETAINED_PERIODS", 0)
 
 DEUDOR_COPY_COLUMNS = (
     "codigo_entidad",
@@ -58,6 +156,11 @@ DEUDOR_COPY_COLUMNS = (
     "dias_atraso",
     "nombre_entidad",
 )
+# El esquema compacto no guarda nombre_entidad, que las consultas toman de entidades, y no copia
+# fecha_informacion: la tabla temporal del período la completa con su índice de mes.
+DEUDOR_COMPACT_COPY_COLUMNS = tuple(
+    column for column in DEUDOR_COPY_COLUMNS if column not in ("fecha_informacion", "nombre_entidad")
+)
 
 PADRON_COPY_COLUMNS = (
     "identificacion",
@@ -68,7 +171,7 @@ PADRON_COPY_COLUMNS = (
     "fallecimiento",
 )
 
-_job_creation_lock = threading.Lock()
+_shutdown_requested = threading.Event()
 
 
 def _utc_now() -> datetime:
@@ -104,13 +207,22 @@ def _required_integer(segment: str) -> str:
     return value or "0"
 
 
-def _format_deudor_line(line: str, entidades_lookup: dict[str, str]) -> str:
+def _format_deudor_line(
+    line: str,
+    entidades_lookup: Optional[dict[str, str]],
+    fecha_informacion: Optional[str] = None,
+) -> str:
+    """Formatea una línea para COPY.
+
+    Sin entidades_lookup (esquema compacto) omite nombre_entidad y fecha_informacion; como el período ya no pasa
+    por el CHECK de la tabla temporal, con fecha_informacion rechaza las líneas de otro período.
+    """
     codigo_entidad = line[0:5].strip()
-    nombre_entidad = entidades_lookup.get(codigo_entidad, "Desconocida")[:254]
+    periodo = line[5:11].strip()
 
     fields = (
         _sanitize_copy_text(codigo_entidad),
-        _sanitize_copy_text(line[5:11].strip()),
+        _sanitize_copy_text(periodo),
         _sanitize_copy_text(line[11:13].strip()),
         _sanitize_copy_text(line[13:24].strip()),
         _sanitize_copy_text(line[24:27].strip()),
@@ -133,11 +245,82 @@ def _format_deudor_line(line: str, entidades_lookup: dict[str, str]) -> str:
         _required_integer(line[165:166]),
         _required_integer(line[166:167]),
         _required_integer(line[167:170]),
-        _sanitize_copy_text(nombre_entidad),
     )
+    if entidades_lookup is not None:
+        fields += (_copy_nombre_entidad(codigo_entidad, entidades_lookup),)
+    else:
+        if fecha_informacion is not None and periodo != fecha_informacion:
+            raise ValueError(f"Línea de deudores.txt del período {periodo!r} en la importación de {fecha_informacion}")
+        fields = fields[:1] + fields[2:]
     return "\t".join(fields) + "\n"
 
 
+def _copy_nombre_entidad(codigo_entidad: str, entidades_lookup: dict[str, str]) -> str:
+    """nombre_entidad listo para COPY; lo usan tanto _format_deudor_line como decode_deudores_block."""
+    return _sanitize_copy_text(entidades_lookup.get(codigo_entidad, "Desconocida")[:254])
+
+
+def _split_chunk_lines(raw_chunk: bytes) -> list[str]:
+    lines = raw_chunk.decode("ISO-8859-1").split("\n")
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+_parser_entidades_lookup: dict[str, str] = {}
+
+
+def _init_deudores_parser(entidades_lookup: dict[str, str]) -> None:
+    global _parser_entidades_lookup
+    _parser_entidades_lookup = entidades_lookup
+
+
+class FormattedChunk(NamedTuple):
+    rows: int
+    text: str
+    # Etapa del perfil que lo formateó ("decode" con NumPy o "format_lines" línea por línea) y cuánto tardó,
+    # medido en el proceso que lo formateó.
+    stage: str
+    wall_seconds: float
+    cpu_seconds: float
+
+
+def _format_deudores_chunk(
+    raw_chunk: bytes,
+    entidades_lookup: Optional[dict[str, str]] = None,
+    compact: bool = False,
+    fecha_informacion: Optional[str] = None,
+) -> FormattedChunk:
+    """compact omite nombre_entidad y fecha_informacion; con fecha_informacion rechaza líneas de otro período."""
+    if compact:
+        entidades_lookup = None
+    elif entidades_lookup is None:
+        entidades_lookup = _parser_entidades_lookup
+
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    nombre_entidad = None
+    if entidades_lookup is not None:
+        nombre_entidad = partial(_copy_nombre_entidad, entidades_lookup=entidades_lookup)
+    decoded = decode_deudores_block(raw_chunk, nombre_entidad, fecha_informacion)
+    if decoded is not None:
+        return FormattedChunk(*decoded, "decode", time.perf_counter() - started, time.thread_time() - cpu_started)
+
+    lines = _split_chunk_lines(raw_chunk)
+    text = "".join([_format_deudor_line(line, entidades_lookup, fecha_informacion) for line in lines])
+    return FormattedChunk(len(lines), text, "format_lines", time.perf_counter() - started, time.thread_time() - cpu_started)
+
+
+def _format_padron_chunk(raw_chunk: bytes) -> FormattedChunk:
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    decoded = decode_padron_block(raw_chunk)
+    if decoded is not None:
+        return FormattedChunk(*decoded, "decode", time.perf_counter() - started, time.thread_time() - cpu_started)
+
+    lines = _split_chunk_lines(raw_chunk)
+    text = "".join([_format_padron_line(line) for line in lines])
+    return FormattedChunk(len(lines), text, "format_lines", time.perf_counter() - started, time.thread_time() - cpu_started)
+
+
 def _format_padron_line(line: str) -> str:
     fields = (
         _sanitize_copy_text(line[0:11].strip()),
@@ -166,89 +349,194 @@ def get_job_status_payload(job: ImportJob) -> dict[str, Any]:
         "progress_current": int(job.progress_current or 0),
         "progress_total": int(job.progress_total or 0),
         "progress_percent": progress_percent,
+        "rows_per_second": job.rows_per_second,
+        "bytes_per_second": job.bytes_per_second,
+        "eta_seconds": job.eta_seconds,
+        "profile": job.profile or {},
         "created_at": job.created_at.isoformat() if job.created_at else None,
         "started_at": job.started_at.isoformat() if job.started_at else None,
         "finished_at": job.finished_at.isoformat() if job.finished_at else None,
     }
 
 
-def mark_incomplete_jobs_as_failed() -> None:
-    db = SessionLocal()
-    try:
-        interrupted_jobs = (
-            db.query(ImportJob)
-            .filter(ImportJob.job_type.in_((JOB_TYPE_DEUDORES, JOB_TYPE_PADRON)))
-            .filter(ImportJob.status.in_(tuple(ACTIVE_JOB_STATUSES)))
-            .all()
+def ensure_import_job_columns() -> None:
+    """create_all no agrega columnas a una tabla existente: agrega a import_jobs las que falten del modelo."""
+    table = ImportJob.__table__
+    with engine.begin() as connection:
+        existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(
+                text(
+                    f"ALTER TABLE {_quote_identifier(table.name)} "
+                    f"ADD COLUMN IF NOT EXISTS {_quote_identifier(column.name)} {column_type}"
+                )
+            )
+
+
+class StoredUpload(NamedTuple):
+    path: Path
+    filename: Optional[str]
+    size: int
+    sha256: str
+
+
+class ReceivedUpload:
+    """Campos de texto y archivos de un formulario multipart ya escritos en UPLOAD_DIR."""
+
+    def __init__(self, fields: dict[str, str], files: dict[str, StoredUpload], paths: list[Path]) -> None:
+        self.fields = fields
+        self.files = files
+        self.paths = paths
+
+    def discard(self) -> None:
+        for path in self.paths:
+            _safe_unlink(path)
+
+
+class _MultipartFileWriter:
+    """Parser multipart incremental: cada parte de archivo se escribe en su destino y se hashea al vuelo."""
+
+    def __init__(self, content_type: str, destinations: dict[str, Path]) -> None:
+        mime_type, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if mime_type != b"multipart/form-data" or not boundary:
+            raise HTTPException(status_code=400, detail="Se esperaba un formulario multipart/form-data.")
+
+        self.destinations = destinations
+        self.fields: dict[str, str] = {}
+        self.files: dict[str, StoredUpload] = {}
+        self.opened: list[Path] = []
+        self._headers: dict[bytes, bytes] = {}
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._name: Optional[str] = None
+        self._filename: Optional[str] = None
+        self._text = bytearray()
+        self._output: Optional[BinaryIO] = None
+        self._hasher: Any = None
+        self._size = 0
+        self._parser = MultipartParser(
+            boundary,
+            callbacks={
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
         )
-        if not interrupted_jobs:
+
+    def write(self, data: bytes) -> None:
+        self._parser.write(data)
+
+    def finish(self) -> None:
+        self._parser.finalize()
+        if self._output is not None:
+            raise HTTPException(status_code=400, detail="El formulario multipart terminó de forma incompleta.")
+
+    def close(self) -> None:
+        if self._output is not None:
+            self._output.close()
+            self._output = None
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._name = None
+        self._filename = None
+        self._text = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        if filename is None:
             return
 
-        finished_at = _utc_now()
-        for job in interrupted_jobs:
-            job.status = "failed"
-            job.stage = "interrupted"
-            job.message = "El servicio se reinició antes de completar el job."
-            job.error = "Job interrumpido por reinicio del servicio."
-            job.finished_at = finished_at
-        db.commit()
-    finally:
-        db.close()
+        destination = self.destinations.get(self._name)
+        if destination is None or self._name in self.files:
+            raise HTTPException(status_code=400, detail=f"Archivo inesperado en el formulario: {self._name}")
+        self._filename = Path(filename.decode("utf-8", "replace")).name
+        self.opened.append(destination)
+        self._output = destination.open("wb")
+        self._hasher = hashlib.sha256()
+        self._size = 0
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._output is not None:
+            chunk = data[start:end]
+            self._output.write(chunk)
+            self._hasher.update(chunk)
+            self._size += len(chunk)
+            return
 
+        self._text += data[start:end]
+        if len(self._text) > UPLOAD_MAX_FIELD_BYTES:
+            raise HTTPException(status_code=400, detail=f"El campo {self._name} es demasiado largo.")
 
-def _save_upload_file(upload: UploadFile, destination: Path) -> None:
-    upload.file.seek(0)
-    with destination.open("wb") as output_file:
-        while True:
-            chunk = upload.file.read(UPLOAD_CHUNK_SIZE)
-            if not chunk:
-                break
-            output_file.write(chunk)
+    def _on_part_end(self) -> None:
+        if self._output is not None:
+            self.close()
+            self.files[self._name] = StoredUpload(
+                self.destinations[self._name], self._filename, self._size, self._hasher.hexdigest()
+            )
+        elif self._name:
+            self.fields[self._name] = self._text.decode("utf-8", "replace")
 
 
-def _validate_deudores_zip(zip_path: Path) -> None:
-    try:
-        with zipfile.ZipFile(zip_path) as zip_file:
-            if DEUDORES_ZIP_MEMBER not in zip_file.namelist():
-                raise HTTPException(
-                    status_code=400,
-                    detail="El archivo ZIP de deudores debe contener deudores.txt",
-                )
-    except zipfile.BadZipFile as exc:
-        raise HTTPException(
-            status_code=400,
-            detail="El archivo de deudores no es un ZIP válido.",
-        ) from exc
+async def receive_upload(request: Request, file_suffixes: dict[str, str]) -> ReceivedUpload:
+    """Escribe los archivos del formulario directamente en UPLOAD_DIR a medida que llega el cuerpo.
 
+    file_suffixes indica, por campo de archivo requerido, el sufijo del nombre en disco. El parseo, la escritura
+    y el hash corren en el threadpool en bloques de UPLOAD_CHUNK_SIZE, así el event loop queda libre.
+    """
+    upload_prefix = uuid.uuid4().hex
+    destinations = {field: UPLOAD_DIR / f"{upload_prefix}_{suffix}" for field, suffix in file_suffixes.items()}
+    writer = _MultipartFileWriter(request.headers.get("content-type", ""), destinations)
 
-def _validate_zip_member(zip_path: Path, member_name: str, detail_name: str) -> None:
     try:
-        with zipfile.ZipFile(zip_path) as zip_file:
-            if member_name not in zip_file.namelist():
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"El archivo ZIP de {detail_name} debe contener {member_name}",
-                )
-    except zipfile.BadZipFile as exc:
-        raise HTTPException(
-            status_code=400,
-            detail=f"El archivo de {detail_name} no es un ZIP válido.",
-        ) from exc
+        pending = bytearray()
+        async for chunk in request.stream():
+            pending += chunk
+            if len(pending) >= UPLOAD_CHUNK_SIZE:
+                await run_in_threadpool(writer.write, bytes(pending))
+                pending = bytearray()
+        if pending:
+            await run_in_threadpool(writer.write, bytes(pending))
+        await run_in_threadpool(writer.finish)
+
+        missing = [field for field in file_suffixes if field not in writer.files]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Falta el archivo {missing[0]} en el formulario.")
+    except BaseException:
+        writer.close()
+        for path in writer.opened:
+            _safe_unlink(path)
+        raise
 
+    return ReceivedUpload(writer.fields, writer.files, writer.opened)
 
-def _ensure_no_active_job(db: Session, job_type: str) -> None:
-    active_job = (
-        db.query(ImportJob)
-        .filter(ImportJob.job_type == job_type)
-        .filter(ImportJob.status.in_(tuple(ACTIVE_JOB_STATUSES)))
-        .order_by(ImportJob.created_at.desc())
-        .first()
-    )
-    if active_job is not None:
-        raise HTTPException(
-            status_code=409,
-            detail=f"Ya hay un job activo ({active_job.id}). Esperá a que termine antes de iniciar otro.",
-        )
+
+def _validate_archive(archive_path: Path, member_name: str, detail_name: str) -> None:
+    try:
+        validate_archive(archive_path, member_name)
+    except ArchiveError as exc:
+        raise HTTPException(status_code=400, detail=f"El archivo de {detail_name} {exc}") from exc
 
 
 def _upsert_entidades_batch(db: Session, batch: list[dict[str, str]]) -> None:
@@ -299,6 +587,7 @@ def _load_entidades_lookup(db: Session) -> dict[str, str]:
 
 
 def _update_job(job_id: str, **fields: Any) -> None:
+    """Guarda los campos del job y publica su estado en JOB_EVENTS_CHANNEL al confirmar."""
     db = SessionLocal()
     try:
         job = db.get(ImportJob, job_id)
@@ -306,177 +595,1037 @@ def _update_job(job_id: str, **fields: Any) -> None:
             return
         for field_name, value in fields.items():
             setattr(job, field_name, value)
+        event = get_job_status_payload(job)
+        # pg_notify dentro de la transacción: el evento se entrega solo si el cambio se confirma.
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": JOB_EVENTS_CHANNEL, "payload": encode_job_event(event)},
+        )
         db.commit()
     finally:
         db.close()
 
 
+class ImportCheckpoint(NamedTuple):
+    batch: int
+    offset: int
+    rows: int
+
+
+def _load_checkpoint(job_id: str) -> ImportCheckpoint:
+    db = SessionLocal()
+    try:
+        job = db.get(ImportJob, job_id)
+        return ImportCheckpoint(
+            int(job.checkpoint_batch or 0), int(job.checkpoint_offset or 0), int(job.checkpoint_rows or 0)
+        )
+    finally:
+        db.close()
+
+
+def _reset_checkpoint(job_id: str) -> ImportCheckpoint:
+    _update_job(job_id, checkpoint_batch=0, checkpoint_offset=0, checkpoint_rows=0)
+    return ImportCheckpoint(0, 0, 0)
+
+
+def _staging_matches_checkpoint(cursor: Any, table_name: str, checkpoint: ImportCheckpoint) -> bool:
+    """Indica si la tabla temporal de un job interrumpido tiene exactamente las filas de su checkpoint.
+
+    Las tablas UNLOGGED se vacían si PostgreSQL no se detuvo limpio; en ese caso la carga empieza de nuevo.
+    """
+    if not checkpoint.batch or not _table_exists(cursor, table_name):
+        return False
+    cursor.execute(f"SELECT count(*) FROM {_quote_identifier(table_name)}")
+    return cursor.fetchone()[0] == checkpoint.rows
+
+
+def _skip_bytes(stream: BinaryIO, count: int) -> None:
+    # Los formatos comprimidos no permiten saltar sin descomprimir; se lee y se descarta hasta el checkpoint.
+    while count:
+        data = stream.read(min(count, DEUDORES_PARSE_CHUNK_BYTES))
+        if not data:
+            raise ValueError("El archivo terminó antes del punto desde el que se retomaba el job.")
+        count -= len(data)
+
+
+class ImportProfile:
+    """Tiempo de pared y de CPU acumulado por etapa de un job; lo actualizan varios hilos a la vez.
+
+    Las etapas que corren en paralelo (decode en el pool de procesos, copy en cada conexión) suman el tiempo de
+    todos sus hilos, así que pueden superar a "load", que es el tiempo transcurrido de toda la carga. La CPU es la
+    del hilo que hace el trabajo en este proceso o en el del pool: lo que PostgreSQL hace dentro de COPY, de los
+    índices o de ANALYZE no se cuenta. Un job retomado suma sus tiempos a los de las ejecuciones anteriores.
+    """
+
+    def __init__(self, stored: Optional[dict[str, Any]] = None) -> None:
+        self._lock = threading.Lock()
+        self._stages: dict[str, dict[str, float]] = {
+            stage: dict(values) for stage, values in (stored or {}).items()
+        }
+
+    def add(self, stage: str, wall_seconds: float, cpu_seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            values = self._stages.setdefault(stage, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "calls": 0})
+            values["wall_seconds"] += wall_seconds
+            values["cpu_seconds"] += cpu_seconds
+            values["calls"] += calls
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, time.thread_time() - cpu_started)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {
+                    "wall_seconds": round(values["wall_seconds"], 3),
+                    "cpu_seconds": round(values["cpu_seconds"], 3),
+                    "calls": int(values["calls"]),
+                }
+                for stage, values in self._stages.items()
+            }
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{stage} {values['wall_seconds']:.1f} s (CPU {values['cpu_seconds']:.1f} s)"
+            for stage, values in self.snapshot().items()
+        )
+
+
+def _load_profile(job_id: str) -> ImportProfile:
+    db = SessionLocal()
+    try:
+        job = db.get(ImportJob, job_id)
+        return ImportProfile(job.profile if job is not None else None)
+    finally:
+        db.close()
+
+
+def _next_period(fecha_informacion: str) -> str:
+    year, month = int(fecha_informacion[:4]), int(fecha_informacion[4:6])
+    if month == 12:
+        return f"{year + 1:04d}01"
+    return f"{year:04d}{month + 1:02d}"
+
+
+def _period_bounds(fecha_informacion: str, compact: bool = False) -> tuple[Any, Any]:
+    # Rango [desde, hasta) de la partición del período; el esquema compacto lo guarda como índice de mes.
+    if compact:
+        return period_index(fecha_informacion), period_index(fecha_informacion) + 1
+    return fecha_informacion, _next_period(fecha_informacion)
+
+
+def _read_deudores_period(deudores_zip_path: Path) -> str:
+    with open_archive_member(deudores_zip_path, DEUDORES_ARCHIVE_MEMBER) as member:
+        first_line = member.stream.readline().decode("ISO-8859-1")
+
+    fecha_informacion = first_line[5:11].strip()
+    if not re.fullmatch(r"\d{4}(0[1-9]|1[0-2])", fecha_informacion):
+        raise ValueError(f"No se pudo leer el período de deudores.txt: {fecha_informacion!r}")
+    return fecha_informacion
+
+
+def _is_partitioned_table(cursor: Any, table_name: str) -> bool:
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table_name,))
+    row = cursor.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def _table_exists(cursor: Any, table_name: str) -> bool:
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table_name,))
+    return bool(cursor.fetchone()[0])
+
+
+def _create_deudores_staging_table(
+    cursor: Any,
+    table_name: str,
+    fecha_informacion: str,
+    compact: bool = False,
+) -> None:
+    table_ident = _quote_identifier(table_name)
+    parent_ident = _quote_identifier(Deudor.__tablename__)
+    cursor.execute(f"DROP TABLE IF EXISTS {table_ident}")
+    cursor.execute(
+        f"CREATE UNLOGGED TABLE {table_ident} (LIKE {parent_ident} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    # Con el CHECK, ATTACH PARTITION no necesita recorrer la tabla y el COPY rechaza filas de otro período.
+    cursor.execute(
+        f"ALTER TABLE {table_ident} ADD CONSTRAINT {_quote_identifier(f'{table_name}_periodo')} "
+        "CHECK (fecha_informacion >= %s AND fecha_informacion < %s)",
+        _period_bounds(fecha_informacion, compact),
+    )
+    if compact:
+        # El COPY compacto no trae fecha_informacion (DEUDOR_COMPACT_COPY_COLUMNS).
+        cursor.execute(
+            f"ALTER TABLE {table_ident} ALTER COLUMN fecha_informacion SET DEFAULT %s",
+            (period_index(fecha_informacion),),
+        )
+
+
+def _configure_index_build(cursor: Any) -> None:
+    # Solo para esta sesión: CREATE INDEX reparte el ordenamiento entre workers paralelos de PostgreSQL.
+    cursor.execute(f"SET max_parallel_maintenance_workers TO {IMPORT_INDEX_PARALLEL_WORKERS}")
+    cursor.execute(f"SET maintenance_work_mem TO '{IMPORT_INDEX_WORK_MEM_MB}MB'")
+
+
+def _create_deudores_staging_indexes(cursor: Any, table_name: str) -> None:
+    # Los mismos índices que tiene deudores: al adjuntar la tabla, PostgreSQL los reutiliza en vez de crearlos
+    # mientras retiene el lock sobre deudores.
+    table_ident = _quote_identifier(table_name)
+    cursor.execute(
+        f"ALTER TABLE {table_ident} ADD CONSTRAINT {_quote_identifier(f'{table_name}_pkey')} "
+        "PRIMARY KEY (id, fecha_informacion)"
+    )
+    for suffix, definition in DEUDORES_PARTITION_INDEXES:
+        cursor.execute(f"CREATE INDEX {_quote_identifier(f'{table_name}_{suffix}')} ON {table_ident} {definition}")
+
+
+def _publish_deudores_partition(
+    cursor: Any,
+    staging_table: str,
+    fecha_informacion: str,
+    parent_table: str = Deudor.__tablename__,
+    compact: bool = False,
+) -> None:
+    partition_table = f"deudores_p{fecha_informacion}"
+    parent_ident = _quote_identifier(parent_table)
+    partition_ident = _quote_identifier(partition_table)
+
+    if _table_exists(cursor, partition_table):
+        cursor.execute(f"ALTER TABLE {parent_ident} DETACH PARTITION {partition_ident}")
+        cursor.execute(f"DROP TABLE {partition_ident}")
+
+    cursor.execute(
+        f"ALTER TABLE {parent_ident} ATTACH PARTITION {_quote_identifier(staging_table)} "
+        "FOR VALUES FROM (%s) TO (%s)",
+        _period_bounds(fecha_informacion, compact),
+    )
+    cursor.execute(f"ALTER TABLE {_quote_identifier(staging_table)} RENAME TO {partition_ident}")
+    cursor.execute(
+        f"ALTER TABLE {partition_ident} RENAME CONSTRAINT {_quote_identifier(f'{staging_table}_periodo')} "
+        f"TO {_quote_identifier(f'{partition_table}_periodo')}"
+    )
+    for suffix in ("pkey", *(suffix for suffix, _ in DEUDORES_PARTITION_INDEXES)):
+        cursor.execute(
+            f"ALTER INDEX {_quote_identifier(f'{staging_table}_{suffix}')} "
+            f"RENAME TO {_quote_identifier(f'{partition_table}_{suffix}')}"
+        )
+
+
+def partition_deudores() -> bool:
+    """Convierte una deudores sin particionar en la tabla particionada por período que usan las importaciones.
+
+    Cada período pasa a su partición deudores_pAAAAMM con los mismos índices que crea una importación, en una sola
+    transacción: mientras se copia, la tabla anterior sigue respondiendo lecturas (las escrituras esperan) y al
+    final se reemplaza conservando la secuencia de id. Devuelve False si deudores ya estaba particionada o no existe.
+    """
+    connection = engine.raw_connection()
+    cursor = connection.cursor()
+    new_table = f"{Deudor.__tablename__}_particionada"
+    deudores_ident = _quote_identifier(Deudor.__tablename__)
+    new_ident = _quote_identifier(new_table)
+
+    try:
+        cursor.execute("SET statement_timeout TO 0")
+        if not _table_exists(cursor, Deudor.__tablename__) or _is_partitioned_table(cursor, Deudor.__tablename__):
+            return False
+
+        _configure_index_build(cursor)
+        cursor.execute(f"LOCK TABLE {deudores_ident} IN SHARE MODE")
+        cursor.execute(
+            f"CREATE TABLE {new_ident} (LIKE {deudores_ident} INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (fecha_informacion)"
+        )
+        cursor.execute(
+            f"ALTER TABLE {new_ident} ADD CONSTRAINT {_quote_identifier(f'{new_table}_pkey')} "
+            "PRIMARY KEY (id, fecha_informacion)"
+        )
+        for suffix, definition in DEUDORES_PARTITION_INDEXES:
+            cursor.execute(f"CREATE INDEX {_quote_identifier(f'{new_table}_{suffix}')} ON {new_ident} {definition}")
+
+        cursor.execute(f"SELECT DISTINCT fecha_informacion FROM {deudores_ident} ORDER BY 1")
+        periods = [str(period) for (period,) in cursor.fetchall()]
+        for period in periods:
+            started_at = time.monotonic()
+            staging_table = f"deudores_particion_{period}"
+            _create_deudores_staging_table(cursor, staging_table, period)
+            cursor.execute(
+                f"INSERT INTO {_quote_identifier(staging_table)} "
+                f"SELECT * FROM {deudores_ident} WHERE fecha_informacion = %s ORDER BY id",
+                (period,),
+            )
+            rows = cursor.rowcount
+            cursor.execute(f"ALTER TABLE {_quote_identifier(staging_table)} SET LOGGED")
+            _create_deudores_staging_indexes(cursor, staging_table)
+            cursor.execute(f"ANALYZE {_quote_identifier(staging_table)}")
+            _publish_deudores_partition(cursor, staging_table, period, parent_table=new_table)
+            logger.info(
+                "Período %s de deudores copiado a su partición: %s filas en %.1f s",
+                period,
+                f"{rows:,}".replace(",", "."),
+                time.monotonic() - started_at,
+            )
+
+        # La secuencia pertenece a la columna id de la tabla anterior: se traspasa para que el DROP no la borre.
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (Deudor.__tablename__,))
+        sequence = cursor.fetchone()[0]
+        if sequence is not None:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {new_ident}.id")
+        cursor.execute(f"DROP TABLE {deudores_ident}")
+        cursor.execute(f"ALTER TABLE {new_ident} RENAME TO {deudores_ident}")
+        cursor.execute(
+            f"ALTER TABLE {deudores_ident} RENAME CONSTRAINT {_quote_identifier(f'{new_table}_pkey')} "
+            f"TO {_quote_identifier(f'{Deudor.__tablename__}_pkey')}"
+        )
+        for suffix, _ in DEUDORES_PARTITION_INDEXES:
+            cursor.execute(
+                f"ALTER INDEX {_quote_identifier(f'{new_table}_{suffix}')} "
+                f"RENAME TO {_quote_identifier(DEUDORES_PARENT_INDEX_NAMES[suffix])}"
+            )
+        connection.commit()
+
+        # Fuera de la transacción, igual que en cada importación: el historial se lee solo de los índices.
+        connection.dbapi_connection.autocommit = True
+        try:
+            cursor.execute(f"VACUUM (ANALYZE) {deudores_ident}")
+        finally:
+            connection.dbapi_connection.autocommit = False
+        logger.info("deudores particionada en %s períodos", len(periods))
+        return True
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def migrate_schema() -> None:
+    """Cambios de esquema sobre tablas existentes que create_tables no hace: python -m app.import_jobs migrar.
+
+    Agrega las columnas que falten en import_jobs, prepara la búsqueda por nombre, borra LEGACY_DEUDORES_INDEXES
+    y crea los índices por DNI, el del historial de deudores y el trigram del padrón que falten. Los índices se
+    construyen con CREATE INDEX CONCURRENTLY, sin bloquear las importaciones ni las consultas; en deudores
+    particionada, partición por partición, y después se adjuntan al índice de la tabla. Un advisory lock
+    serializa migraciones simultáneas; si no falta nada, no cambia nada.
+    """
+    create_tables(engine)
+    ensure_import_job_columns()
+    name_search = ensure_name_search(engine)
+    if not name_search:
+        logger.warning("PostgreSQL no tiene pg_trgm y unaccent: /padron/nombre queda deshabilitado")
+
+    deudores = deudores_compactos if deudores_is_compact(engine) else Deudor.__table__
+    indexes = [
+        (index.name, table.name, _index_definition(index))
+        for table in (deudores, DeudorResumen.__table__, Padron.__table__)
+        for index in table.indexes
+        if index.name.endswith(("_dni", "_historial"))
+    ]
+    if name_search:
+        indexes.append((PADRON_NOMBRE_INDEX, Padron.__tablename__, f"USING gin ({PADRON_NOMBRE_INDEX_COLUMNS})"))
+    partition_suffixes = {name: suffix for suffix, name in DEUDORES_PARENT_INDEX_NAMES.items()}
+
+    connection = engine.raw_connection()
+    # CREATE INDEX CONCURRENTLY no corre dentro de una transacción.
+    connection.dbapi_connection.autocommit = True
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SET statement_timeout TO 0")
+        # Se espera fuera de una transacción: CREATE INDEX CONCURRENTLY espera a las transacciones abiertas, y una
+        # bloqueada en pg_advisory_lock detrás de este mismo lock sería un deadlock.
+        while True:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (SCHEMA_MIGRATION_LOCK_KEY,))
+            if cursor.fetchone()[0]:
+                break
+            logger.info("Otra migración en curso; esperando")
+            time.sleep(IMPORT_WORKER_POLL_SECONDS)
+        _configure_index_build(cursor)
+        for index_name in LEGACY_DEUDORES_INDEXES:
+            _drop_index(cursor, index_name)
+        for index_name, table_name, definition in indexes:
+            if _is_partitioned_table(cursor, table_name):
+                _create_partitioned_index(cursor, index_name, table_name, definition, partition_suffixes[index_name])
+            else:
+                _create_index_concurrently(cursor, index_name, table_name, definition)
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (SCHEMA_MIGRATION_LOCK_KEY,))
+    except BaseException:
+        # Puede tener el lock tomado: devuelta al pool lo seguiría teniendo, así que se descarta.
+        connection.invalidate()
+        raise
+    cursor.close()
+    connection.dbapi_connection.autocommit = False
+    connection.close()
+
+
+def _index_definition(index: Any) -> str:
+    # Lo que sigue a "ON tabla" en el CREATE INDEX del modelo: columnas, expresiones e INCLUDE.
+    ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+    return ddl.split(f" ON {index.table.name} ", 1)[1]
+
+
+def _index_state(cursor: Any, index_name: str) -> Optional[bool]:
+    # None si el índice no existe; si no, si es válido. Un CREATE INDEX CONCURRENTLY interrumpido lo deja inválido.
+    cursor.execute("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", (index_name,))
+    row = cursor.fetchone()
+    return None if row is None else bool(row[0])
+
+
+def _drop_index(cursor: Any, index_name: str) -> None:
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (index_name,))
+    row = cursor.fetchone()
+    if row is None:
+        return
+    # DROP INDEX CONCURRENTLY no admite índices de tablas particionadas; esos se borran con un lock breve.
+    concurrently = "" if row[0] == "I" else " CONCURRENTLY"
+    logger.info("Borrando el índice %s", index_name)
+    cursor.execute(f"DROP INDEX{concurrently} IF EXISTS {_quote_identifier(index_name)}")
+
+
+def _create_index_concurrently(cursor: Any, index_name: str, table_name: str, definition: str) -> None:
+    state = _index_state(cursor, index_name)
+    if state:
+        return
+    if state is False:
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote_identifier(index_name)}")
+    started_at = time.monotonic()
+    cursor.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {_quote_identifier(index_name)} "
+        f"ON {_quote_identifier(table_name)} {definition}"
+    )
+    logger.info("Índice %s creado en %.1f s", index_name, time.monotonic() - started_at)
+
+
+def _create_partitioned_index(cursor: Any, index_name: str, table_name: str, definition: str, suffix: str) -> None:
+    if _index_state(cursor, index_name):
+        return
+    # ON ONLY crea el índice de la tabla sin tocar las particiones; queda inválido hasta adjuntarles uno a todas.
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS {_quote_identifier(index_name)} "
+        f"ON ONLY {_quote_identifier(table_name)} {definition}"
+    )
+    for period in sorted(_deudores_partition_periods(cursor)):
+        partition_index = f"{table_name}_p{period}_{suffix}"
+        _create_index_concurrently(cursor, partition_index, f"{table_name}_p{period}", definition)
+        cursor.execute(
+            "SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(%s) AND inhparent = to_regclass(%s)",
+            (partition_index, index_name),
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(
+                f"ALTER INDEX {_quote_identifier(index_name)} ATTACH PARTITION {_quote_identifier(partition_index)}"
+            )
+
+
+def _drop_expired_deudores_partitions(cursor: Any) -> None:
+    if DEUDORES_RETAINED_PERIODS <= 0:
+        return
+
+    periods = sorted(_deudores_partition_periods(cursor), reverse=True)
+    for period in periods[DEUDORES_RETAINED_PERIODS:]:
+        partition_table = f"{Deudor.__tablename__}_p{period}"
+        logger.info("Eliminando partición vencida de deudores: %s", partition_table)
+        cursor.execute(f"DROP TABLE {_quote_identifier(partition_table)}")
+
+
+def _deudores_partition_periods(cursor: Any) -> list[str]:
+    """Períodos AAAAMM que tienen partición en deudores."""
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(%s)
+        """,
+        (Deudor.__tablename__,),
+    )
+    return [match.group(1) for (name,) in cursor.fetchall() if (match := DEUDORES_PARTITION_PATTERN.fullmatch(name))]
+
+
+def _read_line_chunks(stream: BinaryIO, chunk_bytes: int, profile: ImportProfile) -> Iterator[bytes]:
+    pending = b""
+    while True:
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        data = stream.read(chunk_bytes)
+        profile.add("inflate", time.perf_counter() - started, time.thread_time() - cpu_started)
+        if not data:
+            if pending:
+                yield pending
+            return
+
+        data = pending + data
+        cut = data.rfind(b"\n") + 1
+        if cut == 0:
+            pending = data
+            continue
+        pending = data[cut:]
+        yield data[:cut]
+
+
+def _iter_formatted_deudores_chunks(
+    deudores_txt: BinaryIO,
+    entidades_lookup: dict[str, str],
+    profile: ImportProfile,
+    compact: bool = False,
+    fecha_informacion: Optional[str] = None,
+) -> Iterator[tuple[int, int, str]]:
+    """Devuelve (bytes leídos, filas, texto para COPY) por bloque, en el orden del archivo.
+
+    Un hilo lee el ZIP y reparte los bloques a un pool de procesos; la cola acotada de resultados pendientes
+    frena la lectura cuando el COPY no da abasto, así la memoria no depende del tamaño del archivo.
+    """
+    chunks = _read_line_chunks(deudores_txt, DEUDORES_PARSE_CHUNK_BYTES, profile)
+    if IMPORT_PARSE_WORKERS <= 1:
+        for raw_chunk in chunks:
+            formatted = _format_deudores_chunk(raw_chunk, entidades_lookup, compact, fecha_informacion)
+            profile.add(formatted.stage, formatted.wall_seconds, formatted.cpu_seconds)
+            yield len(raw_chunk), formatted.rows, formatted.text
+        return
+
+    pending: queue.Queue[Any] = queue.Queue(maxsize=IMPORT_PARSE_WORKERS * 2)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_chunks(executor: ProcessPoolExecutor) -> None:
+        try:
+            for raw_chunk in chunks:
+                future = executor.submit(_format_deudores_chunk, raw_chunk, None, compact, fecha_informacion)
+                if not put((len(raw_chunk), future)):
+                    return
+            put(None)
+        except BaseException as exc:
+            put(exc)
+
+    # spawn: el job corre en un hilo del servidor y un fork heredaría locks tomados por otros hilos.
+    with ProcessPoolExecutor(
+        max_workers=IMPORT_PARSE_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_deudores_parser,
+        initargs=(entidades_lookup,),
+    ) as executor:
+        reader = threading.Thread(target=read_chunks, args=(executor,), name="deudores-reader", daemon=True)
+        reader.start()
+        try:
+            while True:
+                item = pending.get()
+                if item is None:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                raw_size, future = item
+                formatted = future.result()
+                profile.add(formatted.stage, formatted.wall_seconds, formatted.cpu_seconds)
+                yield raw_size, formatted.rows, formatted.text
+        finally:
+            stop.set()
+            reader.join()
+            executor.shutdown(cancel_futures=True)
+
+
+def _iter_formatted_padron_chunks(padron_txt: BinaryIO, profile: ImportProfile) -> Iterator[tuple[int, int, str]]:
+    for raw_chunk in _read_line_chunks(padron_txt, PADRON_PARSE_CHUNK_BYTES, profile):
+        formatted = _format_padron_chunk(raw_chunk)
+        profile.add(formatted.stage, formatted.wall_seconds, formatted.cpu_seconds)
+        yield len(raw_chunk), formatted.rows, formatted.text
+
+
+def _copy_chunks_to_staging(
+    chunks: Iterator[tuple[int, int, str]],
+    table_name: str,
+    columns: tuple[str, ...],
+    job_id: str,
+    total_bytes: int,
+    detail_name: str,
+    checkpoint: ImportCheckpoint,
+    profile: ImportProfile,
+) -> tuple[int, int]:
+    """Hace COPY de los bloques formateados sobre IMPORT_COPY_CONNECTIONS conexiones a la vez.
+
+    Cada conexión toma el siguiente bloque de una cola acotada y hace su propio COPY, pero los lotes se confirman
+    en el orden del archivo: cada conexión espera su turno y guarda el checkpoint del job en la misma transacción
+    que las filas. Lo confirmado es siempre un prefijo del archivo, así un job interrumpido se retoma desde
+    checkpoint sin duplicar ni saltear filas. Devuelve (filas, bytes leídos), incluidos los anteriores al
+    checkpoint.
+
+    El progreso, el ritmo y la ETA se guardan en el job como mucho una vez cada IMPORT_PROGRESS_INTERVAL_MS y una
+    última vez al terminar, con el promedio de toda la carga.
+    """
+    pending: queue.Queue[Any] = queue.Queue(maxsize=IMPORT_COPY_CONNECTIONS * 2)
+    failed = threading.Event()
+    errors: list[BaseException] = []
+    progress_lock = threading.Lock()
+    progress = {"rows": checkpoint.rows, "bytes": checkpoint.offset}
+    started = time.monotonic()
+    # El primer lote se informa enseguida; los siguientes, como mucho una vez por intervalo.
+    last_report = {"at": started - IMPORT_PROGRESS_INTERVAL_MS / 1000}
+    commit_turn = threading.Condition()
+    committed = {"batch": checkpoint.batch}
+    checkpoint_sql = (
+        f"UPDATE {_quote_identifier(ImportJob.__tablename__)} "
+        "SET checkpoint_batch = %s, checkpoint_offset = %s, checkpoint_rows = %s WHERE id = %s"
+    )
+
+    def progress_fields(now: float) -> dict[str, Any]:
+        elapsed = max(now - started, 1e-6)
+        bytes_per_second = (progress["bytes"] - checkpoint.offset) / elapsed
+        eta_seconds = None
+        if total_bytes and bytes_per_second > 0:
+            eta_seconds = round(max(0, total_bytes - progress["bytes"]) / bytes_per_second, 1)
+        return {
+            "progress_current": progress["bytes"],
+            "progress_total": total_bytes,
+            "processed_rows": progress["rows"],
+            "rows_per_second": round((progress["rows"] - checkpoint.rows) / elapsed, 1),
+            "bytes_per_second": round(bytes_per_second, 1),
+            "eta_seconds": eta_seconds,
+            "profile": profile.snapshot(),
+            "message": f"Procesadas {progress['rows']:,} filas de {detail_name}.".replace(",", "."),
+        }
+
+    def record_error(exc: BaseException) -> None:
+        with progress_lock:
+            errors.append(exc)
+        failed.set()
+        with commit_turn:
+            commit_turn.notify_all()
+
+    def copy_chunk(
+        connection: Any,
+        cursor: Any,
+        first_row: int,
+        raw_size: int,
+        rows: int,
+        text: str,
+        position: ImportCheckpoint,
+    ) -> None:
+        buffer = io.StringIO(text)
+        try:
+            copy_started, cpu_started = time.perf_counter(), time.thread_time()
+            cursor.copy_from(buffer, table_name, sep="\t", null="\\N", columns=columns)
+            wait_started = time.perf_counter()
+            with commit_turn:
+                while committed["batch"] != position.batch - 1 and not failed.is_set():
+                    commit_turn.wait()
+            waited = time.perf_counter() - wait_started
+            if failed.is_set():
+                connection.rollback()
+                return
+            cursor.execute(checkpoint_sql, (*position, job_id))
+            connection.commit()
+            # La espera del turno para confirmar no es trabajo del COPY.
+            profile.add("copy", time.perf_counter() - copy_started - waited, time.thread_time() - cpu_started)
+        except Exception as exc:
+            connection.rollback()
+            raise RuntimeError(
+                f"Falló el COPY del lote de {detail_name} alrededor de la fila {first_row:,}".replace(",", ".")
+            ) from exc
+        finally:
+            buffer.close()
+
+        with commit_turn:
+            committed["batch"] = position.batch
+            commit_turn.notify_all()
+        with progress_lock:
+            progress["rows"] += rows
+            progress["bytes"] += raw_size
+            now = time.monotonic()
+            if now - last_report["at"] < IMPORT_PROGRESS_INTERVAL_MS / 1000:
+                return
+            last_report["at"] = now
+            _update_job(job_id, **progress_fields(now))
+        logger.info("COPY %s: %s filas procesadas", detail_name, f"{progress['rows']:,}".replace(",", "."))
+
+    def copy_worker() -> None:
+        connection = None
+        try:
+            connection = engine.raw_connection()
+            cursor = connection.cursor()
+            cursor.execute("SET statement_timeout TO 0")
+            cursor.execute("SET synchronous_commit TO OFF")
+            connection.commit()
+        except BaseException as exc:
+            record_error(exc)
+
+        # Aun después de un error se sigue vaciando la cola hasta el marcador de fin, así quien la llena
+        # nunca queda bloqueado.
+        try:
+            while True:
+                item = pending.get()
+                if item is None:
+                    return
+                if failed.is_set():
+                    continue
+                try:
+                    copy_chunk(connection, cursor, *item)
+                except BaseException as exc:
+                    record_error(exc)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    workers = [
+        threading.Thread(target=copy_worker, name=f"copy-{detail_name}-{number}", daemon=True)
+        for number in range(IMPORT_COPY_CONNECTIONS)
+    ]
+    for worker in workers:
+        worker.start()
+
+    batch, offset, loaded_rows = checkpoint
+    try:
+        for raw_size, rows, text in chunks:
+            if failed.is_set():
+                break
+            batch += 1
+            offset += raw_size
+            pending.put((loaded_rows + 1, raw_size, rows, text, ImportCheckpoint(batch, offset, loaded_rows + rows)))
+            loaded_rows += rows
+    except BaseException:
+        failed.set()
+        raise
+    finally:
+        for _ in workers:
+            pending.put(None)
+        for worker in workers:
+            worker.join()
+
+    if errors:
+        raise errors[0]
+    _update_job(job_id, **dict(progress_fields(time.monotonic()), eta_seconds=0.0))
+    return progress["rows"], progress["bytes"]
+
+
 def _copy_deudores_to_postgres(
     deudores_zip_path: Path,
     entidades_lookup: dict[str, str],
     job_id: str,
-) -> tuple[int, int]:
+    profile: ImportProfile,
+) -> tuple[str, int, int]:
     connection = engine.raw_connection()
     cursor = connection.cursor()
-    total_rows = 0
-    processed_bytes = 0
+    staging_table = f"deudores_import_{job_id.replace('-', '_')}"
+    staging_ident = _quote_identifier(staging_table)
+    compact = deudores_is_compact(engine)
+    copy_columns = DEUDOR_COMPACT_COPY_COLUMNS if compact else DEUDOR_COPY_COLUMNS
 
     try:
         cursor.execute("SET statement_timeout TO 0")
         cursor.execute("SET synchronous_commit TO OFF")
+        if not _is_partitioned_table(cursor, Deudor.__tablename__):
+            raise RuntimeError(
+                "deudores no está particionada por período; conviértala con "
+                "python -m app.import_jobs particionar-deudores antes de importar"
+            )
+
+        # El período se carga completo en una tabla temporal; deudores no cambia hasta la publicación final,
+        # que reemplaza cualquier carga anterior del mismo fecha_informacion en una sola transacción.
+        fecha_informacion = _read_deudores_period(deudores_zip_path)
+        checkpoint = _load_checkpoint(job_id)
+        if _staging_matches_checkpoint(cursor, staging_table, checkpoint):
+            logger.info("Retomando el job %s desde el lote %s (%s filas)", job_id, checkpoint.batch, checkpoint.rows)
+        else:
+            checkpoint = _reset_checkpoint(job_id)
+            _create_deudores_staging_table(cursor, staging_table, fecha_informacion, compact)
+        connection.commit()
 
-        with zipfile.ZipFile(deudores_zip_path) as zip_file:
-            zip_info = zip_file.getinfo(DEUDORES_ZIP_MEMBER)
-            total_bytes = int(zip_info.file_size)
+        # El miembro se descomprime a medida que se lee; gzip y zstd no informan el tamaño final.
+        with open_archive_member(deudores_zip_path, DEUDORES_ARCHIVE_MEMBER) as member:
+            total_bytes = member.size or 0
             _update_job(
                 job_id,
                 stage="processing_deudores",
-                message="Cargando deudores en PostgreSQL con COPY...",
+                message=f"Cargando el período {fecha_informacion} de deudores en tabla temporal...",
                 progress_total=total_bytes,
-                progress_current=0,
-                processed_rows=0,
+                progress_current=checkpoint.offset,
+                processed_rows=checkpoint.rows,
             )
 
-            with zip_file.open(DEUDORES_ZIP_MEMBER) as deudores_txt:
-                while True:
-                    buffer = io.StringIO()
-                    rows_in_batch = 0
-                    write_line = buffer.write
-
-                    while rows_in_batch < DEUDORES_COPY_BATCH_SIZE:
-                        raw_line = deudores_txt.readline()
-                        if not raw_line:
-                            break
-                        processed_bytes += len(raw_line)
-                        total_rows += 1
-                        rows_in_batch += 1
-                        write_line(_format_deudor_line(raw_line.decode("ISO-8859-1"), entidades_lookup))
-
-                    if rows_in_batch == 0:
-                        break
-
-                    buffer.seek(0)
-                    try:
-                        cursor.copy_from(
-                            buffer,
-                            Deudor.__tablename__,
-                            sep="\t",
-                            null="\\N",
-                            columns=DEUDOR_COPY_COLUMNS,
-                        )
-                        connection.commit()
-                    except Exception as exc:
-                        connection.rollback()
-                        raise RuntimeError(
-                            f"Falló el COPY del lote de deudores alrededor de la fila {total_rows:,}".replace(",", ".")
-                        ) from exc
-                    finally:
-                        buffer.close()
-
-                    _update_job(
-                        job_id,
-                        progress_current=processed_bytes,
-                        progress_total=total_bytes,
-                        processed_rows=total_rows,
-                        message=f"Procesadas {total_rows:,} filas de deudores.".replace(",", "."),
-                    )
-                    logger.info("COPY deudores: %s filas procesadas", f"{total_rows:,}".replace(",", "."))
-
-            cursor.execute(f"ANALYZE {Deudor.__tablename__}")
+            load_started_at = time.monotonic()
+            _skip_bytes(member.stream, checkpoint.offset)
+            with profile.measure("load"), closing(
+                _iter_formatted_deudores_chunks(member.stream, entidades_lookup, profile, compact, fecha_informacion)
+            ) as formatted_chunks:
+                total_rows, processed_bytes = _copy_chunks_to_staging(
+                    formatted_chunks,
+                    staging_table,
+                    copy_columns,
+                    job_id,
+                    total_bytes,
+                    "deudores",
+                    checkpoint,
+                    profile,
+                )
+            logger.info(
+                "Período %s de deudores cargado en %.1f s", fecha_informacion, time.monotonic() - load_started_at
+            )
+        total_bytes = total_bytes or processed_bytes
+
+        # La carga se hizo sin WAL ni índices; la tabla pasa a ser permanente y los índices se crean una sola
+        # vez sobre los datos completos, antes de adjuntarla.
+        _update_job(
+            job_id,
+            stage="building_indexes_deudores",
+            message=f"Creando índices del período {fecha_informacion}...",
+            progress_current=processed_bytes,
+            progress_total=total_bytes,
+            processed_rows=total_rows,
+        )
+        index_started_at = time.monotonic()
+        with profile.measure("set_logged"):
+            cursor.execute(f"ALTER TABLE {staging_ident} SET LOGGED")
+        with profile.measure("indexes"):
+            _configure_index_build(cursor)
+            # Un job retomado puede tener los índices ya creados si se interrumpió antes de publicar.
+            if not _table_exists(cursor, f"{staging_table}_pkey"):
+                _create_deudores_staging_indexes(cursor, staging_table)
+        connection.commit()
+        with profile.measure("analyze"):
+            # VACUUM además de ANALYZE: marca las páginas como visibles para todos y el historial por CUIT se
+            # lee solo de idx_deudores_historial, sin ir a la tabla. VACUUM no corre dentro de una transacción.
+            connection.dbapi_connection.autocommit = True
+            try:
+                cursor.execute(f"VACUUM (ANALYZE) {staging_ident}")
+            finally:
+                connection.dbapi_connection.autocommit = False
+        logger.info(
+            "Índices de deudores %s creados en %.1f s", fecha_informacion, time.monotonic() - index_started_at
+        )
+
+        _update_job(
+            job_id,
+            stage="publishing_deudores",
+            message=f"Publicando el período {fecha_informacion} en deudores...",
+            profile=profile.snapshot(),
+        )
+        with profile.measure("publish"):
+            _publish_deudores_partition(cursor, staging_table, fecha_informacion, compact=compact)
+            connection.commit()
+            _drop_expired_deudores_partitions(cursor)
             connection.commit()
-            return total_rows, total_bytes
+        return fecha_informacion, total_rows, total_bytes
+    except Exception:
+        connection.rollback()
+        # Si el servicio se está apagando, la tabla temporal se conserva para retomar el job desde su checkpoint.
+        if not _shutdown_requested.is_set():
+            try:
+                cursor.execute(f"DROP TABLE IF EXISTS {staging_ident}")
+                connection.commit()
+            except Exception:
+                connection.rollback()
+        raise
     finally:
         cursor.close()
         connection.close()
 
 
-def _copy_padron_to_postgres(padron_zip_path: Path, job_id: str) -> tuple[int, int]:
+def _update_deudores_resumen(fecha_informacion: str) -> int:
+    """Actualiza deudores_resumen con el período recién publicado y devuelve cuántos CUITs escribió.
+
+    Solo se recorre la partición del período: cada CUIT que aparece en ella pasa a ese período, salvo que el
+    resumen ya tenga uno posterior (se importó un período viejo). Los CUITs que el resumen tenía en ese mismo
+    período y ya no aparecen en él (se reimportó con menos filas) se recalculan desde su último período en
+    deudores, y los de períodos vencidos se borran. Si el resumen está vacío se arma entero desde deudores.
+    Todo en una transacción: la API ve el resumen anterior hasta el commit.
+    """
+    connection = engine.raw_connection()
+    cursor = connection.cursor()
+    current_ident = _quote_identifier(DeudorResumen.__tablename__)
+    deudores_ident = _quote_identifier(Deudor.__tablename__)
+    montos_por_situacion = ",\n".join(
+        f"sum(d.prestamos_total_garantias) FILTER (WHERE d.situacion = {situacion})"
+        for situacion in range(1, 6)
+    )
+    deudores_fecha: Any = fecha_informacion
+    if deudores_is_compact(engine):
+        # deudores_resumen conserva sus tipos: el CUIT vuelve a texto de 11 dígitos, el índice de mes a AAAAMM y
+        # el banco sale de entidades.
+        deudores_fecha = period_index(fecha_informacion)
+        numero_identificacion = "lpad(d.numero_identificacion::text, 11, '0')"
+        resumen_fecha = period_expression("d.fecha_informacion")
+        bancos = "coalesce(e.nombre_entidad, 'Desconocida')"
+        entidades_join = f"LEFT JOIN {_quote_identifier(Entidad.__tablename__)} AS e USING (codigo_entidad)"
+        cuit_en_deudores = "p.numero_identificacion::bigint"
+    else:
+        numero_identificacion = "d.numero_identificacion"
+        resumen_fecha = "d.fecha_informacion"
+        bancos = "d.nombre_entidad"
+        entidades_join = ""
+        cuit_en_deudores = "p.numero_identificacion"
+
+    def resumen_select(filas: str) -> str:
+        return f"""
+            SELECT
+                {numero_identificacion},
+                {resumen_fecha},
+                max(d.situacion),
+                {montos_por_situacion},
+                array_agg(d.situacion ORDER BY d.id),
+                array_agg(d.prestamos_total_garantias ORDER BY d.id),
+                array_agg({bancos} ORDER BY d.id)
+            FROM {deudores_ident} AS d
+            {entidades_join}
+            {filas}
+            GROUP BY d.numero_identificacion, d.fecha_informacion
+        """
+
+    try:
+        cursor.execute("SET statement_timeout TO 0")
+        cursor.execute("SET synchronous_commit TO OFF")
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {current_ident})")
+        if not cursor.fetchone()[0]:
+            cursor.execute(
+                f"INSERT INTO {current_ident} "
+                + resumen_select(
+                    f"""
+                    JOIN (
+                        SELECT numero_identificacion, max(fecha_informacion) AS fecha_informacion
+                        FROM {deudores_ident}
+                        GROUP BY numero_identificacion
+                    ) AS ultimos USING (numero_identificacion, fecha_informacion)
+                    """
+                )
+            )
+            total_rows = cursor.rowcount
+        else:
+            cursor.execute("CREATE TEMP TABLE resumen_pendientes (numero_identificacion varchar(11)) ON COMMIT DROP")
+            cursor.execute(
+                f"""
+                WITH borrados AS (
+                    DELETE FROM {current_ident} WHERE fecha_informacion = %s RETURNING numero_identificacion
+                )
+                INSERT INTO resumen_pendientes SELECT numero_identificacion FROM borrados
+                """,
+                (fecha_informacion,),
+            )
+            cursor.execute("ANALYZE resumen_pendientes")
+            cursor.execute(
+                f"INSERT INTO {current_ident} "
+                + resumen_select("WHERE d.fecha_informacion = %(fecha_informacion)s")
+                + f"""
+                ON CONFLICT (numero_identificacion) DO UPDATE SET
+                    fecha_informacion = EXCLUDED.fecha_informacion,
+                    peor_situacion = EXCLUDED.peor_situacion,
+                    monto_situacion_1 = EXCLUDED.monto_situacion_1,
+                    monto_situacion_2 = EXCLUDED.monto_situacion_2,
+                    monto_situacion_3 = EXCLUDED.monto_situacion_3,
+                    monto_situacion_4 = EXCLUDED.monto_situacion_4,
+                    monto_situacion_5 = EXCLUDED.monto_situacion_5,
+                    situaciones = EXCLUDED.situaciones,
+                    montos = EXCLUDED.montos,
+                    bancos = EXCLUDED.bancos
+                WHERE {current_ident}.fecha_informacion < EXCLUDED.fecha_informacion
+                """,
+                {"fecha_informacion": deudores_fecha},
+            )
+            total_rows = cursor.rowcount
+            cursor.execute(
+                f"INSERT INTO {current_ident} "
+                + resumen_select(
+                    f"""
+                    JOIN (
+                        SELECT {cuit_en_deudores} AS numero_identificacion, ultimo.fecha_informacion
+                        FROM resumen_pendientes AS p
+                        CROSS JOIN LATERAL (
+                            SELECT max(fecha_informacion) AS fecha_informacion
+                            FROM {deudores_ident}
+                            WHERE numero_identificacion = {cuit_en_deudores}
+                        ) AS ultimo
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM {current_ident} AS r WHERE r.numero_identificacion = p.numero_identificacion
+                        )
+                    ) AS ultimos USING (numero_identificacion, fecha_informacion)
+                    """
+                )
+            )
+            if DEUDORES_RETAINED_PERIODS > 0:
+                periods = _deudores_partition_periods(cursor)
+                if periods:
+                    cursor.execute(f"DELETE FROM {current_ident} WHERE fecha_informacion < %s", (min(periods),))
+        connection.commit()
+        cursor.execute(f"ANALYZE {current_ident}")
+        connection.commit()
+        return total_rows
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def _copy_padron_to_postgres(padron_zip_path: Path, job_id: str, profile: ImportProfile) -> tuple[int, int]:
     connection = engine.raw_connection()
     cursor = connection.cursor()
-    total_rows = 0
-    processed_bytes = 0
     staging_table = f"padrones_import_{job_id.replace('-', '_')}"
     old_table = f"padrones_old_{job_id.replace('-', '_')}"
     staging_ident = _quote_identifier(staging_table)
     old_ident = _quote_identifier(old_table)
     current_ident = _quote_identifier(Padron.__tablename__)
     staging_index_ident = _quote_identifier(f"{staging_table}_identificacion_idx")
+    staging_dni_ident = _quote_identifier(f"{staging_table}_dni_idx")
+    staging_nombre_ident = _quote_identifier(f"{staging_table}_denominacion_trgm")
 
     try:
         cursor.execute("SET statement_timeout TO 0")
         cursor.execute("SET synchronous_commit TO OFF")
-        cursor.execute(f"DROP TABLE IF EXISTS {staging_ident}")
-        cursor.execute(
-            f"""
-            CREATE TABLE {staging_ident} (
-                id integer GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-                identificacion varchar(11) NOT NULL,
-                denominacion varchar(160) NOT NULL,
-                actividad varchar(6),
-                marca_baja varchar(1),
-                cuit_reemplazo varchar(11),
-                fallecimiento varchar(1)
+        cursor.execute(NAME_SEARCH_AVAILABLE_SQL)
+        (name_search,) = cursor.fetchone()
+        checkpoint = _load_checkpoint(job_id)
+        if _staging_matches_checkpoint(cursor, staging_table, checkpoint):
+            logger.info("Retomando el job %s desde el lote %s (%s filas)", job_id, checkpoint.batch, checkpoint.rows)
+        else:
+            checkpoint = _reset_checkpoint(job_id)
+            cursor.execute(f"DROP TABLE IF EXISTS {staging_ident}")
+            cursor.execute(
+                f"""
+                CREATE UNLOGGED TABLE {staging_ident} (
+                    id integer GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                    identificacion varchar(11) NOT NULL,
+                    denominacion varchar(160) NOT NULL,
+                    actividad varchar(6),
+                    marca_baja varchar(1),
+                    cuit_reemplazo varchar(11),
+                    fallecimiento varchar(1)
+                )
+                """
             )
-            """
-        )
         connection.commit()
 
-        with zipfile.ZipFile(padron_zip_path) as zip_file:
-            zip_info = zip_file.getinfo(PADRON_ZIP_MEMBER)
-            total_bytes = int(zip_info.file_size)
+        with open_archive_member(padron_zip_path, PADRON_ARCHIVE_MEMBER) as member:
+            total_bytes = member.size or 0
             _update_job(
                 job_id,
                 stage="processing_padron",
                 message="Cargando padrón en tabla temporal...",
                 progress_total=total_bytes,
-                progress_current=0,
-                processed_rows=0,
+                progress_current=checkpoint.offset,
+                processed_rows=checkpoint.rows,
             )
 
-            with zip_file.open(PADRON_ZIP_MEMBER) as padron_txt:
-                while True:
-                    buffer = io.StringIO()
-                    rows_in_batch = 0
-                    write_line = buffer.write
-
-                    while rows_in_batch < PADRON_COPY_BATCH_SIZE:
-                        raw_line = padron_txt.readline()
-                        if not raw_line:
-                            break
-                        processed_bytes += len(raw_line)
-                        total_rows += 1
-                        rows_in_batch += 1
-                        write_line(_format_padron_line(raw_line.decode("ISO-8859-1")))
-
-                    if rows_in_batch == 0:
-                        break
-
-                    buffer.seek(0)
-                    try:
-                        cursor.copy_from(
-                            buffer,
-                            staging_table,
-                            sep="\t",
-                            null="\\N",
-                            columns=PADRON_COPY_COLUMNS,
-                        )
-                        connection.commit()
-                    except Exception as exc:
-                        connection.rollback()
-                        raise RuntimeError(
-                            f"Falló el COPY del lote de padrón alrededor de la fila {total_rows:,}".replace(",", ".")
-                        ) from exc
-                    finally:
-                        buffer.close()
-
-                    _update_job(
-                        job_id,
-                        progress_current=processed_bytes,
-                        progress_total=total_bytes,
-                        processed_rows=total_rows,
-                        message=f"Procesadas {total_rows:,} filas de padrón.".replace(",", "."),
-                    )
-                    logger.info("COPY padrón: %s filas procesadas", f"{total_rows:,}".replace(",", "."))
+            _skip_bytes(member.stream, checkpoint.offset)
+            with profile.measure("load"):
+                total_rows, processed_bytes = _copy_chunks_to_staging(
+                    _iter_formatted_padron_chunks(member.stream, profile),
+                    staging_table,
+                    PADRON_COPY_COLUMNS,
+                    job_id,
+                    total_bytes,
+                    "padrón",
+                    checkpoint,
+                    profile,
+                )
+        total_bytes = total_bytes or processed_bytes
 
         _update_job(
             job_id,
@@ -486,33 +1635,149 @@ def _copy_padron_to_postgres(padron_zip_path: Path, job_id: str) -> tuple[int, i
             progress_total=total_bytes,
             processed_rows=total_rows,
         )
-        cursor.execute(f"CREATE INDEX {staging_index_ident} ON {staging_ident} (identificacion)")
-        cursor.execute(f"ANALYZE {staging_ident}")
+        with profile.measure("set_logged"):
+            cursor.execute(f"ALTER TABLE {staging_ident} SET LOGGED")
+        with profile.measure("indexes"):
+            _configure_index_build(cursor)
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {staging_index_ident} ON {staging_ident} (identificacion)")
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {staging_dni_ident} ON {staging_ident} "
+                f"({dni_expression('identificacion')})"
+            )
+            # Sin este índice, la búsqueda por nombre recorrería el padrón completo después de cada importación.
+            if name_search:
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {staging_nombre_ident} ON {staging_ident} "
+                    f"USING gin ({PADRON_NOMBRE_INDEX_COLUMNS})"
+                )
+        with profile.measure("analyze"):
+            cursor.execute(f"ANALYZE {staging_ident}")
         connection.commit()
 
-        cursor.execute("BEGIN")
-        cursor.execute(f"ALTER TABLE {current_ident} RENAME TO {old_ident}")
-        cursor.execute(f"ALTER TABLE {staging_ident} RENAME TO {current_ident}")
-        cursor.execute(f"DROP TABLE {old_ident}")
-        cursor.execute(
-            f"ALTER INDEX {staging_index_ident} RENAME TO {_quote_identifier('idx_padrones_identificacion')}"
-        )
-        connection.commit()
+        with profile.measure("publish"):
+            cursor.execute("BEGIN")
+            cursor.execute(f"ALTER TABLE {current_ident} RENAME TO {old_ident}")
+            cursor.execute(f"ALTER TABLE {staging_ident} RENAME TO {current_ident}")
+            cursor.execute(f"DROP TABLE {old_ident}")
+            cursor.execute(
+                f"ALTER INDEX {staging_index_ident} RENAME TO {_quote_identifier('idx_padrones_identificacion')}"
+            )
+            cursor.execute(f"ALTER INDEX {staging_dni_ident} RENAME TO {_quote_identifier('idx_padrones_dni')}")
+            if name_search:
+                cursor.execute(
+                    f"ALTER INDEX {staging_nombre_ident} RENAME TO {_quote_identifier(PADRON_NOMBRE_INDEX)}"
+                )
+            connection.commit()
         return total_rows, total_bytes
     except Exception:
         connection.rollback()
-        try:
-            cursor.execute(f"DROP TABLE IF EXISTS {staging_ident}")
-            connection.commit()
-        except Exception:
-            connection.rollback()
+        # Si el servicio se está apagando, la tabla temporal se conserva para retomar el job desde su checkpoint.
+        if not _shutdown_requested.is_set():
+            try:
+                cursor.execute(f"DROP TABLE IF EXISTS {staging_ident}")
+                connection.commit()
+            except Exception:
+                connection.rollback()
         raise
     finally:
         cursor.close()
         connection.close()
 
 
+def request_shutdown() -> None:
+    """Avisa que el servicio se está apagando: los errores que aparezcan desde ahora se tratan como interrupciones.
+
+    Un job interrumpido conserva su tabla temporal, su checkpoint y sus archivos, y se retoma al reiniciar.
+    """
+    _shutdown_requested.set()
+
+
+def _interrupted_by_shutdown(job_id: str) -> bool:
+    if not _shutdown_requested.is_set():
+        return False
+    logger.warning("Job %s interrumpido por el apagado del servicio; se retomará al reiniciar", job_id)
+    return True
+
+
+# Los snapshots se leen de las tablas ya publicadas, ordenados por bytes (COLLATE "C") como los busca la API.
+SNAPSHOT_QUERIES = {
+    SNAPSHOT_PADRON: (
+        "SELECT identificacion, denominacion, actividad, marca_baja, cuit_reemplazo, fallecimiento, id "
+        f"FROM {Padron.__tablename__} ORDER BY identificacion COLLATE \"C\", id",
+        pack_padron,
+    ),
+    SNAPSHOT_DEUDORES: (
+        "SELECT numero_identificacion, fecha_informacion, peor_situacion "
+        f"FROM {DeudorResumen.__tablename__} ORDER BY numero_identificacion COLLATE \"C\"",
+        pack_deudor,
+    ),
+}
+SNAPSHOT_FETCH_ROWS = 50_000
+
+
+def _publish_lookup_snapshot(kind: str, job_id: str, profile: ImportProfile) -> None:
+    """Escribe el snapshot de consulta de la API; si falla, la API vuelve a PostgreSQL y el job sigue."""
+    if not SNAPSHOTS_ENABLED:
+        discard_snapshot(kind)
+        return
+
+    _update_job(job_id, stage="writing_snapshot", message="Generando snapshot de consulta...")
+    query, pack = SNAPSHOT_QUERIES[kind]
+    connection = engine.raw_connection()
+    try:
+        with profile.measure("snapshot"):
+            cursor = connection.cursor(name=f"snapshot_{job_id.replace('-', '_')}")
+            cursor.itersize = SNAPSHOT_FETCH_ROWS
+            cursor.execute(query)
+            records = write_snapshot(kind, job_id, (pack(row) for row in cursor))
+        logger.info("Snapshot %s del job %s: %s registros", kind, job_id, f"{records:,}".replace(",", "."))
+    except Exception:
+        logger.warning("No se pudo generar el snapshot %s del job %s; la API consulta PostgreSQL", kind, job_id, exc_info=True)
+        discard_snapshot(kind)
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+# write_cuit_filter descarta lo que no es un CUIT de 11 dígitos; esas identificaciones siempre van a la base.
+CUIT_FILTER_QUERIES = {
+    FILTER_PADRON: f"SELECT identificacion FROM {Padron.__tablename__}",
+    FILTER_DEUDORES: f"SELECT numero_identificacion FROM {DeudorResumen.__tablename__}",
+}
+
+
+def _publish_cuit_filter(kind: str, job_id: str, profile: ImportProfile) -> None:
+    """Arma el filtro de CUITs con datos; si falla, la API consulta la base para todos los CUITs."""
+    if not CUIT_FILTERS_ENABLED:
+        discard_snapshot(kind)
+        return
+
+    _update_job(job_id, stage="building_cuit_filter", message="Generando filtro de CUITs...")
+    connection = engine.raw_connection()
+    try:
+        with profile.measure("cuit_filter"):
+            cursor = connection.cursor(name=f"cuit_filter_{job_id.replace('-', '_')}")
+            cursor.execute(CUIT_FILTER_QUERIES[kind])
+            parameters = write_cuit_filter(kind, job_id, iter(partial(cursor.fetchmany, SNAPSHOT_FETCH_ROWS), []))
+        logger.info(
+            "Filtro %s del job %s: %s CUITs, %s bits, %s hashes, falsos positivos esperados %.4f%%",
+            kind,
+            job_id,
+            f"{parameters['keys']:,}".replace(",", "."),
+            f"{parameters['bits']:,}".replace(",", "."),
+            parameters["hashes"],
+            parameters["expected_false_positive_rate"] * 100,
+        )
+    except Exception:
+        logger.warning("No se pudo generar el filtro %s del job %s; la API consulta PostgreSQL", kind, job_id, exc_info=True)
+        discard_snapshot(kind)
+    finally:
+        connection.rollback()
+        connection.close()
+
+
 def _run_deudores_job(job_id: str, deudores_zip_path: Path, entidades_path: Path) -> None:
+    profile = _load_profile(job_id)
     db = SessionLocal()
     try:
         _update_job(
@@ -523,11 +1788,14 @@ def _run_deudores_job(job_id: str, deudores_zip_path: Path, entidades_path: Path
             started_at=_utc_now(),
         )
 
-        entidades_actualizadas = _process_entidades_file(entidades_path, db)
-        entidades_lookup = _load_entidades_lookup(db)
+        with profile.measure("entidades"):
+            entidades_actualizadas = _process_entidades_file(entidades_path, db)
+            entidades_lookup = _load_entidades_lookup(db)
         logger.info("Entidades actualizadas: %s", entidades_actualizadas)
     except Exception as exc:
         db.rollback()
+        if _interrupted_by_shutdown(job_id):
+            return
         logger.exception("Falló la actualización de entidades para el job %s", job_id)
         _update_job(
             job_id,
@@ -535,6 +1803,7 @@ def _run_deudores_job(job_id: str, deudores_zip_path: Path, entidades_path: Path
             stage="failed",
             message="Falló la carga de entidades.",
             error=str(exc),
+            profile=profile.snapshot(),
             finished_at=_utc_now(),
         )
         db.close()
@@ -545,7 +1814,24 @@ def _run_deudores_job(job_id: str, deudores_zip_path: Path, entidades_path: Path
         db.close()
 
     try:
-        processed_rows, total_bytes = _copy_deudores_to_postgres(deudores_zip_path, entidades_lookup, job_id)
+        fecha_informacion, processed_rows, total_bytes = _copy_deudores_to_postgres(
+            deudores_zip_path, entidades_lookup, job_id, profile
+        )
+        _update_job(
+            job_id,
+            stage="building_resumen",
+            message=f"Actualizando el resumen por CUIT con el período {fecha_informacion}...",
+            profile=profile.snapshot(),
+        )
+        with profile.measure("resumen"):
+            resumen_rows = _update_deudores_resumen(fecha_informacion)
+        logger.info(
+            "Resumen de deudores actualizado con el período %s: %s CUITs",
+            fecha_informacion,
+            f"{resumen_rows:,}".replace(",", "."),
+        )
+        _publish_lookup_snapshot(SNAPSHOT_DEUDORES, job_id, profile)
+        _publish_cuit_filter(FILTER_DEUDORES, job_id, profile)
         _update_job(
             job_id,
             status="completed",
@@ -554,9 +1840,18 @@ def _run_deudores_job(job_id: str, deudores_zip_path: Path, entidades_path: Path
             processed_rows=processed_rows,
             progress_current=total_bytes,
             progress_total=total_bytes,
+            eta_seconds=0.0,
+            profile=profile.snapshot(),
             finished_at=_utc_now(),
         )
+        logger.info("Perfil del job %s: %s", job_id, profile.summary())
     except Exception as exc:
+        # El período pudo quedar publicado sin resumen nuevo: el snapshot y el filtro anteriores ya no alcanzan
+        # para responder que un CUIT no tiene deudas.
+        discard_snapshot(SNAPSHOT_DEUDORES)
+        discard_snapshot(FILTER_DEUDORES)
+        if _interrupted_by_shutdown(job_id):
+            return
         logger.exception("Falló la carga de deudores para el job %s", job_id)
         _update_job(
             job_id,
@@ -564,14 +1859,16 @@ def _run_deudores_job(job_id: str, deudores_zip_path: Path, entidades_path: Path
             stage="failed",
             message="Falló la carga de deudores.",
             error=str(exc),
+            profile=profile.snapshot(),
             finished_at=_utc_now(),
         )
-    finally:
-        _safe_unlink(deudores_zip_path)
-        _safe_unlink(entidades_path)
+
+    _safe_unlink(deudores_zip_path)
+    _safe_unlink(entidades_path)
 
 
 def _run_padron_job(job_id: str, padron_zip_path: Path) -> None:
+    profile = _load_profile(job_id)
     try:
         _update_job(
             job_id,
@@ -580,7 +1877,9 @@ def _run_padron_job(job_id: str, padron_zip_path: Path) -> None:
             message="Procesando archivo de padrón...",
             started_at=_utc_now(),
         )
-        processed_rows, total_bytes = _copy_padron_to_postgres(padron_zip_path, job_id)
+        processed_rows, total_bytes = _copy_padron_to_postgres(padron_zip_path, job_id, profile)
+        _publish_lookup_snapshot(SNAPSHOT_PADRON, job_id, profile)
+        _publish_cuit_filter(FILTER_PADRON, job_id, profile)
         _update_job(
             job_id,
             status="completed",
@@ -589,9 +1888,14 @@ def _run_padron_job(job_id: str, padron_zip_path: Path) -> None:
             processed_rows=processed_rows,
             progress_current=total_bytes,
             progress_total=total_bytes,
+            eta_seconds=0.0,
+            profile=profile.snapshot(),
             finished_at=_utc_now(),
         )
+        logger.info("Perfil del job %s: %s", job_id, profile.summary())
     except Exception as exc:
+        if _interrupted_by_shutdown(job_id):
+            return
         logger.exception("Falló la carga de padrón para el job %s", job_id)
         _update_job(
             job_id,
@@ -599,25 +1903,222 @@ def _run_padron_job(job_id: str, padron_zip_path: Path) -> None:
             stage="failed",
             message="Falló la carga de padrón. El padrón anterior quedó intacto.",
             error=str(exc),
+            profile=profile.snapshot(),
             finished_at=_utc_now(),
         )
-    finally:
-        _safe_unlink(padron_zip_path)
+
+    _safe_unlink(padron_zip_path)
+
+
+def _job_upload_paths(job: ImportJob) -> list[Path]:
+    if job.job_type == JOB_TYPE_DEUDORES:
+        stored = [job.deudores_path, job.entidades_path]
+    else:
+        stored = [job.padron_path]
+    if not all(stored):
+        return []
+    return [Path(path) for path in stored]
+
+
+# Condición SQL: el job tiene su advisory lock tomado, es decir, algún proceso lo está ejecutando ahora.
+_JOB_LOCK_HELD_SQL = """
+    EXISTS (
+        SELECT 1 FROM pg_locks
+        WHERE locktype = 'advisory'
+          AND granted
+          AND database = (SELECT oid FROM pg_database WHERE datname = current_database())
+          AND classid = %(lock_class)s::oid
+          AND objid = hashtext(import_jobs.id)::oid
+          AND objsubid = 2
+    )
+"""
 
 
-def create_deudores_job(deudores: UploadFile, entidades: UploadFile) -> ImportJob:
-    upload_prefix = uuid.uuid4().hex
-    deudores_zip_path = UPLOAD_DIR / f"{upload_prefix}_deudores.zip"
-    entidades_path = UPLOAD_DIR / f"{upload_prefix}_entidades.txt"
+class ClaimedJob(NamedTuple):
+    job_id: str
+    job_type: str
+    # Conexión del pool que tiene el advisory lock de sesión del job; vuelve al pool cuando el job termina y
+    # libera el lock, y si no se pudo liberar se descarta.
+    connection: Any
+
+
+def _try_job_lock(cursor: Any, job_id: str) -> bool:
+    cursor.execute("SELECT pg_try_advisory_lock(%s, hashtext(%s))", (IMPORT_JOB_LOCK_CLASS, job_id))
+    return bool(cursor.fetchone()[0])
 
-    with _job_creation_lock:
+
+def _release_job_lock(cursor: Any, job_id: str) -> None:
+    cursor.execute("SELECT pg_advisory_unlock(%s, hashtext(%s))", (IMPORT_JOB_LOCK_CLASS, job_id))
+
+
+def _claim_next_job() -> Optional[ClaimedJob]:
+    """Toma el job más antiguo que se pueda ejecutar sin pasar el límite de su tipo.
+
+    Son candidatos los jobs en cola y los que figuran en curso sin que nadie tenga su advisory lock: esos
+    quedaron de un proceso que murió o se apagó y se retoman desde su checkpoint. El lock de la cola serializa
+    el conteo por tipo entre todos los workers; SKIP LOCKED saltea las filas que otra transacción está
+    actualizando en lugar de esperarlas.
+    """
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (IMPORT_QUEUE_LOCK_KEY,))
+        cursor.execute(
+            f"""
+            SELECT job_type, count(*) FROM import_jobs
+            WHERE status = 'running' AND {_JOB_LOCK_HELD_SQL}
+            GROUP BY job_type
+            """,
+            {"lock_class": IMPORT_JOB_LOCK_CLASS},
+        )
+        running = dict(cursor.fetchall())
+        job_types = [
+            job_type
+            for job_type, limit in IMPORT_MAX_RUNNING_BY_JOB_TYPE.items()
+            if running.get(job_type, 0) < limit
+        ]
+        row = None
+        if job_types:
+            cursor.execute(
+                f"""
+                SELECT id, job_type FROM import_jobs
+                WHERE job_type = ANY(%(job_types)s)
+                  AND (status = 'queued' OR (status = 'running' AND NOT {_JOB_LOCK_HELD_SQL}))
+                ORDER BY created_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+                """,
+                {"job_types": job_types, "lock_class": IMPORT_JOB_LOCK_CLASS},
+            )
+            row = cursor.fetchone()
+        if row is None or not _try_job_lock(cursor, row[0]):
+            connection.rollback()
+            connection.close()
+            return None
+
+        job_id, job_type = row
+        cursor.execute(
+            "UPDATE import_jobs SET status = 'running', started_at = COALESCE(started_at, %s) WHERE id = %s",
+            (_utc_now(), job_id),
+        )
+        connection.commit()
+        return ClaimedJob(job_id, job_type, connection)
+    except BaseException:
+        # Puede tener el lock del job: devuelta al pool lo seguiría teniendo, así que se descarta.
+        connection.invalidate()
+        raise
+
+
+def _run_claimed_job(claimed: ClaimedJob) -> None:
+    """Ejecuta un job tomado de la cola y libera su advisory lock al terminar.
+
+    El lock es de sesión: si el proceso muere, PostgreSQL lo libera y otro worker retoma el job.
+    """
+    try:
         db = SessionLocal()
         try:
-            _ensure_no_active_job(db, JOB_TYPE_DEUDORES)
-            _save_upload_file(deudores, deudores_zip_path)
-            _save_upload_file(entidades, entidades_path)
-            _validate_deudores_zip(deudores_zip_path)
+            job = db.get(ImportJob, claimed.job_id)
+            paths = _job_upload_paths(job)
+        finally:
+            db.close()
+        if not paths or not all(path.exists() for path in paths):
+            _update_job(
+                claimed.job_id,
+                status="failed",
+                stage="interrupted",
+                message="Los archivos del job ya no están disponibles.",
+                error="Job interrumpido sin sus archivos.",
+                finished_at=_utc_now(),
+            )
+            return
+
+        if claimed.job_type == JOB_TYPE_DEUDORES:
+            _run_deudores_job(claimed.job_id, *paths)
+        else:
+            _run_padron_job(claimed.job_id, *paths)
+    finally:
+        try:
+            _release_job_lock(claimed.connection.cursor(), claimed.job_id)
+            claimed.connection.commit()
+        except Exception:
+            # Cerrarla la devolvería al pool con el lock tomado; descartada, PostgreSQL libera el lock al cortarse
+            # la sesión.
+            logger.warning("No se pudo liberar el lock del job %s; se descarta su conexión", claimed.job_id)
+            claimed.connection.invalidate()
+        else:
+            claimed.connection.close()
+
+
+class ImportWorkerPool:
+    """Hilos que toman jobs de import_jobs y los ejecutan de a uno por hilo.
+
+    Varios procesos (la API y los workers de python -m app.import_jobs worker) pueden compartir la misma cola;
+    los límites por tipo se cuentan sobre todos ellos.
+    """
+
+    def __init__(self, workers: int, poll_seconds: float) -> None:
+        self._workers = workers
+        self._poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        for index in range(self._workers):
+            threading.Thread(target=self._work, name=f"import-worker-{index + 1}", daemon=True).start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def _work(self) -> None:
+        while not self._stopped.is_set() and not _shutdown_requested.is_set():
+            try:
+                claimed = _claim_next_job()
+            except Exception:
+                logger.exception("No se pudo consultar la cola de importación")
+                claimed = None
+            if claimed is None:
+                self._wake.wait(self._poll_seconds)
+                self._wake.clear()
+                continue
+
+            logger.info("Ejecutando el job %s de %s", claimed.job_id, claimed.job_type)
+            try:
+                _run_claimed_job(claimed)
+            except Exception:
+                # El job queda en curso sin lock y otro worker lo vuelve a tomar.
+                logger.exception("Falló la ejecución del job %s", claimed.job_id)
+
+
+_worker_pool: Optional[ImportWorkerPool] = None
+
+
+def start_import_workers(workers: int = IMPORT_WORKERS) -> ImportWorkerPool:
+    """Arranca en este proceso un pool de workers sobre la cola de import_jobs."""
+    global _worker_pool
+    pool = ImportWorkerPool(workers, IMPORT_WORKER_POLL_SECONDS)
+    pool.start()
+    _worker_pool = pool
+    return pool
+
+
+def _wake_workers() -> None:
+    # Los workers de otros procesos ven el job nuevo en su próxima consulta a la cola.
+    if _worker_pool is not None:
+        _worker_pool.wake()
+
+
+def create_deudores_job(upload: ReceivedUpload) -> ImportJob:
+    deudores = upload.files["deudores"]
+    entidades = upload.files["entidades"]
 
+    try:
+        _validate_archive(deudores.path, DEUDORES_ARCHIVE_MEMBER, "deudores")
+        db = SessionLocal()
+        try:
             job = ImportJob(
                 id=str(uuid.uuid4()),
                 job_type=JOB_TYPE_DEUDORES,
@@ -628,7 +2129,11 @@ def create_deudores_job(deudores: UploadFile, entidades: UploadFile) -> ImportJo
                 progress_total=0,
                 processed_rows=0,
                 deudores_filename=deudores.filename,
+                deudores_sha256=deudores.sha256,
                 entidades_filename=entidades.filename,
+                entidades_sha256=entidades.sha256,
+                deudores_path=str(deudores.path),
+                entidades_path=str(entidades.path),
                 created_at=_utc_now(),
             )
             db.add(job)
@@ -636,32 +2141,24 @@ def create_deudores_job(deudores: UploadFile, entidades: UploadFile) -> ImportJo
             db.refresh(job)
         except Exception:
             db.rollback()
-            _safe_unlink(deudores_zip_path)
-            _safe_unlink(entidades_path)
             raise
         finally:
             db.close()
+    except Exception:
+        upload.discard()
+        raise
 
-    thread = threading.Thread(
-        target=_run_deudores_job,
-        args=(job.id, deudores_zip_path, entidades_path),
-        daemon=True,
-    )
-    thread.start()
+    _wake_workers()
     return job
 
 
-def create_padron_job(padron: UploadFile) -> ImportJob:
-    upload_prefix = uuid.uuid4().hex
-    padron_zip_path = UPLOAD_DIR / f"{upload_prefix}_padron.zip"
+def create_padron_job(upload: ReceivedUpload) -> ImportJob:
+    padron = upload.files["padron"]
 
-    with _job_creation_lock:
+    try:
+        _validate_archive(padron.path, PADRON_ARCHIVE_MEMBER, "padrón")
         db = SessionLocal()
         try:
-            _ensure_no_active_job(db, JOB_TYPE_PADRON)
-            _save_upload_file(padron, padron_zip_path)
-            _validate_zip_member(padron_zip_path, PADRON_ZIP_MEMBER, "padrón")
-
             job = ImportJob(
                 id=str(uuid.uuid4()),
                 job_type=JOB_TYPE_PADRON,
@@ -672,6 +2169,8 @@ def create_padron_job(padron: UploadFile) -> ImportJob:
                 progress_total=0,
                 processed_rows=0,
                 padron_filename=padron.filename,
+                padron_sha256=padron.sha256,
+                padron_path=str(padron.path),
                 created_at=_utc_now(),
             )
             db.add(job)
@@ -679,15 +2178,372 @@ def create_padron_job(padron: UploadFile) -> ImportJob:
             db.refresh(job)
         except Exception:
             db.rollback()
-            _safe_unlink(padron_zip_path)
             raise
         finally:
             db.close()
+    except Exception:
+        upload.discard()
+        raise
 
-    thread = threading.Thread(
-        target=_run_padron_job,
-        args=(job.id, padron_zip_path),
-        daemon=True,
-    )
-    thread.start()
+    _wake_workers()
     return job
+
+
+def _upload_session_path(upload_id: str, suffix: str) -> Path:
+    return UPLOAD_DIR / f"{upload_id}_{suffix}"
+
+
+def _merge_ranges(ranges: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _upload_file_status(size: int, ranges: Iterable[tuple[int, int]]) -> dict[str, Any]:
+    merged = _merge_ranges(ranges)
+    missing = []
+    position = 0
+    for start, end in merged:
+        if start > position:
+            missing.append([position, start])
+        position = end
+    if position < size:
+        missing.append([position, size])
+
+    return {
+        "size": size,
+        "received_bytes": sum(end - start for start, end in merged),
+        # Bytes contiguos desde el inicio del archivo, para clientes que suben en orden.
+        "offset": merged[0][1] if merged and merged[0][0] == 0 else 0,
+        "missing": missing,
+        "complete": not missing,
+    }
+
+
+def _upload_session_payload(session: UploadSession, chunks: Iterable[UploadChunk]) -> dict[str, Any]:
+    ranges: dict[str, list[tuple[int, int]]] = {field: [] for field in session.files}
+    for chunk in chunks:
+        ranges.setdefault(chunk.field, []).append((chunk.range_start, chunk.range_end))
+
+    files = {
+        field: {"filename": spec["filename"], **_upload_file_status(spec["size"], ranges[field])}
+        for field, spec in session.files.items()
+    }
+    return {
+        "upload_id": session.id,
+        "job_type": session.job_type,
+        "status": session.status,
+        "job_id": session.job_id,
+        "chunk_size": UPLOAD_SESSION_CHUNK_BYTES,
+        "total_bytes": sum(file["size"] for file in files.values()),
+        "received_bytes": sum(file["received_bytes"] for file in files.values()),
+        "files": files,
+        "created_at": session.created_at.isoformat() if session.created_at else None,
+        "updated_at": session.updated_at.isoformat() if session.updated_at else None,
+    }
+
+
+def _load_upload_session(db: Session, upload_id: str) -> UploadSession:
+    session = db.get(UploadSession, upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Subida no encontrada")
+    return session
+
+
+def _upload_session_chunks(db: Session, upload_id: str) -> list[UploadChunk]:
+    return list(db.scalars(select(UploadChunk).where(UploadChunk.upload_id == upload_id)))
+
+
+def _remove_upload_session_files(session: UploadSession) -> None:
+    for suffix in UPLOAD_FILES_BY_JOB_TYPE.get(session.job_type, {}).values():
+        _safe_unlink(_upload_session_path(session.id, suffix))
+
+
+def _expire_upload_sessions(db: Session) -> None:
+    """Borra las sesiones sin actividad en UPLOAD_SESSION_TTL_HOURS junto con sus archivos incompletos."""
+    expired = db.scalars(
+        select(UploadSession).where(UploadSession.updated_at < _utc_now() - timedelta(hours=UPLOAD_SESSION_TTL_HOURS))
+    ).all()
+    for session in expired:
+        # Los archivos de una sesión finalizada pertenecen a su job, que los borra al terminar.
+        if session.status != "finalized":
+            _remove_upload_session_files(session)
+        db.delete(session)
+    db.commit()
+
+
+def create_upload_session(job_type: str, files: dict[str, tuple[Optional[str], int]]) -> dict[str, Any]:
+    """Abre una subida reanudable y reserva en UPLOAD_DIR un archivo del tamaño declarado por cada campo.
+
+    files indica, por campo de archivo, el nombre original y el tamaño en bytes.
+    """
+    suffixes = UPLOAD_FILES_BY_JOB_TYPE.get(job_type)
+    if suffixes is None:
+        raise HTTPException(status_code=400, detail=f"Tipo de importación desconocido: {job_type}")
+    if set(files) != set(suffixes):
+        raise HTTPException(
+            status_code=400,
+            detail=f"La importación de {job_type} requiere los archivos: {', '.join(suffixes)}",
+        )
+    for field, (_, size) in files.items():
+        if size <= 0:
+            raise HTTPException(status_code=400, detail=f"El archivo {field} está vacío.")
+
+    upload_id = str(uuid.uuid4())
+    created: list[Path] = []
+    db = SessionLocal()
+    try:
+        _expire_upload_sessions(db)
+        for field, suffix in suffixes.items():
+            path = _upload_session_path(upload_id, suffix)
+            created.append(path)
+            # Archivo disperso del tamaño final: cada rango se escribe directamente en su posición.
+            with path.open("wb") as output:
+                output.truncate(files[field][1])
+
+        now = _utc_now()
+        session = UploadSession(
+            id=upload_id,
+            job_type=job_type,
+            status="uploading",
+            files={
+                field: {"filename": Path(filename).name if filename else None, "size": size}
+                for field, (filename, size) in files.items()
+            },
+            created_at=now,
+            updated_at=now,
+        )
+        db.add(session)
+        db.commit()
+        return _upload_session_payload(session, [])
+    except BaseException:
+        db.rollback()
+        for path in created:
+            _safe_unlink(path)
+        raise
+    finally:
+        db.close()
+
+
+def get_upload_session_payload(upload_id: str) -> dict[str, Any]:
+    db = SessionLocal()
+    try:
+        session = _load_upload_session(db, upload_id)
+        return _upload_session_payload(session, _upload_session_chunks(db, upload_id))
+    finally:
+        db.close()
+
+
+def _check_upload_chunk(upload_id: str, field: str, total: int, end: int) -> str:
+    db = SessionLocal()
+    try:
+        session = _load_upload_session(db, upload_id)
+        if session.status != "uploading":
+            raise HTTPException(status_code=409, detail="La subida ya no acepta datos.")
+        spec = session.files.get(field)
+        if spec is None:
+            raise HTTPException(status_code=404, detail=f"La subida no incluye el archivo {field}.")
+        if total != spec["size"] or end >= spec["size"]:
+            raise HTTPException(status_code=416, detail=f"El rango excede el tamaño declarado del archivo {field}.")
+        return UPLOAD_FILES_BY_JOB_TYPE[session.job_type][field]
+    finally:
+        db.close()
+
+
+def _record_upload_chunk(upload_id: str, field: str, start: int, end: int) -> dict[str, Any]:
+    db = SessionLocal()
+    try:
+        session = _load_upload_session(db, upload_id)
+        if session.status != "uploading":
+            raise HTTPException(status_code=409, detail="La subida ya no acepta datos.")
+        db.add(UploadChunk(upload_id=upload_id, field=field, range_start=start, range_end=end))
+        session.updated_at = _utc_now()
+        db.commit()
+        payload = _upload_session_payload(session, _upload_session_chunks(db, upload_id))
+        return {"upload_id": upload_id, "field": field, **payload["files"][field]}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+async def receive_upload_chunk(request: Request, upload_id: str, field: str) -> dict[str, Any]:
+    """Escribe el cuerpo de un PUT en el rango de bytes indicado por su header Content-Range.
+
+    Los rangos pueden llegar en cualquier orden, en paralelo o repetidos; solo se registran cuando el cuerpo
+    completo quedó escrito, así un corte a mitad de un bloque obliga a reenviar únicamente ese bloque.
+    """
+    match = CONTENT_RANGE_PATTERN.fullmatch(request.headers.get("content-range", "").strip())
+    if match is None:
+        raise HTTPException(status_code=400, detail="Se esperaba un header Content-Range: bytes inicio-fin/total.")
+    start, end, total = (int(value) for value in match.groups())
+    if start > end:
+        raise HTTPException(status_code=416, detail="Rango de bytes inválido.")
+
+    suffix = await run_in_threadpool(_check_upload_chunk, upload_id, field, total, end)
+    fd = await run_in_threadpool(os.open, _upload_session_path(upload_id, suffix), os.O_WRONLY)
+    position = start
+    try:
+        pending = bytearray()
+        async for chunk in request.stream():
+            pending += chunk
+            if position + len(pending) > end + 1:
+                raise HTTPException(status_code=400, detail="El cuerpo supera el rango indicado en Content-Range.")
+            if len(pending) >= UPLOAD_CHUNK_SIZE:
+                await run_in_threadpool(_pwrite_all, fd, bytes(pending), position)
+                position += len(pending)
+                pending = bytearray()
+        if pending:
+            await run_in_threadpool(_pwrite_all, fd, bytes(pending), position)
+            position += len(pending)
+    finally:
+        os.close(fd)
+
+    if position != end + 1:
+        raise HTTPException(status_code=400, detail="El cuerpo no coincide con el rango indicado en Content-Range.")
+    return await run_in_threadpool(_record_upload_chunk, upload_id, field, start, end + 1)
+
+
+def _set_upload_session_status(upload_id: str, status: str, job_id: Optional[str] = None) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == upload_id)
+            .values(status=status, job_id=job_id, updated_at=_utc_now())
+        )
+        if status == "finalized":
+            db.execute(delete(UploadChunk).where(UploadChunk.upload_id == upload_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _file_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as stream:
+        for block in iter(partial(stream.read, UPLOAD_CHUNK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def finalize_upload_session(upload_id: str) -> ImportJob:
+    """Crea el ImportJob de una subida completa usando los archivos ya ensamblados en UPLOAD_DIR.
+
+    El sha256 se calcula acá porque los rangos pueden haber llegado desordenados. Si el job no se puede crear
+    (archivo inválido) la sesión vuelve a aceptar datos y conserva sus archivos.
+    """
+    db = SessionLocal()
+    try:
+        claimed = db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == upload_id, UploadSession.status == "uploading")
+            .values(status="finalizing", updated_at=_utc_now())
+        ).rowcount
+        db.commit()
+        session = _load_upload_session(db, upload_id)
+        if not claimed:
+            raise HTTPException(status_code=409, detail="La subida ya fue finalizada o se está finalizando.")
+        chunks = _upload_session_chunks(db, upload_id)
+        payload = _upload_session_payload(session, chunks)
+        job_type = session.job_type
+    finally:
+        db.close()
+
+    try:
+        files = {}
+        for field, suffix in UPLOAD_FILES_BY_JOB_TYPE[job_type].items():
+            status = payload["files"][field]
+            if not status["complete"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Faltan {status['size'] - status['received_bytes']} bytes del archivo {field}.",
+                )
+            path = _upload_session_path(upload_id, suffix)
+            files[field] = StoredUpload(path, status["filename"], status["size"], _file_sha256(path))
+
+        # Sin rutas para descartar: si create_*_job falla, los archivos siguen siendo de la sesión.
+        upload = ReceivedUpload({}, files, [])
+        if job_type == JOB_TYPE_DEUDORES:
+            job = create_deudores_job(upload)
+        else:
+            job = create_padron_job(upload)
+    except BaseException:
+        _set_upload_session_status(upload_id, "uploading")
+        raise
+
+    _set_upload_session_status(upload_id, "finalized", job.id)
+    return job
+
+
+def delete_upload_session(upload_id: str) -> None:
+    db = SessionLocal()
+    try:
+        session = _load_upload_session(db, upload_id)
+        if session.status != "uploading":
+            raise HTTPException(status_code=409, detail="La subida ya fue finalizada o se está finalizando.")
+        _remove_upload_session_files(session)
+        db.delete(session)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_worker(argv: Optional[list[str]] = None) -> int:
+    """Procesa la cola de importación en este proceso hasta recibir SIGTERM o SIGINT.
+
+    Con migrar aplica los cambios de esquema pendientes (ver migrate_schema) y con particionar-deudores convierte
+    una deudores sin particionar (ver partition_deudores); en los dos casos termina al completarlos.
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.import_jobs")
+    parser.add_argument("command", choices=["worker", "migrar", "particionar-deudores"])
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS, help="jobs que este proceso ejecuta a la vez")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(threadName)s %(message)s")
+    if args.command == "migrar":
+        migrate_schema()
+        return 0
+    if args.command == "particionar-deudores":
+        if not partition_deudores():
+            logger.info("deudores ya está particionada o todavía no existe")
+        return 0
+
+    create_tables(engine)
+
+    pool = start_import_workers(max(1, args.workers))
+    stopped = threading.Event()
+
+    def _stop(signum: int, frame: Any) -> None:
+        # Igual que el apagado de la API: los jobs en curso conservan su checkpoint y otro worker los retoma.
+        request_shutdown()
+        pool.stop()
+        stopped.set()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logger.info("Worker de importación iniciado con %s hilos", max(1, args.workers))
+    while not stopped.wait(1):
+        pass
+    logger.info("Worker de importación detenido")
+    return 0
+
+
+if __name__ == "__main__":
+    # Se vuelve a importar por su nombre para que el pool de procesos encuentre las funciones en app.import_jobs.
+    from app.import_jobs import run_worker as _run_worker
+
+    sys.exit(_run_worker(sys.argv[1:]))
@@ -0,0 +1,91 @@
+"""Eventos de progreso de los jobs de importación para los clientes SSE de /jobs/{job_id}/events.
+
+_update_job publica cada cambio de un job con pg_notify en el canal JOB_EVENTS_CHANNEL, dentro de la misma
+transacción que lo guarda, así que el evento llega a todos los procesos de la API aunque el job corra en un
+worker aparte. Cada proceso mantiene una sola conexión LISTEN y reparte las notificaciones entre sus clientes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+import asyncpg
+
+JOB_EVENTS_CHANNEL = "import_job_events"
+# pg_notify rechaza payloads de 8000 bytes o más; los eventos más grandes viajan solo con el job_id.
+MAX_NOTIFY_PAYLOAD_BYTES = 7900
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def encode_job_event(payload: dict[str, Any]) -> str:
+    encoded = json.dumps(payload, ensure_ascii=False)
+    if len(encoded.encode("utf-8")) > MAX_NOTIFY_PAYLOAD_BYTES:
+        return json.dumps({"job_id": payload["job_id"]})
+    return encoded
+
+
+class JobEventBroker:
+    """Una conexión LISTEN por proceso y una cola por cliente suscripto.
+
+    Cada cola guarda solo el último evento: un cliente lento recibe el estado más reciente en lugar de
+    acumular todos los intermedios. Si la conexión se corta se vuelve a abrir en la próxima suscripción o
+    en el próximo ensure_listening; mientras tanto los clientes se apoyan en su relectura periódica.
+    """
+
+    def __init__(self, dsn: str, channel: str = JOB_EVENTS_CHANNEL) -> None:
+        self._dsn = dsn
+        self._channel = channel
+        self._connection: Optional[asyncpg.Connection] = None
+        self._connect_lock = asyncio.Lock()
+        self._subscribers: dict[str, set[asyncio.Queue[dict[str, Any]]]] = {}
+
+    async def ensure_listening(self) -> None:
+        async with self._connect_lock:
+            if self._connection is not None and not self._connection.is_closed():
+                return
+            try:
+                connection = await asyncpg.connect(self._dsn)
+                connection.add_termination_listener(self._on_terminated)
+                await connection.add_listener(self._channel, self._on_notification)
+            except Exception:
+                logger.warning("No se pudo escuchar %s; los eventos de jobs se leen de la base", self._channel)
+                return
+            self._connection = connection
+
+    async def subscribe(self, job_id: str) -> asyncio.Queue[dict[str, Any]]:
+        events: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(job_id, set()).add(events)
+        await self.ensure_listening()
+        return events
+
+    def unsubscribe(self, job_id: str, events: asyncio.Queue[dict[str, Any]]) -> None:
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is None:
+            return
+        subscribers.discard(events)
+        if not subscribers:
+            del self._subscribers[job_id]
+
+    async def close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            await connection.close()
+
+    def _on_terminated(self, connection: asyncpg.Connection) -> None:
+        if self._connection is connection:
+            self._connection = None
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+            job_id = event["job_id"]
+        except (ValueError, KeyError, TypeError):
+            return
+        for events in self._subscribers.get(job_id, ()):
+            if events.full():
+                events.get_nowait()
+            events.put_nowait(event)
@@ -1,14 +1,30 @@
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Header, Form, status
-from app.database import engine, Base
-from sqlalchemy.orm import Session
-from fastapi.responses import HTMLResponse
-from app.database import get_db
-from app.import_jobs import create_deudores_job, create_padron_job, get_job_status_payload, mark_incomplete_jobs_as_failed
-from app.models import Deudor, ImportJob, Padron
-from app.settings import get_secret
-from sqlalchemy import and_, func
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Request, status
+from app.database import engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, StreamingResponse
+from app.database import LISTEN_DATABASE_DSN, AsyncSessionLocal, get_async_db
+from app.cache import DataGenerationTracker, ResultCache
+from app.cuit_filters import FILTER_DEUDORES, FILTER_PADRON, CuitFilterReader
+from app.job_events import JobEventBroker
+from app.import_jobs import IMPORT_WORKERS_IN_API, JOB_TYPE_DEUDORES, JOB_TYPE_PADRON, UPLOAD_FILES_BY_JOB_TYPE, ReceivedUpload, create_deudores_job, create_padron_job, create_upload_session, delete_upload_session, finalize_upload_session, get_job_status_payload, get_upload_session_payload, receive_upload, receive_upload_chunk, request_shutdown, start_import_workers
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator, Callable, Optional
+from app.models import Deudor, DeudorResumen, Entidad, ImportJob, Padron, create_tables, deudores_compactos, deudores_is_compact, dni_expression, name_search_available, period_expression, period_from_index, period_index
+from app.settings import get_int_setting, get_secret
+from app.snapshots import SNAPSHOT_DEUDORES, SNAPSHOT_PADRON, SnapshotReader, unpack_deudor, unpack_padron
+from pydantic import BaseModel
+from sqlalchemy import Float, Integer, String, and_, any_, bindparam, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import json
 import time
 import logging
+from functools import lru_cache
 # from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger('uvicorn.error')
@@ -17,25 +33,73 @@ logger.setLevel(logging.DEBUG)
 app = FastAPI()
 
 # Crear las tablas en la base de datos
-print("Creando tablas...", flush=True)  # Debugging
-Base.metadata.create_all(bind=engine)
-mark_incomplete_jobs_as_failed()
-print("Tablas creadas", flush=True)
+logger.info("Creando tablas...")
+create_tables(engine)
+# Con un servicio worker aparte (IMPORT_WORKERS_IN_API=0) la API solo encola los jobs.
+if IMPORT_WORKERS_IN_API:
+    start_import_workers()
+logger.info("Tablas creadas")
+# deudores con el esquema compacto (DEUDORES_COMPACT_SCHEMA) guarda el CUIT como BIGINT y no tiene nombre_entidad.
+DEUDORES_COMPACTO = deudores_is_compact(engine)
+# La búsqueda por nombre necesita pg_trgm y unaccent en el servidor; las prepara python -m app.import_jobs migrar.
+BUSQUEDA_POR_NOMBRE = name_search_available(engine)
+if not BUSQUEDA_POR_NOMBRE:
+    logger.warning("Sin normalizar_nombre (falta migrar o pg_trgm y unaccent): /padron/nombre queda deshabilitado")
 
 # Define el token único que será usado para autenticar
 SECRET_TOKEN = get_secret("SECRET_TOKEN")
-PREFIJOS_CUIL = [
-    "01", "02", "03", "04", "05", "06", "07", "08", "09", "10",
-    "11", "12", "13", "14", "15", "16", "17", "18", "19", "20",
-    "21", "22", "23", "24", "25", "26", "27", "28", "29", "30",
-    "31", "32", "33", "34", "35", "36", "37", "38", "39", "40",
-    "41", "42", "43", "44", "45", "46", "47", "48", "49", "50",
-    "51", "52", "53", "54", "55", "56", "57", "58", "59", "60",
-    "61", "62", "63", "64", "65", "66", "67", "68", "69", "70",
-    "71", "72", "73", "74", "75", "76", "77", "78", "79", "80",
-    "81", "82", "83", "84", "85", "86", "87", "88", "89", "90",
-    "91", "92", "93", "94", "95", "96", "97", "98", "99"
-]
+MAX_IDENTIFICACIONES_BATCH = get_int_setting("DEUDORES_BATCH_MAX_IDENTIFICACIONES", 50_000)
+PADRON_NOMBRE_MAX_LIMIT = get_int_setting("PADRON_NOMBRE_MAX_LIMIT", 500)
+DEUDOR_HISTORIAL_MAX_MESES = get_int_setting("DEUDOR_HISTORIAL_MAX_MESES", 60)
+# Con Accept: application/x-ndjson las consultas se transmiten fila por fila desde un cursor del servidor, que
+# trae NDJSON_FETCH_ROWS filas por vez.
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_FETCH_ROWS = get_int_setting("NDJSON_FETCH_ROWS", 1000)
+NDJSON_BLOCK_BYTES = 64 * 1024
+# Con menos de 3 letras una palabra no tiene trigramas y no puede buscarse por el índice.
+PADRON_NOMBRE_MIN_LETRAS = 3
+
+# Cache de resultados por proceso. Se vacía cuando otro job de importación del mismo tipo termina.
+CACHE_TTL_SECONDS = get_int_setting("CACHE_TTL_SECONDS", 3600)
+NO_CACHEADO = object()
+deudores_cache = ResultCache("deudores", get_int_setting("CACHE_DEUDORES_MAX_ENTRIES", 200_000), CACHE_TTL_SECONDS)
+padron_cache = ResultCache("padron", get_int_setting("CACHE_PADRON_MAX_ENTRIES", 100_000), CACHE_TTL_SECONDS)
+generaciones_de_datos = DataGenerationTracker(
+	{JOB_TYPE_DEUDORES: deudores_cache, JOB_TYPE_PADRON: padron_cache},
+	get_int_setting("CACHE_GENERATION_POLL_SECONDS", 5),
+)
+
+# Snapshots mapeados en memoria que escribe cada importación: las consultas por CUIT se resuelven sin PostgreSQL.
+padron_snapshot = SnapshotReader(SNAPSHOT_PADRON)
+deudores_snapshot = SnapshotReader(SNAPSHOT_DEUDORES)
+# Filtros de Bloom con los CUITs que tienen datos: un CUIT que no pasa el filtro es 404 sin consultar la base.
+padron_filtro = CuitFilterReader(FILTER_PADRON)
+deudores_filtro = CuitFilterReader(FILTER_DEUDORES)
+
+# Una conexión LISTEN por proceso reparte los eventos de los jobs entre los clientes de /jobs/{job_id}/events.
+job_events = JobEventBroker(LISTEN_DATABASE_DSN)
+JOB_EVENTS_KEEPALIVE_SECONDS = get_int_setting("JOB_EVENTS_KEEPALIVE_SECONDS", 15)
+ESTADOS_FINALES_JOB = {"completed", "failed"}
+# Vigencia del token de POST /jobs/{job_id}/events/token para abrir el stream; un stream abierto sigue hasta el final.
+JOB_EVENTS_TOKEN_TTL_SECONDS = max(1, get_int_setting("JOB_EVENTS_TOKEN_TTL_SECONDS", 60))
+# Último período cargado en deudores y la generación de datos en la que se leyó.
+ultimo_periodo_deudores = {"generacion": NO_CACHEADO, "periodo": None}
+
+
+class ConsultaBatch(BaseModel):
+	identificaciones: list[str]
+
+
+@app.on_event("shutdown")
+def detener_importaciones():
+	# Los jobs en curso quedan con su checkpoint para retomarse al reiniciar, en lugar de marcarse fallidos.
+	request_shutdown()
+
+
+@app.on_event("shutdown")
+async def cerrar_eventos_de_jobs():
+	await job_events.close()
+
 
 @app.get("/")
 async def read_root():
@@ -55,117 +119,576 @@ async def validate_token(token: str):
 
 
 @app.get("/jobs/{job_id}")
-async def get_job_status(job_id: str, x_import_token: str = Header(..., alias="X-Import-Token"), db: Session = Depends(get_db)):
+async def get_job_status(job_id: str, x_import_token: str = Header(..., alias="X-Import-Token"), db: AsyncSession = Depends(get_async_db)):
 	if x_import_token != SECRET_TOKEN:
 		raise HTTPException(status_code=403, detail="Acceso denegado, token inválido")
 
-	job = db.get(ImportJob, job_id)
+	job = await db.get(ImportJob, job_id)
 	if job is None:
 		raise HTTPException(status_code=404, detail="Job no encontrado")
 
 	return get_job_status_payload(job)
 
+
+async def leer_estado_job(job_id: str) -> Optional[dict]:
+	async with AsyncSessionLocal() as db:
+		job = await db.get(ImportJob, job_id)
+		return None if job is None else get_job_status_payload(job)
+
+
+def formatear_evento_job(estado: dict) -> str:
+	return "event: job\ndata: " + json.dumps(estado, ensure_ascii=False) + "\n\n"
+
+
+def firmar_token_eventos(job_id: str, vence: int) -> str:
+	mensaje = f"job-events:{job_id}:{vence}".encode("utf-8")
+	return hmac.new(SECRET_TOKEN.encode("utf-8"), mensaje, hashlib.sha256).hexdigest()
+
+
+def crear_token_eventos(job_id: str) -> str:
+	vence = int(time.time()) + JOB_EVENTS_TOKEN_TTL_SECONDS
+	return f"{vence}.{firmar_token_eventos(job_id, vence)}"
+
+
+def token_eventos_valido(job_id: str, token: str) -> bool:
+	vence, _, firma = token.partition(".")
+	if not vence.isascii() or not vence.isdigit() or int(vence) < time.time():
+		return False
+	return hmac.compare_digest(firma.encode("utf-8"), firmar_token_eventos(job_id, int(vence)).encode("utf-8"))
+
+
+@app.post("/jobs/{job_id}/events/token")
+async def create_job_events_token(job_id: str, x_import_token: str = Header(..., alias="X-Import-Token"), db: AsyncSession = Depends(get_async_db)):
+	if x_import_token != SECRET_TOKEN:
+		raise HTTPException(status_code=403, detail="Acceso denegado, token inválido")
+
+	if await db.get(ImportJob, job_id) is None:
+		raise HTTPException(status_code=404, detail="Job no encontrado")
+
+	return {"token": crear_token_eventos(job_id), "expires_in": JOB_EVENTS_TOKEN_TTL_SECONDS}
+
+
+@app.get("/jobs/{job_id}/events")
+async def get_job_events(
+	job_id: str,
+	token: Optional[str] = None,
+	x_import_token: Optional[str] = Header(None, alias="X-Import-Token"),
+):
+	# Con X-Import-Token vale SECRET_TOKEN; en la URL, que EventSource necesita porque no manda headers propios,
+	# solo se acepta el token de POST /jobs/{job_id}/events/token, para no dejar SECRET_TOKEN en logs e historial.
+	if x_import_token is not None:
+		autorizado = x_import_token == SECRET_TOKEN
+	else:
+		autorizado = token is not None and token_eventos_valido(job_id, token)
+	if not autorizado:
+		raise HTTPException(status_code=403, detail="Acceso denegado, token inválido")
+
+	# La suscripción va antes de leer el estado inicial para no perder un evento entre ambos.
+	eventos = await job_events.subscribe(job_id)
+	estado_inicial = await leer_estado_job(job_id)
+	if estado_inicial is None:
+		job_events.unsubscribe(job_id, eventos)
+		raise HTTPException(status_code=404, detail="Job no encontrado")
+
+	async def transmitir():
+		estado = estado_inicial
+		try:
+			yield formatear_evento_job(estado)
+			while estado["status"] not in ESTADOS_FINALES_JOB:
+				try:
+					evento = await asyncio.wait_for(eventos.get(), JOB_EVENTS_KEEPALIVE_SECONDS)
+				except asyncio.TimeoutError:
+					# Sin notificaciones en el intervalo: se relee el job por si se cortó la conexión LISTEN,
+					# y el comentario mantiene abierta la conexión a través del proxy.
+					await job_events.ensure_listening()
+					evento = await leer_estado_job(job_id)
+					if evento is None:
+						return
+					if evento == estado:
+						yield ": keepalive\n\n"
+						continue
+				else:
+					if "status" not in evento:
+						# El evento superó el tamaño de pg_notify y llegó solo con el job_id.
+						evento = await leer_estado_job(job_id)
+						if evento is None:
+							return
+					if evento == estado:
+						continue
+				estado = evento
+				yield formatear_evento_job(estado)
+		finally:
+			job_events.unsubscribe(job_id, eventos)
+
+	return StreamingResponse(
+		transmitir(),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
+
+
+@app.get("/stats")
+async def get_stats(x_import_token: str = Header(..., alias="X-Import-Token")):
+	if x_import_token != SECRET_TOKEN:
+		raise HTTPException(status_code=403, detail="Acceso denegado, token inválido")
+
+	return {
+		"cache": {
+			"deudores": deudores_cache.stats(),
+			"padron": padron_cache.stats(),
+		},
+		"snapshots": {
+			"deudores": deudores_snapshot.stats(),
+			"padron": padron_snapshot.stats(),
+		},
+		"cuit_filters": {
+			"deudores": deudores_filtro.stats(),
+			"padron": padron_filtro.stats(),
+		},
+	}
+
 # *********************************************
 # Consultas por API
 # *********************************************
 
 @app.get("/deudor/{numero_identificacion}")
-async def get_deudor_info(numero_identificacion: str, db: Session = Depends(get_db)):
+async def get_deudor_info(numero_identificacion: str, request: Request, db: AsyncSession = Depends(get_async_db)):
 	logger.info(f"Buscando deudor con identificación {numero_identificacion}")
 
-	if len(numero_identificacion) != 11:
-		raise HTTPException(status_code=400, detail="Número de identificación inválido. Debe tener 11 dígitos (CUIL/CUIT).")
+	# Último período y totales por situación salen del resumen precalculado por la importación
+	deudor = await buscar_deudor(db, numero_identificacion)
 
-	posibles_cuits = [numero_identificacion]
+	if deudor is None:
+		raise HTTPException(status_code=404, detail="Deudor no encontrado o sin registros recientes")
+
+	logger.info(f"Fecha más reciente: {deudor.fecha_informacion}, deudas encontradas: {len(deudor.situaciones)}")
 
-	# Obtener la fecha más reciente de información para el deudor
-	max_fecha = db.query(func.max(Deudor.fecha_informacion)).filter(
-		Deudor.numero_identificacion.in_(posibles_cuits)
-	).scalar()
-	logger.info(f"Fecha más reciente: {max_fecha}")
+	# Formar la respuesta con todas las deudas del deudor en la fecha más reciente
+	if pide_ndjson(request):
+		return respuesta_ndjson(filas_en_memoria([armar_respuesta_deudor(deudor)]))
+	return armar_respuesta_deudor(deudor)
 
-	if not max_fecha:
+@app.get("/deudor/{numero_identificacion}/peor_situacion")
+async def get_peor_situacion(numero_identificacion: str, db: AsyncSession = Depends(get_async_db)):
+	logger.info(f"Buscando peor situación para identificación {numero_identificacion}")
+
+	# Se valida antes del filtro y del snapshot para responder 400, y no 404, a lo que no es DNI ni CUIT
+	if not es_dni(numero_identificacion) and not es_cuit(numero_identificacion):
+		raise HTTPException(status_code=400, detail="Número de identificación inválido. Debe tener 11 dígitos (CUIL/CUIT) u 8 (DNI).")
+
+	if deudores_filtro.is_absent(numero_identificacion):
 		raise HTTPException(status_code=404, detail="Deudor no encontrado o sin registros recientes")
 
-	# Obtener todas las entradas que coincidan con la fecha más reciente y el número de identificación
-	deudas = db.query(Deudor).filter(
-		Deudor.numero_identificacion.in_(posibles_cuits),
-		Deudor.fecha_informacion == max_fecha
-	).all()
-	logger.info(f"Deudas encontradas: {len(deudas)}")
+	# Con snapshot, un CUIT se resuelve en memoria; sin registro en el snapshot tampoco lo hay en el resumen
+	registros = deudores_snapshot.lookup(numero_identificacion)
+	if registros is not None:
+		if not registros:
+			deudores_filtro.record_misses([numero_identificacion])
+			raise HTTPException(status_code=404, detail="Deudor no encontrado o sin registros recientes")
+		return unpack_deudor(registros[0])
 
-	# Si no se encuentran deudas
-	if not deudas:
-		raise HTTPException(status_code=404, detail="No se encontraron registros para la fecha más reciente")
+	# Obtener la peor situación del deudor en su fecha más reciente
+	deudor = await buscar_deudor(db, numero_identificacion, solo_peor_situacion=True)
+
+	if deudor is None:
+		raise HTTPException(status_code=404, detail="Deudor no encontrado o sin registros recientes")
+
+	logger.info(f"Fecha más reciente: {deudor.fecha_informacion}")
 
-	# Formar la respuesta con todas las deudas del deudor en la fecha más reciente
 	return {
-		"numero_identificacion": deudas[0].numero_identificacion,
-		"fecha_informacion": max_fecha,
-		"monto_situacion_1": sum(deuda.prestamos_total_garantias for deuda in deudas if deuda.situacion == 1),
-		"monto_situacion_2": sum(deuda.prestamos_total_garantias for deuda in deudas if deuda.situacion == 2),
-		"monto_situacion_3": sum(deuda.prestamos_total_garantias for deuda in deudas if deuda.situacion == 3),
-		"monto_situacion_4": sum(deuda.prestamos_total_garantias for deuda in deudas if deuda.situacion == 4),
-		"monto_situacion_5": sum(deuda.prestamos_total_garantias for deuda in deudas if deuda.situacion == 5),
-		"deudas": [
-			{
-				"situacion": deuda.situacion,
-				"monto": deuda.prestamos_total_garantias,
-				"banco": deuda.nombre_entidad
-			}
-			for deuda in deudas
-		]
+		"numero_identificacion": deudor.numero_identificacion,
+		"fecha_informacion": deudor.fecha_informacion,
+		"peor_situacion": deudor.peor_situacion
 	}
 
-@app.get("/deudor/{numero_identificacion}/peor_situacion")
-async def get_peor_situacion(numero_identificacion: str, db: Session = Depends(get_db)):
-	logger.info(f"Buscando peor situación para identificación {numero_identificacion}")
+@app.get("/deudor/{numero_identificacion}/historial")
+async def get_historial_deudor(
+	numero_identificacion: str,
+	meses: int = Query(24, ge=1, le=DEUDOR_HISTORIAL_MAX_MESES),
+	db: AsyncSession = Depends(get_async_db),
+):
+	logger.info(f"Buscando historial de {meses} meses para identificación {numero_identificacion}")
 
-	if len(numero_identificacion) != 11:
-		raise HTTPException(status_code=400, detail="Número de identificación inválido. Debe tener 11 dígitos (CUIL/CUIT).")
+	# Un DNI se resuelve al CUIT con información más reciente, igual que en /deudor/{numero_identificacion}
+	if es_dni(numero_identificacion):
+		deudor = await buscar_deudor(db, numero_identificacion, solo_peor_situacion=True)
+		cuit = deudor.numero_identificacion if deudor is not None else None
+	elif es_cuit(numero_identificacion):
+		cuit = None if deudores_filtro.is_absent(numero_identificacion) else numero_identificacion
+	else:
+		raise HTTPException(status_code=400, detail="Número de identificación inválido. Debe tener 11 dígitos (CUIL/CUIT) u 8 (DNI).")
 
-	posibles_cuits = [numero_identificacion]
+	historial = await buscar_historial(db, cuit, meses) if cuit is not None else None
+	if historial is None:
+		raise HTTPException(status_code=404, detail="Deudor sin registros en el período consultado")
 
-	logger.info(f"Posibles CUITs: {posibles_cuits}")
+	return historial
 
-	# Obtener la fecha más reciente de información para el deudor
-	max_fecha = db.query(func.max(Deudor.fecha_informacion)).filter(
-		Deudor.numero_identificacion.in_(posibles_cuits)
-	).scalar()
-	logger.info(f"Fecha más reciente: {max_fecha}")
+@app.post("/deudores/batch")
+async def get_deudores_batch(consulta: ConsultaBatch, request: Request, db: AsyncSession = Depends(get_async_db)):
+	identificaciones, invalidas = validar_identificaciones_batch(consulta.identificaciones)
+	logger.info(f"Consulta batch de {len(identificaciones)} deudores")
 
-	if not max_fecha:
-		raise HTTPException(status_code=404, detail="Deudor no encontrado o sin registros recientes")
+	if pide_ndjson(request):
+		await generaciones_de_datos.refresh(db)
+		return respuesta_ndjson(lineas_batch_deudores(identificaciones, invalidas, armar_respuesta_deudor))
+
+	filas = await buscar_deudores(db, identificaciones)
+	encontrados = {cuit: armar_respuesta_deudor(fila) for cuit, fila in filas.items()}
+
+	return {
+		"resultados": [encontrados[cuit] for cuit in identificaciones if cuit in encontrados],
+		"no_encontrados": [cuit for cuit in identificaciones if cuit not in encontrados],
+		"invalidos": invalidas,
+	}
 
-	# Obtener la peor situación del deudor en la fecha más reciente
-	peor_situacion = db.query(func.max(Deudor.situacion)).filter(
-		Deudor.numero_identificacion.in_(posibles_cuits),
-		Deudor.fecha_informacion == max_fecha
-	).scalar()
+@app.post("/deudores/batch/peor_situacion")
+async def get_peor_situacion_batch(consulta: ConsultaBatch, request: Request, db: AsyncSession = Depends(get_async_db)):
+	identificaciones, invalidas = validar_identificaciones_batch(consulta.identificaciones)
+	logger.info(f"Consulta batch de peor situación para {len(identificaciones)} deudores")
 
-	if peor_situacion is None:
-		raise HTTPException(status_code=404, detail="No se encontró información de situación para el deudor")
+	if pide_ndjson(request):
+		await generaciones_de_datos.refresh(db)
+		return respuesta_ndjson(
+			lineas_batch_deudores(identificaciones, invalidas, armar_peor_situacion, solo_peor_situacion=True)
+		)
+
+	filas = await buscar_deudores(db, identificaciones, solo_peor_situacion=True)
+	encontrados = {cuit: armar_peor_situacion(fila) for cuit, fila in filas.items()}
 
 	return {
-		"numero_identificacion": numero_identificacion,
-		"fecha_informacion": max_fecha,
-		"peor_situacion": peor_situacion
+		"resultados": [encontrados[cuit] for cuit in identificaciones if cuit in encontrados],
+		"no_encontrados": [cuit for cuit in identificaciones if cuit not in encontrados],
+		"invalidos": invalidas,
 	}
 
 # *********************************************
 # Funciones auxiliares
 # *********************************************
 
-def calcular_digito_verificador(cuit_base: str) -> str:
-	# Pesos para el cálculo del dígito verificador
-	pesos = [5, 4, 3, 2, 7, 6, 5, 4, 3, 2]
-	acumulador = sum(int(digito) * peso for digito, peso in zip(cuit_base, pesos))
-	verificador = 11 - (acumulador % 11)
-	if verificador == 11:
-		verificador = 0
-	elif verificador == 10:
-		verificador = 9  # Ajuste común en algunos sistemas para casos donde el verificador resulta en 10
-	return str(verificador)
+def validar_token_de_subida(x_import_token: Optional[str], upload: Optional[ReceivedUpload] = None) -> None:
+	if upload is None:
+		if x_import_token is not None and x_import_token != SECRET_TOKEN:
+			raise HTTPException(status_code=403, detail="Acceso denegado, token inválido")
+		return
+
+	token = x_import_token if x_import_token is not None else upload.fields.get("token")
+	if token != SECRET_TOKEN:
+		upload.discard()
+		raise HTTPException(status_code=403, detail="Acceso denegado, token inválido")
+
+def validar_identificaciones_batch(identificaciones: list[str]) -> tuple[list[str], list[str]]:
+	if len(identificaciones) > MAX_IDENTIFICACIONES_BATCH:
+		raise HTTPException(
+			status_code=400,
+			detail=f"Se pueden consultar hasta {MAX_IDENTIFICACIONES_BATCH} identificaciones por request."
+		)
+
+	# Se descartan duplicados conservando el orden de la consulta
+	validas = []
+	invalidas = []
+	vistas = set()
+	for identificacion in identificaciones:
+		if identificacion in vistas:
+			continue
+		vistas.add(identificacion)
+		if es_cuit(identificacion):
+			validas.append(identificacion)
+		else:
+			invalidas.append(identificacion)
+	return validas, invalidas
+
+# isascii además de isdigit: str.isdigit acepta dígitos Unicode como "²" que int() rechaza.
+def es_dni(identificacion: str) -> bool:
+	return len(identificacion) == 8 and identificacion.isascii() and identificacion.isdigit()
+
+def es_cuit(identificacion: str) -> bool:
+	return len(identificacion) == 11 and identificacion.isascii() and identificacion.isdigit()
+
+async def buscar_deudor(db: AsyncSession, identificacion: str, solo_peor_situacion: bool = False):
+	# Acepta un CUIT/CUIL o un DNI. Si el DNI corresponde a más de un CUIT se devuelve el de información más reciente.
+	if es_dni(identificacion):
+		cuits = await buscar_cuits_por_dni(db, identificacion)
+	elif es_cuit(identificacion):
+		cuits = [identificacion]
+	else:
+		raise HTTPException(status_code=400, detail="Número de identificación inválido. Debe tener 11 dígitos (CUIL/CUIT) u 8 (DNI).")
+
+	encontrados = await buscar_deudores(db, cuits, solo_peor_situacion)
+	filas = [encontrados[cuit] for cuit in cuits if cuit in encontrados]
+	if not filas:
+		return None
+	return max(filas, key=lambda fila: fila.fecha_informacion)
+
+async def buscar_cuits_por_dni(db: AsyncSession, dni: str) -> list[str]:
+	await generaciones_de_datos.refresh(db)
+	cuits = deudores_cache.get(("dni", dni), NO_CACHEADO)
+	if cuits is NO_CACHEADO:
+		# Una búsqueda en el índice por DNI de deudores_resumen, que tiene todos los CUITs con deudas.
+		cuits = list((await db.scalars(consulta_cuits_por_dni(), {"dni": dni})).all())
+		deudores_cache.set(("dni", dni), cuits)
+	return cuits
+
+@lru_cache(maxsize=None)
+def consulta_cuits_por_dni():
+	# La condición repite la expresión del índice idx_deudores_resumen_dni; si difiere, PostgreSQL no lo usa.
+	return (
+		select(DeudorResumen.numero_identificacion)
+		.where(literal_column(dni_expression("deudores_resumen.numero_identificacion")) == bindparam("dni"))
+		.order_by(DeudorResumen.numero_identificacion)
+	)
+
+async def buscar_deudores(db: AsyncSession, identificaciones: list[str], solo_peor_situacion: bool = False) -> dict:
+	# Los CUITs que el filtro descarta no tienen deudas: no se buscan en el cache ni en la base
+	identificaciones = [cuit for cuit in identificaciones if not deudores_filtro.is_absent(cuit)]
+	if not identificaciones:
+		return {}
+
+	await generaciones_de_datos.refresh(db)
+	encontrados = {}
+	pendientes = []
+	for cuit in identificaciones:
+		fila = deudores_cache.get((solo_peor_situacion, cuit), NO_CACHEADO)
+		if fila is NO_CACHEADO:
+			pendientes.append(cuit)
+		elif fila is not None:
+			encontrados[cuit] = fila
+
+	if not pendientes:
+		return encontrados
+
+	# Una búsqueda por clave primaria en deudores_resumen: cada importación lo actualiza con todos los CUITs de
+	# su período, así que un CUIT que no está ahí no tiene deudas.
+	filas = (await db.execute(
+		consulta_resumen(solo_peor_situacion),
+		{"identificaciones": pendientes},
+	)).all()
+	nuevos = {fila.numero_identificacion: fila for fila in filas}
+
+	# También se guardan los CUITs sin deudas para no volver a consultarlos hasta la próxima importación
+	for cuit in pendientes:
+		deudores_cache.set((solo_peor_situacion, cuit), nuevos.get(cuit))
+	deudores_filtro.record_misses(cuit for cuit in pendientes if cuit not in nuevos)
+	encontrados.update(nuevos)
+	return encontrados
+
+async def buscar_deudores_en_streaming(identificaciones: list[str], solo_peor_situacion: bool = False) -> AsyncIterator:
+	# Igual que buscar_deudores, pero entrega cada deudor apenas lo lee del cursor en lugar de juntarlos en un
+	# dict. Quien lo llama debe refrescar antes generaciones_de_datos.
+	pendientes = []
+	for cuit in identificaciones:
+		if deudores_filtro.is_absent(cuit):
+			continue
+		fila = deudores_cache.get((solo_peor_situacion, cuit), NO_CACHEADO)
+		if fila is NO_CACHEADO:
+			pendientes.append(cuit)
+		elif fila is not None:
+			yield fila
+
+	faltantes = set(pendientes)
+	if faltantes:
+		async for fila in filas_en_streaming(consulta_resumen(solo_peor_situacion), {"identificaciones": pendientes}):
+			faltantes.discard(fila.numero_identificacion)
+			deudores_cache.set((solo_peor_situacion, fila.numero_identificacion), fila)
+			yield fila
+
+	for cuit in faltantes:
+		deudores_cache.set((solo_peor_situacion, cuit), None)
+	deudores_filtro.record_misses(faltantes)
+
+async def lineas_batch_deudores(
+	identificaciones: list[str],
+	invalidas: list[str],
+	formatear: Callable,
+	solo_peor_situacion: bool = False,
+) -> AsyncIterator[dict]:
+	# Una línea por deudor encontrado, en el orden en que llegan de la base; al final, los no encontrados y los inválidos.
+	encontrados = set()
+	async for fila in buscar_deudores_en_streaming(identificaciones, solo_peor_situacion):
+		encontrados.add(fila.numero_identificacion)
+		yield formatear(fila)
+	for cuit in identificaciones:
+		if cuit not in encontrados:
+			yield {"numero_identificacion": cuit, "no_encontrado": True}
+	for identificacion in invalidas:
+		yield {"numero_identificacion": identificacion, "invalido": True}
+
+async def buscar_historial(db: AsyncSession, cuit: str, meses: int) -> Optional[dict]:
+	await generaciones_de_datos.refresh(db)
+	historial = deudores_cache.get(("historial", cuit, meses), NO_CACHEADO)
+	if historial is not NO_CACHEADO:
+		return historial
+
+	hasta = await buscar_ultimo_periodo(db)
+	historial = None
+	if hasta is not None:
+		desde = restar_meses(hasta, meses - 1)
+		parametros = {"identificacion": cuit, "desde": desde}
+		if DEUDORES_COMPACTO:
+			parametros = {"identificacion": int(cuit), "desde": period_index(desde)}
+		filas = (await db.execute(consulta_historial(DEUDORES_COMPACTO), parametros)).all()
+		if filas:
+			historial = armar_historial(cuit, meses, desde, hasta, filas)
+	deudores_cache.set(("historial", cuit, meses), historial)
+	return historial
+
+async def buscar_ultimo_periodo(db: AsyncSession) -> Optional[str]:
+	# La ventana del historial termina en el último período cargado, no en el último del CUIT. Se lee de nuevo
+	# solo cuando termina otra importación de deudores; quien lo llama debe refrescar antes generaciones_de_datos.
+	generacion = generaciones_de_datos.generation(JOB_TYPE_DEUDORES)
+	if ultimo_periodo_deudores["generacion"] != generacion:
+		periodo = await db.scalar(select(func.max(DeudorResumen.fecha_informacion)))
+		if periodo is None:
+			deudores = deudores_compactos if DEUDORES_COMPACTO else Deudor.__table__
+			periodo = await db.scalar(select(func.max(deudores.c.fecha_informacion)))
+			if DEUDORES_COMPACTO and periodo is not None:
+				periodo = period_from_index(periodo)
+		ultimo_periodo_deudores.update(generacion=generacion, periodo=str(periodo) if periodo is not None else None)
+	return ultimo_periodo_deudores["periodo"]
+
+def restar_meses(periodo: str, meses: int) -> str:
+	indice = int(periodo[:4]) * 12 + int(periodo[4:]) - 1 - meses
+	return f"{indice // 12:04d}{indice % 12 + 1:02d}"
+
+@lru_cache(maxsize=None)
+def consulta_historial(compacto: bool = False):
+	# Un solo rango de idx_deudores_historial en cada partición de la ventana: el CUIT y los períodos desde
+	# "desde". Las columnas están incluidas en el índice y el nombre del banco sale de entidades.
+	deudores = deudores_compactos if compacto else Deudor.__table__
+	# El esquema compacto guarda el período como índice de mes; la respuesta lo devuelve como AAAAMM.
+	fecha_informacion = literal_column(period_expression("deudores.fecha_informacion"), String) if compacto else deudores.c.fecha_informacion
+	return (
+		select(
+			fecha_informacion.label("fecha_informacion"),
+			deudores.c.codigo_entidad,
+			func.coalesce(Entidad.nombre_entidad, "Desconocida").label("banco"),
+			deudores.c.situacion,
+			deudores.c.prestamos_total_garantias.label("monto"),
+		)
+		.select_from(deudores.outerjoin(Entidad, Entidad.codigo_entidad == deudores.c.codigo_entidad))
+		.where(
+			deudores.c.numero_identificacion == bindparam("identificacion"),
+			deudores.c.fecha_informacion >= bindparam("desde"),
+		)
+		.order_by(deudores.c.fecha_informacion.desc(), deudores.c.codigo_entidad)
+	)
+
+def armar_historial(cuit: str, meses: int, desde: str, hasta: str, filas) -> dict:
+	periodos = []
+	for fila in filas:
+		if not periodos or periodos[-1]["fecha_informacion"] != fila.fecha_informacion:
+			periodos.append({"fecha_informacion": fila.fecha_informacion, "peor_situacion": fila.situacion, "deudas": []})
+		periodo = periodos[-1]
+		periodo["peor_situacion"] = max(periodo["peor_situacion"], fila.situacion)
+		periodo["deudas"].append({
+			"codigo_entidad": fila.codigo_entidad,
+			"banco": fila.banco,
+			"situacion": fila.situacion,
+			"monto": fila.monto
+		})
+	return {
+		"numero_identificacion": cuit,
+		"meses": meses,
+		"desde": desde,
+		"hasta": hasta,
+		"peor_situacion": max(periodo["peor_situacion"] for periodo in periodos),
+		"periodos": periodos
+	}
+
+@lru_cache(maxsize=None)
+def consulta_resumen(solo_peor_situacion: bool = False):
+	if solo_peor_situacion:
+		columnas = [DeudorResumen.numero_identificacion, DeudorResumen.fecha_informacion, DeudorResumen.peor_situacion]
+	else:
+		columnas = list(DeudorResumen.__table__.columns)
+
+	return select(*columnas).where(
+		DeudorResumen.numero_identificacion == any_(bindparam("identificaciones", type_=ARRAY(String)))
+	)
+
+def formatear_padron(registro: Padron) -> dict:
+	return {
+		"id": registro.id,
+		"identificacion": registro.identificacion,
+		"denominacion": registro.denominacion,
+		"actividad": registro.actividad,
+		"marca_baja": registro.marca_baja,
+		"cuit_reemplazo": registro.cuit_reemplazo,
+		"fallecimiento": registro.fallecimiento
+	}
+
+def armar_peor_situacion(fila) -> dict:
+	return {
+		"numero_identificacion": fila.numero_identificacion,
+		"fecha_informacion": fila.fecha_informacion,
+		"peor_situacion": fila.peor_situacion
+	}
+
+def pide_ndjson(request: Request) -> bool:
+	return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def respuesta_ndjson(filas: AsyncIterator[dict]) -> StreamingResponse:
+	async def lineas():
+		# Las líneas se envían en bloques de hasta NDJSON_BLOCK_BYTES: un envío por fila multiplica el costo
+		# de cada escritura en el socket.
+		bloque = []
+		tamaño = 0
+		async for fila in filas:
+			# jsonable_encoder solo para lo que json no sabe serializar (Decimal), como en las respuestas JSON
+			linea = json.dumps(fila, ensure_ascii=False, default=jsonable_encoder) + "\n"
+			bloque.append(linea)
+			tamaño += len(linea)
+			if tamaño >= NDJSON_BLOCK_BYTES:
+				yield "".join(bloque)
+				bloque = []
+				tamaño = 0
+		if bloque:
+			yield "".join(bloque)
+
+	return StreamingResponse(lineas(), media_type=NDJSON_MEDIA_TYPE)
+
+async def filas_en_streaming(consulta, parametros: dict) -> AsyncIterator:
+	# Cursor del lado del servidor con su propia sesión: la respuesta sigue leyendo filas después de que el
+	# endpoint devolvió el StreamingResponse, y la memoria no depende de cuántas filas haya.
+	async with AsyncSessionLocal() as db:
+		resultado = await db.stream(consulta.execution_options(yield_per=NDJSON_FETCH_ROWS), parametros)
+		async for fila in resultado:
+			yield fila
+
+async def filas_en_memoria(filas: list) -> AsyncIterator:
+	for fila in filas:
+		yield fila
+
+async def con_primera_fila(filas: AsyncIterator) -> Optional[AsyncIterator]:
+	# Devuelve None si filas no tiene ninguna; si no, un iterador con todas, empezando por la que ya se leyó
+	primera = await anext(filas, None)
+	if primera is None:
+		return None
+
+	async def todas():
+		yield primera
+		async for fila in filas:
+			yield fila
+
+	return todas()
+
+def armar_respuesta_deudor(fila) -> dict:
+	respuesta = {
+		"numero_identificacion": fila.numero_identificacion,
+		"fecha_informacion": fila.fecha_informacion,
+	}
+	for situacion in range(1, 6):
+		monto = getattr(fila, f"monto_situacion_{situacion}")
+		respuesta[f"monto_situacion_{situacion}"] = monto if monto is not None else 0
+	respuesta["deudas"] = [
+		{
+			"situacion": situacion,
+			"monto": monto,
+			"banco": banco
+		}
+		for situacion, monto, banco in zip(fila.situaciones, fila.montos, fila.bancos)
+	]
+	return respuesta
 
 # *********************************************
 # Carga de archivos
@@ -303,8 +826,8 @@ async def get_upload_form():
                 <h3>Subir archivos de deudores y entidades</h3>
                 <p class="helper">La carga se ejecuta en background. Cuando termine la subida, el servidor crea un job y podés seguir el progreso sin dejar la request del navegador abierta.</p>
                 <form id="upload-form" action="/deudores/upload/" enctype="multipart/form-data" method="post">
-                    <label for="deudores">Archivo Deudores (.zip):</label>
-                    <input type="file" id="deudores" name="deudores" accept=".zip" required>
+                    <label for="deudores">Archivo Deudores (.zip, .7z, .gz o .zst):</label>
+                    <input type="file" id="deudores" name="deudores" accept=".zip,.7z,.gz,.zst" required>
 
                     <label for="entidades">Archivo Entidades:</label>
                     <input type="file" id="entidades" name="entidades" required>
@@ -383,6 +906,36 @@ async def get_upload_form():
                     }
                 }
 
+                function showJobState(data) {
+                    progressLabel.textContent = "Procesamiento";
+                    setProgress(data.progress_percent || 0);
+                    let meta = "Job: " + data.job_id + " | Etapa: " + data.stage + " | Filas: " + (data.processed_rows || 0).toLocaleString("es-AR");
+                    if (data.rows_per_second) {
+                        meta += " | " + Math.round(data.rows_per_second).toLocaleString("es-AR") + " filas/s";
+                    }
+                    if (data.status === "running" && data.eta_seconds) {
+                        meta += " | Restan ~" + Math.ceil(data.eta_seconds).toLocaleString("es-AR") + " s";
+                    }
+                    setJobMeta(meta);
+
+                    if (data.status === "completed") {
+                        setProgress(100);
+                        setMessage(data.message || "Archivos procesados correctamente.", "success");
+                        toggleUploadingState(false);
+                        form.reset();
+                        return true;
+                    }
+
+                    if (data.status === "failed") {
+                        setMessage(data.error || data.message || "El job falló durante el procesamiento.", "error");
+                        toggleUploadingState(false);
+                        return true;
+                    }
+
+                    setMessage(data.message || "Procesando archivos en segundo plano...", "info");
+                    return false;
+                }
+
                 async function pollJob(jobId, token) {
                     try {
                         const response = await fetch("/jobs/" + encodeURIComponent(jobId), {
@@ -404,33 +957,174 @@ async def get_upload_form():
                             throw new Error(detail);
                         }
 
-                        const data = await response.json();
-                        progressLabel.textContent = "Procesamiento";
-                        setProgress(data.progress_percent || 0);
-                        setJobMeta("Job: " + data.job_id + " | Etapa: " + data.stage + " | Filas: " + (data.processed_rows || 0).toLocaleString("es-AR"));
-
-                        if (data.status === "completed") {
-                            setProgress(100);
-                            setMessage(data.message || "Archivos procesados correctamente.", "success");
-                            toggleUploadingState(false);
-                            form.reset();
-                            return;
+                        if (!showJobState(await response.json())) {
+                            window.setTimeout(() => pollJob(jobId, token), 2000);
                         }
-
-                        if (data.status === "failed") {
-                            setMessage(data.error || data.message || "El job falló durante el procesamiento.", "error");
-                            toggleUploadingState(false);
-                            return;
-                        }
-
-                        setMessage(data.message || "Procesando archivos en segundo plano...", "info");
-                        window.setTimeout(() => pollJob(jobId, token), 2000);
                     } catch (error) {
                         setMessage((error && error.message) || "Error consultando el estado del job. Reintentando...", "info");
                         window.setTimeout(() => pollJob(jobId, token), 3000);
                     }
                 }
 
+                async function followJob(jobId, token) {
+                    // El servidor empuja cada cambio del job; si el stream se corta se sigue consultando cada 2 segundos.
+                    if (!window.EventSource) {
+                        pollJob(jobId, token);
+                        return;
+                    }
+                    // EventSource no manda headers: la URL lleva un token que solo abre los eventos de este job y vence enseguida.
+                    let eventsToken;
+                    try {
+                        const response = await fetch("/jobs/" + encodeURIComponent(jobId) + "/events/token", {
+                            method: "POST",
+                            cache: "no-store",
+                            headers: {
+                                "X-Import-Token": token
+                            }
+                        });
+                        if (!response.ok) {
+                            throw new Error("No se pudo obtener el token de eventos del job.");
+                        }
+                        eventsToken = (await response.json()).token;
+                    } catch (error) {
+                        console.error(error);
+                        pollJob(jobId, token);
+                        return;
+                    }
+                    const source = new EventSource("/jobs/" + encodeURIComponent(jobId) + "/events?token=" + encodeURIComponent(eventsToken));
+                    let finished = false;
+                    source.addEventListener("job", (event) => {
+                        finished = showJobState(JSON.parse(event.data));
+                        if (finished) {
+                            source.close();
+                        }
+                    });
+                    source.onerror = () => {
+                        source.close();
+                        if (!finished) {
+                            pollJob(jobId, token);
+                        }
+                    };
+                }
+
+                const UPLOAD_PARALLELISM = 4;
+                const UPLOAD_RETRIES = 5;
+
+                function sleep(milliseconds) {
+                    return new Promise((resolve) => window.setTimeout(resolve, milliseconds));
+                }
+
+                async function apiRequest(url, options, token) {
+                    const headers = Object.assign({ "X-Import-Token": token }, options.headers || {});
+                    const response = await fetch(url, Object.assign({ cache: "no-store" }, options, { headers: headers }));
+
+                    if (!response.ok) {
+                        let detail = "Error " + response.status + " durante la subida.";
+                        try {
+                            const data = await response.json();
+                            detail = data.detail || detail;
+                        } catch (error) {
+                            console.error(error);
+                        }
+                        const failure = new Error(detail);
+                        failure.status = response.status;
+                        throw failure;
+                    }
+
+                    return response.status === 204 ? null : response.json();
+                }
+
+                function uploadStorageKey(jobType, files) {
+                    return "upload:" + jobType + ":" + Object.keys(files).map((field) => {
+                        const file = files[field];
+                        return field + "=" + file.name + "/" + file.size + "/" + file.lastModified;
+                    }).join("|");
+                }
+
+                async function openUploadSession(token, jobType, files) {
+                    // Si una subida anterior de los mismos archivos quedó a medias, se retoma desde los bloques ya recibidos.
+                    const storageKey = uploadStorageKey(jobType, files);
+                    const previousId = window.localStorage.getItem(storageKey);
+                    if (previousId) {
+                        try {
+                            const session = await apiRequest("/uploads/" + encodeURIComponent(previousId), { method: "GET" }, token);
+                            if (session.status === "uploading") {
+                                return { storageKey: storageKey, session: session };
+                            }
+                        } catch (error) {
+                            console.error(error);
+                        }
+                        window.localStorage.removeItem(storageKey);
+                    }
+
+                    const declared = {};
+                    Object.keys(files).forEach((field) => {
+                        declared[field] = { filename: files[field].name, size: files[field].size };
+                    });
+                    const session = await apiRequest("/uploads/", {
+                        method: "POST",
+                        headers: { "Content-Type": "application/json" },
+                        body: JSON.stringify({ job_type: jobType, files: declared })
+                    }, token);
+                    window.localStorage.setItem(storageKey, session.upload_id);
+                    return { storageKey: storageKey, session: session };
+                }
+
+                async function putRange(token, uploadId, range) {
+                    for (let attempt = 1; ; attempt++) {
+                        try {
+                            return await apiRequest("/uploads/" + encodeURIComponent(uploadId) + "/" + encodeURIComponent(range.field), {
+                                method: "PUT",
+                                headers: { "Content-Range": "bytes " + range.start + "-" + (range.end - 1) + "/" + range.file.size },
+                                body: range.file.slice(range.start, range.end)
+                            }, token);
+                        } catch (error) {
+                            const retryable = !error.status || error.status >= 500 || error.status === 408 || error.status === 429;
+                            if (!retryable || attempt >= UPLOAD_RETRIES) {
+                                throw error;
+                            }
+                            await sleep(1000 * attempt);
+                        }
+                    }
+                }
+
+                async function uploadResumable(token, jobType, files) {
+                    const opened = await openUploadSession(token, jobType, files);
+                    const session = opened.session;
+                    const pending = [];
+                    let uploaded = 0;
+                    let total = 0;
+
+                    Object.keys(files).forEach((field) => {
+                        const state = session.files[field];
+                        total += state.size;
+                        uploaded += state.received_bytes;
+                        state.missing.forEach((gap) => {
+                            for (let start = gap[0]; start < gap[1]; start += session.chunk_size) {
+                                pending.push({ field: field, file: files[field], start: start, end: Math.min(gap[1], start + session.chunk_size) });
+                            }
+                        });
+                    });
+
+                    const reportProgress = () => setProgress(total ? Math.round((uploaded / total) * 100) : 100);
+                    reportProgress();
+
+                    async function uploadWorker() {
+                        while (pending.length) {
+                            const range = pending.shift();
+                            await putRange(token, session.upload_id, range);
+                            uploaded += range.end - range.start;
+                            reportProgress();
+                        }
+                    }
+
+                    await Promise.all(Array.from({ length: UPLOAD_PARALLELISM }, uploadWorker));
+                    setMessage("Subida completa. Creando job en el servidor...", "info");
+                    const job = await apiRequest("/uploads/" + encodeURIComponent(session.upload_id) + "/finalize", { method: "POST" }, token);
+                    window.localStorage.removeItem(opened.storageKey);
+                    return job;
+                }
+
                 form.addEventListener("submit", async (event) => {
                     event.preventDefault();
                     clearMessage();
@@ -454,8 +1148,8 @@ async def get_upload_form():
                         return;
                     }
 
-                    if (!deudoresFile.name.toLowerCase().endsWith(".zip")) {
-                        setMessage("El archivo de deudores debe ser un .zip válido.", "error");
+                    if (![".zip", ".7z", ".gz", ".zst"].some((extension) => deudoresFile.name.toLowerCase().endsWith(extension))) {
+                        setMessage("El archivo de deudores debe ser un .zip, .7z, .gz o .zst.", "error");
                         return;
                     }
 
@@ -473,63 +1167,30 @@ async def get_upload_form():
                     progressWrapper.classList.add("visible");
                     setMessage("Subiendo archivos...", "info");
 
-                    const xhr = new XMLHttpRequest();
-                    xhr.open("POST", form.action);
-
-                    xhr.upload.addEventListener("progress", (progressEvent) => {
-                        if (!progressEvent.lengthComputable) {
-                            return;
-                        }
-
-                        const percentage = Math.round((progressEvent.loaded / progressEvent.total) * 100);
-                        setProgress(percentage);
-
-                        if (percentage === 100) {
-                            setMessage("Subida completa. Creando job en el servidor...", "info");
-                        }
-                    });
-
-                    xhr.addEventListener("load", () => {
-                        if (xhr.status >= 200 && xhr.status < 300) {
-                            let data = null;
-                            try {
-                                data = JSON.parse(xhr.responseText);
-                            } catch (error) {
-                                console.error(error);
-                            }
-
-                            if (!data || !data.job_id) {
-                                toggleUploadingState(false);
-                                setMessage("La respuesta del servidor no incluyó el job de importación.", "error");
-                                return;
-                            }
-
-                            setProgress(0);
-                            progressLabel.textContent = "Procesamiento";
-                            setMessage(data.message || "Archivos subidos. Procesando en background...", "info");
-                            setJobMeta("Job: " + data.job_id + " | Etapa: " + data.stage);
-                            pollJob(data.job_id, token);
-                            return;
-                        }
-
+                    let data = null;
+                    try {
+                        data = await uploadResumable(token, "deudores", { deudores: deudoresFile, entidades: entidadesFile });
+                    } catch (error) {
                         toggleUploadingState(false);
-
-                        let detail = "Ocurrió un error al cargar los archivos.";
-                        try {
-                            const data = JSON.parse(xhr.responseText);
-                            detail = data.detail || data.message || detail;
-                        } catch (error) {
-                            console.error(error);
+                        if (error && error.status) {
+                            setMessage(error.message, "error");
+                        } else {
+                            setMessage("Error de red durante la carga. Volvé a enviar el formulario para retomar la subida desde donde quedó.", "error");
                         }
-                        setMessage(detail, "error");
-                    });
+                        return;
+                    }
 
-                    xhr.addEventListener("error", () => {
+                    if (!data || !data.job_id) {
                         toggleUploadingState(false);
-                        setMessage("Error de red durante la carga. Revisá la conexión e intentá nuevamente.", "error");
-                    });
+                        setMessage("La respuesta del servidor no incluyó el job de importación.", "error");
+                        return;
+                    }
 
-                    xhr.send(formData);
+                    setProgress(0);
+                    progressLabel.textContent = "Procesamiento";
+                    setMessage(data.message || "Archivos subidos. Procesando en background...", "info");
+                    setJobMeta("Job: " + data.job_id + " | Etapa: " + data.stage);
+                    followJob(data.job_id, token);
                 });
             </script>
         </body>
@@ -539,14 +1200,16 @@ async def get_upload_form():
 
 @app.post("/deudores/upload/", status_code=status.HTTP_202_ACCEPTED)
 async def upload_files(
-    deudores: UploadFile = File(...),
-    entidades: UploadFile = File(...),
-    token: str = Form(...),
+    request: Request,
+    x_import_token: Optional[str] = Header(None, alias="X-Import-Token"),
 ):
-    if token != SECRET_TOKEN:
-        raise HTTPException(status_code=403, detail="Acceso denegado, token inválido")
+    # Con el header el token se valida antes de recibir los archivos; el campo "token" del formulario
+    # sigue aceptándose y se valida al terminar la subida.
+    validar_token_de_subida(x_import_token)
+    upload = await receive_upload(request, UPLOAD_FILES_BY_JOB_TYPE[JOB_TYPE_DEUDORES])
+    validar_token_de_subida(x_import_token, upload)
 
-    job = create_deudores_job(deudores=deudores, entidades=entidades)
+    job = await run_in_threadpool(create_deudores_job, upload)
     return get_job_status_payload(job)
 
 
@@ -685,8 +1348,8 @@ async def get_padron_upload_form():
 				<h3>Subir archivo de Padrón</h3>
 				<p class="helper">La carga se ejecuta en background. El padrón anterior se reemplaza solo cuando el archivo nuevo termina de procesarse correctamente.</p>
 				<form id="upload-form" action="/padron/upload/" enctype="multipart/form-data" method="post">
-					<label for="padron">Archivo Padrón (.zip):</label>
-					<input type="file" id="padron" name="padron" accept=".zip" required>
+					<label for="padron">Archivo Padrón (.zip, .7z, .gz o .zst):</label>
+					<input type="file" id="padron" name="padron" accept=".zip,.7z,.gz,.zst" required>
 
 					<label for="token">Token de seguridad:</label>
 					<input type="text" id="token" name="token" placeholder="Ingresá tu token" required>
@@ -761,6 +1424,36 @@ async def get_padron_upload_form():
 					}
 				}
 
+				function showJobState(data) {
+					progressLabel.textContent = "Procesamiento";
+					setProgress(data.progress_percent || 0);
+					let meta = "Job: " + data.job_id + " | Etapa: " + data.stage + " | Filas: " + (data.processed_rows || 0).toLocaleString("es-AR");
+					if (data.rows_per_second) {
+						meta += " | " + Math.round(data.rows_per_second).toLocaleString("es-AR") + " filas/s";
+					}
+					if (data.status === "running" && data.eta_seconds) {
+						meta += " | Restan ~" + Math.ceil(data.eta_seconds).toLocaleString("es-AR") + " s";
+					}
+					setJobMeta(meta);
+
+					if (data.status === "completed") {
+						setProgress(100);
+						setMessage(data.message || "Archivo procesado correctamente.", "success");
+						toggleUploadingState(false);
+						form.reset();
+						return true;
+					}
+
+					if (data.status === "failed") {
+						setMessage(data.error || data.message || "El job falló durante el procesamiento.", "error");
+						toggleUploadingState(false);
+						return true;
+					}
+
+					setMessage(data.message || "Procesando archivo en segundo plano...", "info");
+					return false;
+				}
+
 				async function pollJob(jobId, token) {
 					try {
 						const response = await fetch("/jobs/" + encodeURIComponent(jobId), {
@@ -782,33 +1475,174 @@ async def get_padron_upload_form():
 							throw new Error(detail);
 						}
 
-						const data = await response.json();
-						progressLabel.textContent = "Procesamiento";
-						setProgress(data.progress_percent || 0);
-						setJobMeta("Job: " + data.job_id + " | Etapa: " + data.stage + " | Filas: " + (data.processed_rows || 0).toLocaleString("es-AR"));
-
-						if (data.status === "completed") {
-							setProgress(100);
-							setMessage(data.message || "Archivo procesado correctamente.", "success");
-							toggleUploadingState(false);
-							form.reset();
-							return;
-						}
-
-						if (data.status === "failed") {
-							setMessage(data.error || data.message || "El job falló durante el procesamiento.", "error");
-							toggleUploadingState(false);
-							return;
+						if (!showJobState(await response.json())) {
+							window.setTimeout(() => pollJob(jobId, token), 2000);
 						}
-
-						setMessage(data.message || "Procesando archivo en segundo plano...", "info");
-						window.setTimeout(() => pollJob(jobId, token), 2000);
 					} catch (error) {
 						setMessage((error && error.message) || "Error consultando el estado del job. Reintentando...", "info");
 						window.setTimeout(() => pollJob(jobId, token), 3000);
 					}
 				}
 
+				async function followJob(jobId, token) {
+					// El servidor empuja cada cambio del job; si el stream se corta se sigue consultando cada 2 segundos.
+					if (!window.EventSource) {
+						pollJob(jobId, token);
+						return;
+					}
+					// EventSource no manda headers: la URL lleva un token que solo abre los eventos de este job y vence enseguida.
+					let eventsToken;
+					try {
+						const response = await fetch("/jobs/" + encodeURIComponent(jobId) + "/events/token", {
+							method: "POST",
+							cache: "no-store",
+							headers: {
+								"X-Import-Token": token
+							}
+						});
+						if (!response.ok) {
+							throw new Error("No se pudo obtener el token de eventos del job.");
+						}
+						eventsToken = (await response.json()).token;
+					} catch (error) {
+						console.error(error);
+						pollJob(jobId, token);
+						return;
+					}
+					const source = new EventSource("/jobs/" + encodeURIComponent(jobId) + "/events?token=" + encodeURIComponent(eventsToken));
+					let finished = false;
+					source.addEventListener("job", (event) => {
+						finished = showJobState(JSON.parse(event.data));
+						if (finished) {
+							source.close();
+						}
+					});
+					source.onerror = () => {
+						source.close();
+						if (!finished) {
+							pollJob(jobId, token);
+						}
+					};
+				}
+
+				const UPLOAD_PARALLELISM = 4;
+				const UPLOAD_RETRIES = 5;
+
+				function sleep(milliseconds) {
+					return new Promise((resolve) => window.setTimeout(resolve, milliseconds));
+				}
+
+				async function apiRequest(url, options, token) {
+					const headers = Object.assign({ "X-Import-Token": token }, options.headers || {});
+					const response = await fetch(url, Object.assign({ cache: "no-store" }, options, { headers: headers }));
+
+					if (!response.ok) {
+						let detail = "Error " + response.status + " durante la subida.";
+						try {
+							const data = await response.json();
+							detail = data.detail || detail;
+						} catch (error) {
+							console.error(error);
+						}
+						const failure = new Error(detail);
+						failure.status = response.status;
+						throw failure;
+					}
+
+					return response.status === 204 ? null : response.json();
+				}
+
+				function uploadStorageKey(jobType, files) {
+					return "upload:" + jobType + ":" + Object.keys(files).map((field) => {
+						const file = files[field];
+						return field + "=" + file.name + "/" + file.size + "/" + file.lastModified;
+					}).join("|");
+				}
+
+				async function openUploadSession(token, jobType, files) {
+					// Si una subida anterior de los mismos archivos quedó a medias, se retoma desde los bloques ya recibidos.
+					const storageKey = uploadStorageKey(jobType, files);
+					const previousId = window.localStorage.getItem(storageKey);
+					if (previousId) {
+						try {
+							const session = await apiRequest("/uploads/" + encodeURIComponent(previousId), { method: "GET" }, token);
+							if (session.status === "uploading") {
+								return { storageKey: storageKey, session: session };
+							}
+						} catch (error) {
+							console.error(error);
+						}
+						window.localStorage.removeItem(storageKey);
+					}
+
+					const declared = {};
+					Object.keys(files).forEach((field) => {
+						declared[field] = { filename: files[field].name, size: files[field].size };
+					});
+					const session = await apiRequest("/uploads/", {
+						method: "POST",
+						headers: { "Content-Type": "application/json" },
+						body: JSON.stringify({ job_type: jobType, files: declared })
+					}, token);
+					window.localStorage.setItem(storageKey, session.upload_id);
+					return { storageKey: storageKey, session: session };
+				}
+
+				async function putRange(token, uploadId, range) {
+					for (let attempt = 1; ; attempt++) {
+						try {
+							return await apiRequest("/uploads/" + encodeURIComponent(uploadId) + "/" + encodeURIComponent(range.field), {
+								method: "PUT",
+								headers: { "Content-Range": "bytes " + range.start + "-" + (range.end - 1) + "/" + range.file.size },
+								body: range.file.slice(range.start, range.end)
+							}, token);
+						} catch (error) {
+							const retryable = !error.status || error.status >= 500 || error.status === 408 || error.status === 429;
+							if (!retryable || attempt >= UPLOAD_RETRIES) {
+								throw error;
+							}
+							await sleep(1000 * attempt);
+						}
+					}
+				}
+
+				async function uploadResumable(token, jobType, files) {
+					const opened = await openUploadSession(token, jobType, files);
+					const session = opened.session;
+					const pending = [];
+					let uploaded = 0;
+					let total = 0;
+
+					Object.keys(files).forEach((field) => {
+						const state = session.files[field];
+						total += state.size;
+						uploaded += state.received_bytes;
+						state.missing.forEach((gap) => {
+							for (let start = gap[0]; start < gap[1]; start += session.chunk_size) {
+								pending.push({ field: field, file: files[field], start: start, end: Math.min(gap[1], start + session.chunk_size) });
+							}
+						});
+					});
+
+					const reportProgress = () => setProgress(total ? Math.round((uploaded / total) * 100) : 100);
+					reportProgress();
+
+					async function uploadWorker() {
+						while (pending.length) {
+							const range = pending.shift();
+							await putRange(token, session.upload_id, range);
+							uploaded += range.end - range.start;
+							reportProgress();
+						}
+					}
+
+					await Promise.all(Array.from({ length: UPLOAD_PARALLELISM }, uploadWorker));
+					setMessage("Subida completa. Creando job en el servidor...", "info");
+					const job = await apiRequest("/uploads/" + encodeURIComponent(session.upload_id) + "/finalize", { method: "POST" }, token);
+					window.localStorage.removeItem(opened.storageKey);
+					return job;
+				}
+
 				form.addEventListener("submit", async (event) => {
 					event.preventDefault();
 					clearMessage();
@@ -831,8 +1665,8 @@ async def get_padron_upload_form():
 						return;
 					}
 
-					if (!padronFile.name.toLowerCase().endsWith(".zip")) {
-						setMessage("El archivo de padrón debe ser un .zip válido.", "error");
+					if (![".zip", ".7z", ".gz", ".zst"].some((extension) => padronFile.name.toLowerCase().endsWith(extension))) {
+						setMessage("El archivo de padrón debe ser un .zip, .7z, .gz o .zst.", "error");
 						return;
 					}
 
@@ -850,63 +1684,30 @@ async def get_padron_upload_form():
 					progressWrapper.classList.add("visible");
 					setMessage("Subiendo archivo...", "info");
 
-					const xhr = new XMLHttpRequest();
-					xhr.open("POST", form.action);
-
-					xhr.upload.addEventListener("progress", (progressEvent) => {
-						if (!progressEvent.lengthComputable) {
-							return;
-						}
-
-						const percentage = Math.round((progressEvent.loaded / progressEvent.total) * 100);
-						setProgress(percentage);
-
-						if (percentage === 100) {
-							setMessage("Subida completa. Creando job en el servidor...", "info");
-						}
-					});
-
-					xhr.addEventListener("load", () => {
-						if (xhr.status >= 200 && xhr.status < 300) {
-							let data = null;
-							try {
-								data = JSON.parse(xhr.responseText);
-							} catch (error) {
-								console.error(error);
-							}
-
-							if (!data || !data.job_id) {
-								toggleUploadingState(false);
-								setMessage("La respuesta del servidor no incluyó el job de importación.", "error");
-								return;
-							}
-
-							setProgress(0);
-							progressLabel.textContent = "Procesamiento";
-							setMessage(data.message || "Archivo subido. Procesando en background...", "info");
-							setJobMeta("Job: " + data.job_id + " | Etapa: " + data.stage);
-							pollJob(data.job_id, token);
-							return;
-						}
-
+					let data = null;
+					try {
+						data = await uploadResumable(token, "padron", { padron: padronFile });
+					} catch (error) {
 						toggleUploadingState(false);
-
-						let detail = "Ocurrió un error al cargar el archivo.";
-						try {
-							const data = JSON.parse(xhr.responseText);
-							detail = data.detail || data.message || detail;
-						} catch (error) {
-							console.error(error);
+						if (error && error.status) {
+							setMessage(error.message, "error");
+						} else {
+							setMessage("Error de red durante la carga. Volvé a enviar el formulario para retomar la subida desde donde quedó.", "error");
 						}
-						setMessage(detail, "error");
-					});
+						return;
+					}
 
-					xhr.addEventListener("error", () => {
+					if (!data || !data.job_id) {
 						toggleUploadingState(false);
-						setMessage("Error de red durante la carga. Revisá la conexión e intentá nuevamente.", "error");
-					});
+						setMessage("La respuesta del servidor no incluyó el job de importación.", "error");
+						return;
+					}
 
-					xhr.send(formData);
+					setProgress(0);
+					progressLabel.textContent = "Procesamiento";
+					setMessage(data.message || "Archivo subido. Procesando en background...", "info");
+					setJobMeta("Job: " + data.job_id + " | Etapa: " + data.stage);
+					followJob(data.job_id, token);
 				});
 			</script>
 		</body>
@@ -916,96 +1717,227 @@ async def get_padron_upload_form():
 
 @app.post("/padron/upload/", status_code=status.HTTP_202_ACCEPTED)
 async def upload_padron(
-	padron: UploadFile = File(...),
-	token: str = Form(...),
+	request: Request,
+	x_import_token: Optional[str] = Header(None, alias="X-Import-Token"),
 ):
-	if token != SECRET_TOKEN:
-		raise HTTPException(status_code=403, detail="Acceso denegado, token inválido")
+	validar_token_de_subida(x_import_token)
+	upload = await receive_upload(request, UPLOAD_FILES_BY_JOB_TYPE[JOB_TYPE_PADRON])
+	validar_token_de_subida(x_import_token, upload)
+
+	job = await run_in_threadpool(create_padron_job, upload)
+	return get_job_status_payload(job)
+
+# *********************************************
+# Subidas reanudables
+# *********************************************
+
+class ArchivoSubida(BaseModel):
+	filename: Optional[str] = None
+	size: int
+
+class NuevaSubida(BaseModel):
+	job_type: str
+	files: dict[str, ArchivoSubida]
+
+@app.post("/uploads/", status_code=status.HTTP_201_CREATED)
+async def crear_subida(subida: NuevaSubida, x_import_token: str = Header(..., alias="X-Import-Token")):
+	validar_token_de_subida(x_import_token)
+	archivos = {campo: (archivo.filename, archivo.size) for campo, archivo in subida.files.items()}
+	return await run_in_threadpool(create_upload_session, subida.job_type, archivos)
+
+
+@app.get("/uploads/{upload_id}")
+async def get_estado_subida(upload_id: str, x_import_token: str = Header(..., alias="X-Import-Token")):
+	validar_token_de_subida(x_import_token)
+	return await run_in_threadpool(get_upload_session_payload, upload_id)
+
 
-	job = create_padron_job(padron=padron)
+@app.put("/uploads/{upload_id}/{field}")
+async def subir_rango(
+	upload_id: str,
+	field: str,
+	request: Request,
+	x_import_token: str = Header(..., alias="X-Import-Token"),
+):
+	# El rango viaja en el header Content-Range: bytes inicio-fin/total, con fin inclusivo.
+	validar_token_de_subida(x_import_token)
+	return await receive_upload_chunk(request, upload_id, field)
+
+
+@app.post("/uploads/{upload_id}/finalize", status_code=status.HTTP_202_ACCEPTED)
+async def finalizar_subida(upload_id: str, x_import_token: str = Header(..., alias="X-Import-Token")):
+	validar_token_de_subida(x_import_token)
+	job = await run_in_threadpool(finalize_upload_session, upload_id)
 	return get_job_status_payload(job)
 
+
+@app.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancelar_subida(upload_id: str, x_import_token: str = Header(..., alias="X-Import-Token")):
+	validar_token_de_subida(x_import_token)
+	await run_in_threadpool(delete_upload_session, upload_id)
+
 # *********************************************
 # Consultas por API
 # *********************************************
 
 @app.get("/padron/{identificacion}")
-async def get_padron_by_identificacion(identificacion: str, db: Session = Depends(get_db)):
+async def get_padron_by_identificacion(identificacion: str, request: Request, db: AsyncSession = Depends(get_async_db)):
 	# Tomar el tiempo de inicio
 	start_time = time.time()
 
-	# logger.info(f"Buscando detalle del padrón para identificación {identificacion}")
-	posibles_identificaciones = [identificacion]
-	# Determinar si la identificación es un DNI (8 dígitos) o un CUIT/CUIL (11 dígitos)
-	if len(identificacion) == 8 and identificacion.isdigit():
-		# Generar posibles CUITs con prefijos comunes y calcular el dígito verificador
-		for prefijo in PREFIJOS_CUIL:
-			posibles_identificaciones.append(str(prefijo) + str(identificacion) + str(calcular_digito_verificador(prefijo + identificacion)))
-	
-	logger.info(f"Posibles identificaciones a buscar: {posibles_identificaciones}")
-
-	# Buscar en la base de datos por las identificaciones generadas
-	registros = db.query(Padron).filter(Padron.identificacion.in_(posibles_identificaciones)).all()
-	logger.info(f"Registro encontrado: {registros}")
-	if not registros:
+	logger.info(f"Buscando detalle del padrón para identificación {identificacion}")
+	# Un DNI (8 dígitos) se busca en el índice idx_padrones_dni, con la misma expresión que lo define
+	if es_dni(identificacion):
+		condicion = literal_column(dni_expression("padrones.identificacion")) == identificacion
+	else:
+		condicion = Padron.identificacion == identificacion
+	consulta = select(Padron).where(condicion).order_by(Padron.identificacion)
+
+	# El filtro y el snapshot van antes que cualquier formato: un CUIT que seguro no está es 404 también en NDJSON
+	if padron_filtro.is_absent(identificacion):
+		raise HTTPException(status_code=404, detail="Registro no encontrado")
+
+	# Un CUIT se busca primero en el snapshot del padrón; sin snapshot se consulta la base
+	registros = padron_snapshot.lookup(identificacion)
+	if registros is not None:
+		padrones = [unpack_padron(registro) for registro in registros]
+	elif pide_ndjson(request):
+		# Se lee la primera fila antes de responder para devolver 404, igual que en JSON, si no hay ninguna
+		filas = await con_primera_fila(filas_en_streaming(consulta, {}))
+		if filas is None:
+			padron_filtro.record_misses([identificacion])
+			raise HTTPException(status_code=404, detail="Registro no encontrado")
+		return respuesta_ndjson(formatear_padron(fila.Padron) async for fila in filas)
+	else:
+		await generaciones_de_datos.refresh(db)
+		padrones = padron_cache.get(("identificacion", identificacion), NO_CACHEADO)
+	if padrones is NO_CACHEADO:
+		registros = (await db.scalars(consulta)).all()
+		logger.info(f"Registro encontrado: {registros}")
+
+		# Formatear la respuesta
+		padrones = [formatear_padron(registro) for registro in registros]
+		padron_cache.set(("identificacion", identificacion), padrones)
+
+	if not padrones:
+		padron_filtro.record_misses([identificacion])
 		raise HTTPException(status_code=404, detail="Registro no encontrado")
 
+	if pide_ndjson(request):
+		return respuesta_ndjson(filas_en_memoria(padrones))
+
 	# Tomar el tiempo de fin y calcular la duración
 	end_time = time.time()
 	duration = end_time - start_time
 
-	# Formatear la respuesta
-	padrones = []
-	for registro in registros:
-		padrones.append({
-			"id": registro.id,
-			"identificacion": registro.identificacion,
-			"denominacion": registro.denominacion,
-			"actividad": registro.actividad,
-			"marca_baja": registro.marca_baja,
-			"cuit_reemplazo": registro.cuit_reemplazo,
-			"fallecimiento": registro.fallecimiento
-		})
 	return {
 		"resultado": padrones,
 		"tiempo_demora_segundos": duration
 	}
 
 @app.get("/padron/nombre/{nombre_apellido}")
-async def get_padron_by_nombre(nombre_apellido: str, db: Session = Depends(get_db)):
+async def get_padron_by_nombre(
+	nombre_apellido: str,
+	request: Request,
+	limit: int = Query(..., ge=1, le=PADRON_NOMBRE_MAX_LIMIT),
+	cursor: Optional[str] = None,
+	db: AsyncSession = Depends(get_async_db),
+):
 	# Tomar el tiempo de inicio
 	start_time = time.time()
 
+	if not BUSQUEDA_POR_NOMBRE:
+		raise HTTPException(status_code=503, detail="La búsqueda por nombre requiere las extensiones pg_trgm y unaccent en PostgreSQL.")
+
 	# Dividir el nombre y apellido en palabras clave
 	palabras_clave = nombre_apellido.split()
-
-	# Crear una condición que verifique que cada palabra clave esté en la denominación
-	condiciones = [Padron.denominacion.ilike(f"%{palabra}%") for palabra in palabras_clave]
-
-	# Ejecutar la consulta usando AND para buscar todas las palabras en cualquier orden
-	registros = db.query(Padron).filter(and_(*condiciones)).all()
-
-	if not registros:
+	if not any(len(palabra) >= PADRON_NOMBRE_MIN_LETRAS for palabra in palabras_clave):
+		raise HTTPException(status_code=400, detail=f"Ingrese al menos una palabra de {PADRON_NOMBRE_MIN_LETRAS} letras o más.")
+	desde = decodificar_cursor_padron(cursor) if cursor is not None else None
+	consulta = consulta_padron_por_nombre(len(palabras_clave), desde is not None)
+	parametros = {
+		"consulta": " ".join(palabras_clave),
+		"limite": limit,
+		**{f"palabra_{indice}": f"%{escapar_like(palabra)}%" for indice, palabra in enumerate(palabras_clave)},
+	}
+	if desde is not None:
+		parametros["cursor_similitud"], parametros["cursor_id"] = desde
+
+	if pide_ndjson(request):
+		# Cada línea lleva el cursor que continúa después de ella; menos de limit líneas indican la última página.
+		return respuesta_ndjson(
+			dict(
+				formatear_padron(fila.Padron),
+				similitud=round(fila.similitud, 4),
+				cursor=codificar_cursor_padron(fila.similitud, fila.Padron.id),
+			)
+			async for fila in filas_en_streaming(consulta, parametros)
+		)
+
+	await generaciones_de_datos.refresh(db)
+	clave = ("nombre", tuple(palabras_clave), limit, cursor)
+	respuesta = padron_cache.get(clave, NO_CACHEADO)
+	if respuesta is NO_CACHEADO:
+		filas = (await db.execute(consulta, dict(parametros, limite=limit + 1))).all()
+
+		# Se pide una fila de más para saber si hay otra página sin contar todas las coincidencias
+		siguiente_cursor = None
+		if len(filas) > limit:
+			filas = filas[:limit]
+			siguiente_cursor = codificar_cursor_padron(filas[-1].similitud, filas[-1].Padron.id)
+		respuesta = {
+			"resultado": [dict(formatear_padron(fila.Padron), similitud=round(fila.similitud, 4)) for fila in filas],
+			"siguiente_cursor": siguiente_cursor,
+		}
+		padron_cache.set(clave, respuesta)
+
+	if not respuesta["resultado"]:
 		raise HTTPException(status_code=404, detail="No se encontraron registros")
 
 	# Tomar el tiempo de fin y calcular la duración
 	end_time = time.time()
 	duration = end_time - start_time
 
-	# Formatear la respuesta
-	respuesta = []
-	for registro in registros:
-		respuesta.append({
-			"id": registro.id,
-			"identificacion": registro.identificacion,
-			"denominacion": registro.denominacion,
-			"actividad": registro.actividad,
-			"marca_baja": registro.marca_baja,
-			"cuit_reemplazo": registro.cuit_reemplazo,
-			"fallecimiento": registro.fallecimiento
-		})
-
 	return {
-		"resultado": respuesta,
+		**respuesta,
 		"tiempo_demora_segundos": duration
 	}
+
+@lru_cache(maxsize=None)
+def consulta_padron_por_nombre(cantidad_palabras: int, con_cursor: bool):
+	# Cada palabra debe aparecer en la denominación (sin distinguir mayúsculas ni acentos) y los resultados se
+	# ordenan por similitud con la consulta completa. Los LIKE usan idx_padrones_denominacion_trgm, definido
+	# sobre la misma expresión normalizar_nombre(denominacion).
+	nombre = func.normalizar_nombre(Padron.denominacion)
+	similitud = func.similarity(nombre, func.normalizar_nombre(bindparam("consulta", type_=String)))
+	condiciones = [
+		nombre.like(func.normalizar_nombre(bindparam(f"palabra_{indice}", type_=String)))
+		for indice in range(cantidad_palabras)
+	]
+	if con_cursor:
+		# Paginación por clave: la página siguiente arranca después de la última (similitud, id) devuelta
+		cursor_similitud = bindparam("cursor_similitud", type_=Float)
+		condiciones.append(or_(
+			similitud < cursor_similitud,
+			and_(similitud == cursor_similitud, Padron.id > bindparam("cursor_id", type_=Integer)),
+		))
+
+	return (
+		select(Padron, similitud.label("similitud"))
+		.where(*condiciones)
+		.order_by(similitud.desc(), Padron.id)
+		.limit(bindparam("limite", type_=Integer))
+	)
+
+def escapar_like(texto: str) -> str:
+	return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def codificar_cursor_padron(similitud: float, id_padron: int) -> str:
+	return base64.urlsafe_b64encode(json.dumps([similitud, id_padron]).encode()).decode()
+
+def decodificar_cursor_padron(cursor: str) -> tuple[float, int]:
+	try:
+		similitud, id_padron = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+		return float(similitud), int(id_padron)
+	except (binascii.Error, ValueError, TypeError):
+		raise HTTPException(status_code=400, detail="Cursor inválido.")
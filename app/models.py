@@ -1,17 +1,96 @@
-from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, Numeric, String, Text
+from typing import Any
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    Numeric,
+    SmallInteger,
+    String,
+    Table,
+    Text,
+    inspect,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import DBAPIError
 
 from app.database import Base
+from app.settings import get_int_setting
+
+# Esquema con el que se crea deudores cuando todavía no existe; una tabla existente conserva el suyo.
+DEUDORES_COMPACT_SCHEMA = get_int_setting("DEUDORES_COMPACT_SCHEMA", 0) != 0
+# Advisory lock de create_tables: la API y los workers que arrancan a la vez no crean la misma tabla dos veces.
+CREATE_TABLES_LOCK_KEY = 0x435254
+
+
+# Búsqueda por nombre en padrones: pg_trgm indexa los trigramas y unaccent pliega los acentos. unaccent no es
+# IMMUTABLE y no puede usarse en un índice; normalizar_nombre fija su diccionario y sí lo es. Las consultas deben
+# usar la misma expresión que idx_padrones_denominacion_trgm para que PostgreSQL lo use.
+NAME_SEARCH_EXTENSIONS = ('pg_trgm', 'unaccent')
+NORMALIZAR_NOMBRE_DDL = """
+CREATE OR REPLACE FUNCTION normalizar_nombre(text) RETURNS text
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$
+"""
+PADRON_NOMBRE_INDEX = 'idx_padrones_denominacion_trgm'
+PADRON_NOMBRE_INDEX_COLUMNS = 'normalizar_nombre(denominacion) gin_trgm_ops'
+NAME_SEARCH_AVAILABLE_SQL = "SELECT to_regprocedure('normalizar_nombre(text)') IS NOT NULL"
+
+
+# Columnas que el índice idx_deudores_historial lleva además de la clave, para que el historial de un CUIT se
+# responda solo con el índice. Con la misma clave (CUIT, período) sirve también para buscar el último período de
+# un CUIT, así que reemplaza a idx_deudores_numero_fecha_desc.
+HISTORIAL_INCLUDE_COLUMNS = ('codigo_entidad', 'situacion', 'prestamos_total_garantias')
+# Índices de versiones anteriores que borra migrar. Las búsquedas por DNI se resuelven en deudores_resumen,
+# así que deudores ya no lleva idx_deudores_dni.
+LEGACY_DEUDORES_INDEXES = ('idx_deudores_numero_fecha_desc', 'idx_deudores_dni')
+
+
+def dni_expression(column: str) -> str:
+    """Expresión SQL con el DNI (los 8 dígitos del medio) de un CUIT/CUIL guardado en column.
+
+    Los índices idx_*_dni se definen con esta expresión y las consultas por DNI deben repetirla tal cual para que
+    PostgreSQL los use.
+    """
+    return f'substr({column}, 3, 8)'
+
+
+# El esquema compacto guarda fecha_informacion como SMALLINT: meses desde enero de PERIOD_INDEX_EPOCH_YEAR, que
+# ocupa 2 bytes en lugar de los 4 de un INTEGER AAAAMM y conserva el orden de los períodos.
+PERIOD_INDEX_EPOCH_YEAR = 1970
+
+
+def period_index(fecha_informacion: str) -> int:
+    """Índice de mes de un período AAAAMM, como lo guarda el esquema compacto."""
+    return (int(fecha_informacion[:4]) - PERIOD_INDEX_EPOCH_YEAR) * 12 + int(fecha_informacion[4:6]) - 1
+
+
+def period_from_index(index: int) -> str:
+    """Período AAAAMM de un índice de mes; inversa de period_index."""
+    year, month = divmod(index, 12)
+    return f'{year + PERIOD_INDEX_EPOCH_YEAR:04d}{month + 1:02d}'
+
+
+def period_expression(column: str) -> str:
+    """Expresión SQL con el período AAAAMM, como texto, del índice de mes guardado en column."""
+    return f'(({column} / 12 + {PERIOD_INDEX_EPOCH_YEAR}) * 100 + mod({column}, 12) + 1)::text'
 
 
 class Deudor(Base):
     __tablename__ = 'deudores'
-    __table_args__ = (
-        Index('idx_deudores_numero_fecha_desc', 'numero_identificacion', 'fecha_informacion'),
-    )
+    # Particionada por período: cada importación carga su propio mes y lo adjunta (ver import_jobs).
+    __table_args__ = {'postgresql_partition_by': 'RANGE (fecha_informacion)'}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     codigo_entidad = Column(String(5), nullable=False)
-    fecha_informacion = Column(String(6), nullable=False)
+    fecha_informacion = Column(String(6), primary_key=True)
     tipo_identificacion = Column(String(2), nullable=False)
     numero_identificacion = Column(String(11), nullable=False)
     actividad = Column(String(3), nullable=False)
@@ -37,6 +116,93 @@ class Deudor(Base):
     nombre_entidad = Column(String(254), nullable=False)
 
 
+Index(
+    'idx_deudores_historial',
+    Deudor.numero_identificacion,
+    Deudor.fecha_informacion.desc(),
+    postgresql_include=list(HISTORIAL_INCLUDE_COLUMNS),
+)
+
+# Variante compacta de deudores: el nombre de la entidad no se repite en cada fila sino que se resuelve desde
+# entidades por codigo_entidad, el CUIT es BIGINT, el período un índice de mes (period_index) y la situación, los
+# indicadores y los días de atraso son SMALLINT. Las columnas de ancho fijo van primero y de mayor a menor para que
+# PostgreSQL no agregue relleno de alineación. Usa su propio MetaData porque comparte el nombre con Deudor.
+deudores_compactos = Table(
+    'deudores',
+    MetaData(),
+    Column('numero_identificacion', BigInteger, nullable=False),
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('fecha_informacion', SmallInteger, primary_key=True),
+    Column('situacion', SmallInteger, nullable=False),
+    Column('deuda_cubierta', SmallInteger, nullable=False),
+    Column('proceso_judicial_revision', SmallInteger, nullable=False),
+    Column('refinanciaciones', SmallInteger, nullable=False),
+    Column('recategorizacion_obligatoria', SmallInteger, nullable=False),
+    Column('situacion_juridica', SmallInteger, nullable=False),
+    Column('irrecuperables_disposicion_tecnica', SmallInteger, nullable=False),
+    Column('dias_atraso', SmallInteger, nullable=False),
+    Column('codigo_entidad', String(5), nullable=False),
+    Column('tipo_identificacion', String(2), nullable=False),
+    Column('actividad', String(3), nullable=False),
+    Column('prestamos_total_garantias', Numeric(12, 1), nullable=True),
+    Column('sin_uso', Numeric(12, 1), nullable=True),
+    Column('garantias_otorgadas', Numeric(12, 1), nullable=True),
+    Column('otros_conceptos', Numeric(12, 1), nullable=True),
+    Column('garantias_preferidas_a', Numeric(12, 1), nullable=True),
+    Column('garantias_preferidas_b', Numeric(12, 1), nullable=True),
+    Column('sin_garantias_preferidas', Numeric(12, 1), nullable=True),
+    Column('contragarantias_preferidas_a', Numeric(12, 1), nullable=True),
+    Column('contragarantias_preferidas_b', Numeric(12, 1), nullable=True),
+    Column('sin_contragarantias_preferidas', Numeric(12, 1), nullable=True),
+    Column('previsiones', Numeric(12, 1), nullable=True),
+    Index('ix_deudores_id', 'id'),
+    postgresql_partition_by='RANGE (fecha_informacion)',
+)
+Index(
+    'idx_deudores_historial',
+    deudores_compactos.c.numero_identificacion,
+    deudores_compactos.c.fecha_informacion.desc(),
+    postgresql_include=list(HISTORIAL_INCLUDE_COLUMNS),
+)
+
+
+def deudores_is_compact(bind: Any) -> bool:
+    """Indica si la tabla deudores existente tiene el esquema compacto (sin nombre_entidad).
+
+    Falla con una tabla compacta de una versión anterior, que guardaba el período como INTEGER AAAAMM.
+    """
+    columns = {column['name']: column for column in inspect(bind).get_columns(Deudor.__tablename__)}
+    if 'nombre_entidad' in columns:
+        return False
+    if not isinstance(columns['fecha_informacion']['type'], SmallInteger):
+        raise RuntimeError(
+            'deudores compacta guarda fecha_informacion como AAAAMM; renómbrela o elimínela y vuelva a importar '
+            'los períodos'
+        )
+    return True
+
+
+class DeudorResumen(Base):
+    """Último período de cada CUIT, precalculado al final de cada importación de deudores."""
+
+    __tablename__ = 'deudores_resumen'
+    __table_args__ = (
+        Index('idx_deudores_resumen_dni', text(dni_expression('numero_identificacion'))),
+    )
+
+    numero_identificacion = Column(String(11), primary_key=True)
+    fecha_informacion = Column(String(6), nullable=False)
+    peor_situacion = Column(Integer, nullable=False)
+    monto_situacion_1 = Column(Numeric, nullable=True)
+    monto_situacion_2 = Column(Numeric, nullable=True)
+    monto_situacion_3 = Column(Numeric, nullable=True)
+    monto_situacion_4 = Column(Numeric, nullable=True)
+    monto_situacion_5 = Column(Numeric, nullable=True)
+    situaciones = Column(ARRAY(Integer), nullable=False)
+    montos = Column(ARRAY(Numeric(12, 1)), nullable=False)
+    bancos = Column(ARRAY(String(254)), nullable=False)
+
+
 class Entidad(Base):
     __tablename__ = 'entidades'
 
@@ -49,6 +215,7 @@ class Padron(Base):
     __tablename__ = 'padrones'
     __table_args__ = (
         Index('idx_padrones_identificacion', 'identificacion'),
+        Index('idx_padrones_dni', text(dni_expression('identificacion'))),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -73,8 +240,89 @@ class ImportJob(Base):
     progress_total = Column(BigInteger, nullable=False, default=0)
     processed_rows = Column(BigInteger, nullable=False, default=0)
     deudores_filename = Column(String(255), nullable=True)
+    deudores_sha256 = Column(String(64), nullable=True)
     entidades_filename = Column(String(255), nullable=True)
+    entidades_sha256 = Column(String(64), nullable=True)
     padron_filename = Column(String(255), nullable=True)
+    padron_sha256 = Column(String(64), nullable=True)
+    # Archivos subidos del job; se conservan hasta que termina para poder retomarlo después de un reinicio.
+    deudores_path = Column(String(512), nullable=True)
+    entidades_path = Column(String(512), nullable=True)
+    padron_path = Column(String(512), nullable=True)
+    # Último lote del COPY confirmado, en la misma transacción que sus filas: lote, bytes leídos del archivo
+    # descomprimido y filas cargadas.
+    checkpoint_batch = Column(Integer, nullable=True, default=0)
+    checkpoint_offset = Column(BigInteger, nullable=True, default=0)
+    checkpoint_rows = Column(BigInteger, nullable=True, default=0)
+    # Ritmo de la carga (en vivo mientras corre el COPY, el promedio final al terminarla) y segundos estimados
+    # para terminarla; eta_seconds queda vacío si el archivo comprimido no informa su tamaño.
+    rows_per_second = Column(Float, nullable=True)
+    bytes_per_second = Column(Float, nullable=True)
+    eta_seconds = Column(Float, nullable=True)
+    # Tiempo de pared y de CPU acumulado por etapa: {etapa: {"wall_seconds", "cpu_seconds", "calls"}}.
+    profile = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False)
     started_at = Column(DateTime(timezone=True), nullable=True)
     finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class UploadSession(Base):
+    __tablename__ = 'upload_sessions'
+
+    id = Column(String(36), primary_key=True)
+    job_type = Column(String(32), nullable=False)
+    status = Column(String(20), nullable=False, index=True)
+    # Por campo de archivo: {"filename": ..., "size": ...}.
+    files = Column(JSON, nullable=False)
+    job_id = Column(String(36), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class UploadChunk(Base):
+    __tablename__ = 'upload_chunks'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    upload_id = Column(String(36), ForeignKey('upload_sessions.id', ondelete='CASCADE'), nullable=False, index=True)
+    field = Column(String(32), nullable=False)
+    range_start = Column(BigInteger, nullable=False)
+    range_end = Column(BigInteger, nullable=False)
+
+
+def create_tables(bind: Any) -> None:
+    """Crea las tablas que falten; deudores, con el esquema que indique DEUDORES_COMPACT_SCHEMA.
+
+    Corre al iniciar la API y cada worker: solo crea tablas nuevas, con sus índices todavía vacíos, y un advisory
+    lock serializa los arranques simultáneos. Lo que cambia tablas existentes (columnas, índices que create_all no
+    agrega, extensiones) lo hace python -m app.import_jobs migrar.
+    """
+    with bind.begin() as connection:
+        connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': CREATE_TABLES_LOCK_KEY})
+        deudores = deudores_compactos if DEUDORES_COMPACT_SCHEMA else Deudor.__table__
+        deudores.create(bind=connection, checkfirst=True)
+        Base.metadata.create_all(
+            bind=connection,
+            tables=[table for table in Base.metadata.sorted_tables if table is not Deudor.__table__],
+        )
+
+
+def ensure_name_search(bind: Any) -> bool:
+    """Prepara la búsqueda por nombre: extensiones y normalizar_nombre. El índice trigram lo crea migrar.
+
+    Devuelve False si el servidor no tiene pg_trgm y unaccent o el usuario no puede crearlas; la búsqueda por
+    nombre queda deshabilitada y el resto de la aplicación funciona igual.
+    """
+    try:
+        with bind.begin() as connection:
+            for extension in NAME_SEARCH_EXTENSIONS:
+                connection.execute(text(f'CREATE EXTENSION IF NOT EXISTS {extension}'))
+            if not connection.execute(text(NAME_SEARCH_AVAILABLE_SQL)).scalar():
+                connection.execute(text(NORMALIZAR_NOMBRE_DDL))
+    except DBAPIError:
+        return False
+    return True
+
+
+def name_search_available(bind: Any) -> bool:
+    with bind.connect() as connection:
+        return bool(connection.execute(text(NAME_SEARCH_AVAILABLE_SQL)).scalar())
@@ -21,3 +21,14 @@ def get_secret(name: str) -> str:
             return secret_value
 
     raise RuntimeError(f"{name} or {name}_FILE is required")
+
+
+def get_int_setting(name: str, default: int) -> int:
+    value = _normalize_secret(os.getenv(name, ""))
+    if not value:
+        return default
+
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer") from exc
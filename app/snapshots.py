@@ -0,0 +1,291 @@
+"""Snapshots binarios de solo lectura para responder consultas por CUIT sin pasar por PostgreSQL.
+
+Al terminar cada importación el job escribe en SNAPSHOT_DIR un archivo inmutable con registros de ancho fijo
+ordenados por CUIT (<tipo>-<job_id>.bin) y después reemplaza atómicamente el puntero <tipo>.current con su
+nombre. Los procesos de la API mapean el archivo en memoria con mmap, buscan por bisección y vuelven a leer el
+puntero como máximo una vez cada SNAPSHOT_POLL_SECONDS. Sin puntero, o con un archivo que no valida, la consulta
+sigue yendo a PostgreSQL.
+
+Formato: un encabezado de HEADER_SIZE bytes (magic, versión, tamaño de registro, cantidad de registros y el
+job_id que lo generó) seguido de los registros. Los textos van en latin-1, completados con bytes nulos.
+"""
+
+from __future__ import annotations
+
+import abc
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from app.settings import get_int_setting
+
+logger = logging.getLogger("uvicorn.error")
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent.parent / "snapshots"
+SNAPSHOTS_ENABLED = get_int_setting("LOOKUP_SNAPSHOTS", 1) != 0
+SNAPSHOT_POLL_SECONDS = max(0, get_int_setting("SNAPSHOT_POLL_SECONDS", 1))
+
+SNAPSHOT_PADRON = "padron"
+SNAPSHOT_DEUDORES = "deudores"
+
+SNAPSHOT_MAGIC = b"BCRASNAP"
+SNAPSHOT_VERSION = 1
+# magic, versión, tamaño de registro, cantidad de registros, job_id.
+_HEADER = struct.Struct("<8sHHQ36s")
+HEADER_SIZE = 64
+KEY_SIZE = 11
+_WRITE_BUFFER_BYTES = 1024 * 1024
+
+# identificacion, denominacion, actividad, marca_baja, cuit_reemplazo, fallecimiento, columnas nulas, id.
+PADRON_RECORD = struct.Struct("<11s160s6s1s11s1sBI")
+_PADRON_NULLABLE = ("actividad", "marca_baja", "cuit_reemplazo", "fallecimiento")
+# numero_identificacion, fecha_informacion, peor_situacion.
+DEUDORES_RECORD = struct.Struct("<11s6sB")
+
+RECORDS_BY_KIND = {SNAPSHOT_PADRON: PADRON_RECORD, SNAPSHOT_DEUDORES: DEUDORES_RECORD}
+
+
+class SnapshotError(ValueError):
+    """El snapshot no se puede escribir (datos fuera de formato) o el archivo no es válido."""
+
+
+def _encode(value: Optional[str], size: int) -> bytes:
+    encoded = (value or "").encode("latin-1")
+    if len(encoded) > size:
+        raise SnapshotError(f"{value!r} no entra en {size} bytes")
+    return encoded
+
+
+def _decode(value: bytes) -> str:
+    return value.rstrip(b"\0").decode("latin-1")
+
+
+def pack_padron(row: tuple) -> bytes:
+    """Fila (identificacion, denominacion, actividad, marca_baja, cuit_reemplazo, fallecimiento, id)."""
+    identificacion, denominacion, actividad, marca_baja, cuit_reemplazo, fallecimiento, registro_id = row
+    opcionales = (actividad, marca_baja, cuit_reemplazo, fallecimiento)
+    nulas = sum(1 << posicion for posicion, valor in enumerate(opcionales) if valor is None)
+    return PADRON_RECORD.pack(
+        _encode(identificacion, 11),
+        _encode(denominacion, 160),
+        _encode(actividad, 6),
+        _encode(marca_baja, 1),
+        _encode(cuit_reemplazo, 11),
+        _encode(fallecimiento, 1),
+        nulas,
+        registro_id,
+    )
+
+
+def unpack_padron(record: bytes) -> dict[str, Any]:
+    identificacion, denominacion, *opcionales, nulas, registro_id = PADRON_RECORD.unpack(record)
+    registro = {"id": registro_id, "identificacion": _decode(identificacion), "denominacion": _decode(denominacion)}
+    for posicion, (campo, valor) in enumerate(zip(_PADRON_NULLABLE, opcionales)):
+        registro[campo] = None if nulas & (1 << posicion) else _decode(valor)
+    return registro
+
+
+def pack_deudor(row: tuple) -> bytes:
+    """Fila (numero_identificacion, fecha_informacion, peor_situacion) de deudores_resumen."""
+    numero_identificacion, fecha_informacion, peor_situacion = row
+    return DEUDORES_RECORD.pack(_encode(numero_identificacion, 11), _encode(fecha_informacion, 6), peor_situacion)
+
+
+def unpack_deudor(record: bytes) -> dict[str, Any]:
+    numero_identificacion, fecha_informacion, peor_situacion = DEUDORES_RECORD.unpack(record)
+    return {
+        "numero_identificacion": _decode(numero_identificacion),
+        "fecha_informacion": _decode(fecha_informacion),
+        "peor_situacion": peor_situacion,
+    }
+
+
+def _pointer_path(kind: str) -> Path:
+    return SNAPSHOT_DIR / f"{kind}.current"
+
+
+def _replace_durably(tmp_path: Path, path: Path) -> None:
+    os.replace(tmp_path, path)
+    directory = os.open(SNAPSHOT_DIR, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def publish_file(kind: str, tmp_path: Path, path: Path) -> None:
+    """Renombra tmp_path a path, apunta <kind>.current a él y borra los archivos anteriores de ese tipo.
+
+    Los procesos que todavía tienen mapeado un archivo borrado siguen leyéndolo hasta que pasan al nuevo.
+    """
+    _replace_durably(tmp_path, path)
+    pointer_tmp = _pointer_path(kind).with_suffix(".tmp")
+    pointer_tmp.write_text(path.name, encoding="ascii")
+    _replace_durably(pointer_tmp, _pointer_path(kind))
+
+    for old_path in SNAPSHOT_DIR.glob(f"{kind}-*.bin"):
+        if old_path != path:
+            old_path.unlink(missing_ok=True)
+
+
+def write_snapshot(kind: str, job_id: str, records: Iterable[bytes]) -> int:
+    """Escribe el snapshot de job_id y lo publica; records tiene que venir ordenado por los primeros KEY_SIZE bytes.
+
+    El archivo se escribe completo con otro nombre y recién después se cambia el puntero, así que un proceso de
+    la API nunca ve un snapshot a medias.
+    """
+    record_size = RECORDS_BY_KIND[kind].size
+    SNAPSHOT_DIR.mkdir(exist_ok=True)
+    path = SNAPSHOT_DIR / f"{kind}-{job_id}.bin"
+    tmp_path = path.with_suffix(".tmp")
+    count = 0
+    previous_key = b""
+    try:
+        with tmp_path.open("wb", buffering=_WRITE_BUFFER_BYTES) as stream:
+            stream.write(bytes(HEADER_SIZE))
+            for record in records:
+                key = record[:KEY_SIZE]
+                if key < previous_key:
+                    raise SnapshotError("los registros no están ordenados por CUIT")
+                previous_key = key
+                stream.write(record)
+                count += 1
+            stream.seek(0)
+            stream.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, record_size, count, job_id.encode("ascii")))
+            stream.flush()
+            os.fsync(stream.fileno())
+        publish_file(kind, tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return count
+
+
+def discard_snapshot(kind: str) -> None:
+    """Quita el puntero para que la API vuelva a consultar PostgreSQL (por ejemplo, si no se pudo escribir)."""
+    _pointer_path(kind).unlink(missing_ok=True)
+
+
+class _MappedSnapshot:
+    def __init__(self, path: Path, record_size: int) -> None:
+        with path.open("rb") as stream:
+            self.map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, count, job_id = _HEADER.unpack_from(self.map)
+        if (
+            magic != SNAPSHOT_MAGIC
+            or version != SNAPSHOT_VERSION
+            or size != record_size
+            or len(self.map) != HEADER_SIZE + count * record_size
+        ):
+            self.map.close()
+            raise SnapshotError(f"{path.name} no es un snapshot válido")
+        self.name = path.name
+        self.record_size = record_size
+        self.count = count
+        self.job_id = job_id.rstrip(b"\0").decode("ascii")
+
+    def find(self, key: bytes) -> list[bytes]:
+        # Primer registro con clave >= key; los repetidos quedan a continuación.
+        size = self.record_size
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER_SIZE + middle * size
+            if self.map[offset:offset + KEY_SIZE] < key:
+                low = middle + 1
+            else:
+                high = middle
+        records = []
+        offset = HEADER_SIZE + low * size
+        end = HEADER_SIZE + self.count * size
+        while offset < end and self.map[offset:offset + KEY_SIZE] == key:
+            records.append(self.map[offset:offset + size])
+            offset += size
+        return records
+
+
+class PublishedFileReader(abc.ABC):
+    """Archivo vigente de un tipo en este proceso; lo vuelve a abrir cuando el puntero apunta a otro."""
+
+    def __init__(self, kind: str, enabled: bool) -> None:
+        self.kind = kind
+        self.enabled = enabled
+        self._file: Any = None
+        self._pointer = ""
+        self._next_poll_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    @abc.abstractmethod
+    def _open(self, path: Path) -> Any:
+        """Abre y valida el archivo publicado; un OSError o ValueError lo descarta y se sigue sin él."""
+
+    def _current(self) -> Any:
+        now = time.monotonic()
+        if not self.enabled or now < self._next_poll_at:
+            return self._file
+        with self._lock:
+            if now < self._next_poll_at:
+                return self._file
+            self._next_poll_at = now + SNAPSHOT_POLL_SECONDS
+            try:
+                pointer = _pointer_path(self.kind).read_text(encoding="ascii").strip()
+            except FileNotFoundError:
+                pointer = ""
+            if pointer == self._pointer:
+                return self._file
+
+            self._pointer = pointer
+            # El mapa anterior se cierra solo cuando ya no lo usa ninguna búsqueda en curso.
+            self._file = None
+            if pointer:
+                try:
+                    self._file = self._open(SNAPSHOT_DIR / pointer)
+                    self.reloads += 1
+                except (OSError, ValueError, struct.error):
+                    logger.warning("No se pudo abrir %s; se consulta PostgreSQL", pointer, exc_info=True)
+            return self._file
+
+
+class SnapshotReader(PublishedFileReader):
+    def __init__(self, kind: str) -> None:
+        super().__init__(kind, SNAPSHOTS_ENABLED)
+        self.record_size = RECORDS_BY_KIND[kind].size
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self, path: Path) -> _MappedSnapshot:
+        return _MappedSnapshot(path, self.record_size)
+
+    def lookup(self, key: str) -> Optional[list[bytes]]:
+        """Registros con esa clave, o None si no hay snapshot y la consulta tiene que ir a PostgreSQL."""
+        snapshot = self._current()
+        if snapshot is None or len(key) != KEY_SIZE:
+            return None
+        try:
+            encoded_key = key.encode("latin-1")
+        except UnicodeEncodeError:
+            return None
+        records = snapshot.find(encoded_key)
+        if records:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return records
+
+    def stats(self) -> dict[str, Any]:
+        snapshot = self._file
+        return {
+            "enabled": self.enabled,
+            "file": snapshot.name if snapshot is not None else None,
+            "job_id": snapshot.job_id if snapshot is not None else None,
+            "records": snapshot.count if snapshot is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+        }
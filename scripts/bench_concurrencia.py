@@ -0,0 +1,108 @@
+"""Carga con concurrencia fija contra la API: req/s y latencias (p50, p95, p99, máximo).
+
+Cada cliente es un hilo con su propia conexión HTTP/1.1 persistente que hace pedidos uno detrás del otro, así
+que siempre hay exactamente --concurrencia pedidos en vuelo. Solo usa la biblioteca estándar para poder
+correrlo igual contra cualquier versión de la API.
+
+Para comparar dos versiones sobre los mismos datos, levantar cada una contra la misma base y usar el mismo
+archivo de identificaciones, por ejemplo:
+
+    psql -Atc "select numero_identificacion from deudores_resumen order by md5(numero_identificacion) limit 5000" > ids.txt
+    python scripts/bench_concurrencia.py --url http://127.0.0.1:8000 --ruta "/deudor/{id}" --ids ids.txt --concurrencia 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import itertools
+import statistics
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+def _percentil(ordenadas: list[float], fraccion: float) -> float:
+    return ordenadas[min(len(ordenadas) - 1, int(fraccion * len(ordenadas)))]
+
+
+def correr(url: str, rutas: list[str], concurrencia: int, total: int) -> tuple[float, list[float], Counter]:
+    """Hace total pedidos repartidos entre concurrencia clientes; devuelve duración, latencias y códigos HTTP."""
+    destino = urlsplit(url)
+    siguiente = itertools.count()
+    lock = threading.Lock()
+    latencias: list[float] = []
+    codigos: Counter = Counter()
+
+    def cliente() -> None:
+        conexion = http.client.HTTPConnection(destino.hostname, destino.port or 80, timeout=120)
+        propias = []
+        propios = Counter()
+        while True:
+            with lock:
+                numero = next(siguiente)
+            if numero >= total:
+                break
+            inicio = time.perf_counter()
+            try:
+                conexion.request("GET", rutas[numero % len(rutas)])
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                propios[respuesta.status] += 1
+            except (OSError, http.client.HTTPException):
+                conexion.close()
+                propios["error"] += 1
+            propias.append(time.perf_counter() - inicio)
+        conexion.close()
+        with lock:
+            latencias.extend(propias)
+            codigos.update(propios)
+
+    hilos = [threading.Thread(target=cliente) for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return time.perf_counter() - inicio, latencias, codigos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--ruta", default="/deudor/{id}", help="plantilla de la ruta; {id} se reemplaza por cada identificación")
+    parser.add_argument("--ids", help="archivo con una identificación por línea (sin él se consulta siempre --id)")
+    parser.add_argument("--id", default="20123456786")
+    parser.add_argument("--concurrencia", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--calentamiento", type=int, default=200, help="pedidos previos que no se miden")
+    args = parser.parse_args()
+
+    if args.ids:
+        with open(args.ids, encoding="ascii") as archivo:
+            identificaciones = [linea.strip() for linea in archivo if linea.strip()]
+    else:
+        identificaciones = [args.id]
+    rutas = [args.ruta.format(id=identificacion) for identificacion in identificaciones]
+
+    if args.calentamiento:
+        correr(args.url, rutas, args.concurrencia, args.calentamiento)
+    duracion, latencias, codigos = correr(args.url, rutas, args.concurrencia, args.requests)
+
+    ordenadas = sorted(latencias)
+    print(f"{args.requests} pedidos, concurrencia {args.concurrencia}, {duracion:.2f} s")
+    print(f"{args.requests / duracion:,.0f} req/s")
+    print(
+        "latencia ms: "
+        f"media {statistics.fmean(ordenadas) * 1000:.1f}  "
+        f"p50 {_percentil(ordenadas, 0.50) * 1000:.1f}  "
+        f"p95 {_percentil(ordenadas, 0.95) * 1000:.1f}  "
+        f"p99 {_percentil(ordenadas, 0.99) * 1000:.1f}  "
+        f"max {ordenadas[-1] * 1000:.1f}"
+    )
+    print("códigos:", dict(sorted(codigos.items(), key=lambda item: str(item[0]))))
+
+
+if __name__ == "__main__":
+    main()
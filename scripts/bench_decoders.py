@@ -0,0 +1,130 @@
+"""Compara el decodificador por bloques con los formateadores por línea: filas/s, MB/s y que el texto coincida.
+
+Sin argumentos usa líneas sintéticas con el formato del BCRA; con --deudores o --padron mide un deudores.txt o
+padron.txt ya descomprimido. Los bloques son del mismo tamaño que usa la importación.
+
+    PYTHONPATH=. python scripts/bench_decoders.py --filas 200000
+    PYTHONPATH=. python scripts/bench_decoders.py --deudores /tmp/deudores.txt --padron /tmp/padron.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+from functools import partial
+from typing import Callable, Optional
+
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://bcra@localhost/bcra")
+
+from app.decoders import decode_deudores_block, decode_padron_block  # noqa: E402
+from app.import_jobs import (  # noqa: E402
+    DEUDORES_PARSE_CHUNK_BYTES,
+    PADRON_PARSE_CHUNK_BYTES,
+    _copy_nombre_entidad,
+    _format_deudor_line,
+    _format_padron_line,
+    _split_chunk_lines,
+)
+
+ENTIDADES = {f"{codigo:05d}": f"BANCO Ñ {codigo} S.A." for codigo in range(1, 60)}
+
+
+def _deudores_sinteticos(filas: int, rng: random.Random) -> bytes:
+    lines = []
+    for _ in range(filas):
+        montos = "".join(
+            f"{rng.randint(0, 999_999)},{rng.randint(0, 9)}".rjust(12) if rng.random() < 0.4 else " " * 12
+            for _ in range(11)
+        )
+        lines.append(
+            f"{rng.randint(1, 59):05d}20240511{rng.randint(20_000_000_000, 33_999_999_999)}001"
+            f"{rng.randint(1, 5):02d}{montos}010000{rng.randint(0, 365):03d}\r\n"
+        )
+    return "".join(lines).encode("latin-1")
+
+
+def _padron_sintetico(filas: int, rng: random.Random) -> bytes:
+    lines = [
+        f"{rng.randint(20_000_000_000, 33_999_999_999)}{f'PÉREZ ÑANDÚ {rng.randint(1, 10**6)}':<160}"
+        f"{rng.randint(0, 999_999):06d} {' ' * 11}N\r\n"
+        for _ in range(filas)
+    ]
+    return "".join(lines).encode("latin-1")
+
+
+def _bloques(data: bytes, chunk_bytes: int) -> list[bytes]:
+    chunks = []
+    start = 0
+    while start < len(data):
+        end = data.rfind(b"\n", start, start + chunk_bytes) + 1 or len(data)
+        chunks.append(data[start:end])
+        start = end
+    return chunks
+
+
+def _medir(
+    nombre: str,
+    chunks: list[bytes],
+    decode: Callable[[bytes], Optional[tuple[int, str]]],
+    format_line: Callable[[str], str],
+) -> None:
+    total_bytes = sum(len(chunk) for chunk in chunks)
+
+    started = time.perf_counter()
+    referencia = ["".join([format_line(line) for line in _split_chunk_lines(chunk)]) for chunk in chunks]
+    reference_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    decoded = [decode(chunk) for chunk in chunks]
+    decode_seconds = time.perf_counter() - started
+
+    filas = sum(len(_split_chunk_lines(chunk)) for chunk in chunks)
+    fallback = sum(1 for result in decoded if result is None)
+    iguales = all(result is None or result[1] == text for result, text in zip(decoded, referencia))
+    for etiqueta, seconds in (("por línea", reference_seconds), ("por bloque", decode_seconds)):
+        print(
+            f"{nombre:<20} {etiqueta:<11} {filas / seconds:>12,.0f} filas/s {total_bytes / seconds / 2**20:>8,.1f} MB/s"
+        )
+    print(f"{nombre:<20} bloques al formateador por línea: {fallback}/{len(chunks)}, texto idéntico: {iguales}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deudores", help="deudores.txt descomprimido")
+    parser.add_argument("--padron", help="padron.txt descomprimido")
+    parser.add_argument("--filas", type=int, default=200_000, help="filas sintéticas cuando no se pasa un archivo")
+    parser.add_argument("--bloque", type=int, help="bytes por bloque (por defecto, los de la importación)")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    if args.deudores:
+        with open(args.deudores, "rb") as archivo:
+            deudores = archivo.read()
+    else:
+        deudores = _deudores_sinteticos(args.filas, rng)
+    if args.padron:
+        with open(args.padron, "rb") as archivo:
+            padron = archivo.read()
+    else:
+        padron = _padron_sintetico(args.filas, rng)
+
+    chunks = _bloques(deudores, args.bloque or DEUDORES_PARSE_CHUNK_BYTES)
+    _medir(
+        "deudores",
+        chunks,
+        partial(decode_deudores_block, nombre_entidad=partial(_copy_nombre_entidad, entidades_lookup=ENTIDADES)),
+        partial(_format_deudor_line, entidades_lookup=ENTIDADES),
+    )
+    _medir(
+        "deudores (compacto)",
+        chunks,
+        partial(decode_deudores_block, nombre_entidad=None),
+        partial(_format_deudor_line, entidades_lookup=None),
+    )
+    _medir("padron", _bloques(padron, args.bloque or PADRON_PARSE_CHUNK_BYTES), decode_padron_block, _format_padron_line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import os
+
+# app.database crea los engines al importarse; sin conectarse, solo necesita una URL.
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://bcra@localhost/bcra")
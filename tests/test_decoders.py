@@ -0,0 +1,189 @@
+"""Los decodificadores por bloque tienen que producir exactamente el texto de los formateadores por línea."""
+
+import random
+from functools import partial
+from typing import Optional
+
+import pytest
+
+from app.decoders import DEUDOR_FIELDS, INTEGER, NUMERIC, PADRON_FIELDS, decode_deudores_block, decode_padron_block
+from app.import_jobs import (
+    DEUDOR_COMPACT_COPY_COLUMNS,
+    _copy_nombre_entidad,
+    _format_deudor_line,
+    _format_deudores_chunk,
+    _format_padron_chunk,
+    _format_padron_line,
+    _split_chunk_lines,
+)
+
+ENTIDADES = {
+    "00007": "BANCO DE GALICIA Y BUENOS AIRES S.A.U.",
+    "00011": "BANCO DE LA NACIÓN ARGENTINA",
+    "00014": "BANCO DE LA PROVINCIA DE BUENOS AIRES",
+    "00044": "COMPAÑÍA FINANCIERA\tCON TAB \\ Y BARRA",
+    "55001": "N" * 300,
+}
+
+# Todo latin-1 salvo salto de línea, tabulación, retorno de carro y barra invertida, que llevan el bloque al
+# formateador por línea. Los espacios pesan más para que haya campos vacíos y rellenos de todo tipo.
+_BYTES = [chr(byte) for byte in range(256) if byte not in (9, 10, 13, 92)]
+_BLANCOS = [" ", " ", " ", "\xa0", "\x85", "\x0b", "\x0c", "\x1c", "\x1f"]
+
+
+def _relleno(rng: random.Random, width: int, content: str) -> str:
+    content = content[:width]
+    left = rng.randint(0, width - len(content))
+    return (
+        "".join(rng.choice(_BLANCOS) for _ in range(left))
+        + content
+        + "".join(rng.choice(_BLANCOS) for _ in range(width - len(content) - left))
+    )
+
+
+def _campo(rng: random.Random, width: int, kind: str) -> str:
+    if rng.random() < 0.2:
+        return _relleno(rng, width, "")
+    if kind == INTEGER:
+        return _relleno(rng, width, str(rng.randint(0, 10 ** width - 1)))
+    if kind == NUMERIC:
+        return _relleno(rng, width, f"{rng.randint(0, 9_999_999)},{rng.randint(0, 9)}")
+    return _relleno(rng, width, "".join(rng.choice(_BYTES + _BLANCOS) for _ in range(rng.randint(1, width))))
+
+
+def _linea(rng: random.Random, fields: tuple, entidad: Optional[str] = None) -> str:
+    line = "".join(_campo(rng, end - start, kind) for start, end, kind in fields)
+    if entidad is not None:
+        line = _relleno(rng, 5, entidad) + line[5:]
+    return line
+
+
+def _deudores(rng: random.Random, rows: int, eol: str = "\n") -> bytes:
+    codigos = [*ENTIDADES, "99999", ""]
+    lines = [_linea(rng, DEUDOR_FIELDS, rng.choice(codigos)) for _ in range(rows)]
+    return "".join(line + eol for line in lines).encode("latin-1")
+
+
+def _padron(rng: random.Random, rows: int, eol: str = "\n") -> bytes:
+    return "".join(_linea(rng, PADRON_FIELDS) + eol for _ in range(rows)).encode("latin-1")
+
+
+def _referencia_deudores(raw_chunk: bytes, entidades_lookup) -> str:
+    return "".join(_format_deudor_line(line, entidades_lookup) for line in _split_chunk_lines(raw_chunk))
+
+
+def _referencia_padron(raw_chunk: bytes) -> str:
+    return "".join(_format_padron_line(line) for line in _split_chunk_lines(raw_chunk))
+
+
+def _nombre_entidad(entidades_lookup):
+    return partial(_copy_nombre_entidad, entidades_lookup=entidades_lookup)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("eol", ["\n", "\r\n"])
+def test_deudores_igual_a_referencia(seed, eol):
+    raw_chunk = _deudores(random.Random(seed), 500, eol)
+    decoded = decode_deudores_block(raw_chunk, _nombre_entidad(ENTIDADES))
+    assert decoded == (500, _referencia_deudores(raw_chunk, ENTIDADES))
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("eol", ["\n", "\r\n"])
+def test_deudores_compacto_igual_a_referencia(seed, eol):
+    raw_chunk = _deudores(random.Random(seed), 500, eol)
+    assert decode_deudores_block(raw_chunk, None) == (500, _referencia_deudores(raw_chunk, None))
+
+    chunk = _format_deudores_chunk(raw_chunk, ENTIDADES, compact=True)
+    assert (chunk.rows, chunk.text, chunk.stage) == (500, _referencia_deudores(raw_chunk, None), "decode")
+
+
+def test_deudores_compacto_valida_el_periodo():
+    rng = random.Random(11)
+    lines = [_linea(rng, DEUDOR_FIELDS, "00007") for _ in range(100)]
+    raw_chunk = "".join(line[:5] + "202405" + line[11:] + "\n" for line in lines).encode("latin-1")
+    expected = _referencia_deudores(raw_chunk, None)
+    assert {len(row.split("\t")) for row in expected.split("\n")[:-1]} == {len(DEUDOR_COMPACT_COPY_COLUMNS)}
+    assert decode_deudores_block(raw_chunk, None, "202405") == (100, expected)
+
+    otro_periodo = raw_chunk.replace(b"00007202405", b"00007202404", 1)
+    assert decode_deudores_block(otro_periodo, None, "202405") is None
+    with pytest.raises(ValueError, match="202404"):
+        _format_deudores_chunk(otro_periodo, compact=True, fecha_informacion="202405")
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("eol", ["\n", "\r\n"])
+def test_padron_igual_a_referencia(seed, eol):
+    raw_chunk = _padron(random.Random(seed), 500, eol)
+    assert decode_padron_block(raw_chunk) == (500, _referencia_padron(raw_chunk))
+
+
+def test_relleno_latin1_se_recorta_como_str_strip():
+    fields = [
+        "00007",
+        "202405",
+        "\x851",
+        "20123456786",
+        "\x1c\x1d\x1e",
+        "\xa01",
+        *(f"\x85   1234,5\xa0\x0b" for _ in range(11)),
+        "\x0c", "1", "\xa0", "0", "\x85", "1",
+        "\x1f3\xa0",
+    ]
+    line = "".join(fields)
+    assert len(line) == 170
+    raw_chunk = (line + "\n").encode("latin-1") * 3
+
+    for entidades_lookup in (ENTIDADES, None):
+        nombre_entidad = _nombre_entidad(entidades_lookup) if entidades_lookup is not None else None
+        decoded = decode_deudores_block(raw_chunk, nombre_entidad)
+        assert decoded == (3, _referencia_deudores(raw_chunk, entidades_lookup))
+
+    padron = f"\xa020123456786{'PÉREZ ÑANDÚ MARÍA':\xa0<160}\x85\x85\x85\x85\x85\x85 {' ' * 11}\xa0\n".encode("latin-1")
+    assert decode_padron_block(padron) == (1, _referencia_padron(padron))
+
+
+def test_lineas_mas_largas_que_el_formato():
+    rng = random.Random(7)
+    raw_chunk = "".join(_linea(rng, DEUDOR_FIELDS, "00007") + "EXTRA \\\t\r\n" for _ in range(50)).encode("latin-1")
+    decoded = decode_deudores_block(raw_chunk, _nombre_entidad(ENTIDADES))
+    assert decoded == (50, _referencia_deudores(raw_chunk, ENTIDADES))
+
+
+@pytest.mark.parametrize(
+    "raw_chunk",
+    [
+        # Líneas de distinto largo.
+        b"".join((b"00007202405" + b"x" * length + b"\n") for length in (159, 170, 40, 0, 200)),
+        # Todas cortas: los campos que faltan quedan vacíos.
+        b"00007202405112012345678600101\n" * 4,
+        # Última línea sin salto de línea.
+        b"0" * 170 + b"\n" + b"0" * 170,
+        # Tabulación, barra invertida y retorno de carro dentro de los campos.
+        b"00007202405\t1" + b"1" * 157 + b"\n" + b"00007202405\\1" + b"1" * 157 + b"\n",
+        b"0000\r202405" + b"1" * 159 + b"\r\n",
+        b"",
+    ],
+)
+def test_bloques_irregulares_usan_el_formateador_por_linea(raw_chunk):
+    for entidades_lookup in (ENTIDADES, None):
+        nombre_entidad = _nombre_entidad(entidades_lookup) if entidades_lookup is not None else None
+        assert decode_deudores_block(raw_chunk, nombre_entidad) is None
+
+        chunk = _format_deudores_chunk(raw_chunk, entidades_lookup, compact=entidades_lookup is None)
+        expected = _referencia_deudores(raw_chunk, entidades_lookup)
+        assert (chunk.rows, chunk.text, chunk.stage) == (len(_split_chunk_lines(raw_chunk)), expected, "format_lines")
+
+    assert decode_padron_block(raw_chunk) is None
+    chunk = _format_padron_chunk(raw_chunk)
+    assert (chunk.text, chunk.stage) == (_referencia_padron(raw_chunk), "format_lines")
+
+
+def test_nombre_de_entidad_fuera_de_latin1_usa_el_formateador_por_linea():
+    entidades_lookup = {**ENTIDADES, "00007": "BANCO € S.A."}
+    raw_chunk = _deudores(random.Random(3), 100)
+    assert decode_deudores_block(raw_chunk, _nombre_entidad(entidades_lookup)) is None
+
+    chunk = _format_deudores_chunk(raw_chunk, entidades_lookup)
+    assert (chunk.text, chunk.stage) == (_referencia_deudores(raw_chunk, entidades_lookup), "format_lines")